@@ -0,0 +1,399 @@
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Callable
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS: dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1, ops: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "runs": repeat,
+        "median_ms": round(median * 1000, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+        "ops_per_sec": round(ops / median, 2) if median > 0 else None,
+    }
+
+
+class Context:
+    def __init__(self, workdir: Path, readings: int, repeat: int) -> None:
+        self.workdir = workdir
+        self.readings = readings
+        self.repeat = repeat
+        self._db = None
+
+    def database(self):
+        from benchmarks.synthetic import build_database
+        from heater_reader.db import Database
+
+        if self._db is None:
+            path = self.workdir / f"readings-{self.readings}.db"
+            if path.exists():
+                self._db = Database(path)
+                self._db.init_schema()
+            else:
+                started = time.perf_counter()
+                self._db = build_database(path, self.readings)
+                print(f"built {path} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return self._db
+
+
+@benchmark("parse_reading")
+def bench_parse_reading(ctx: Context) -> dict:
+    from heater_reader.ocr import parse_reading
+
+    text = "45/55 42/50\nPRACA\n"
+    return measure(lambda: [parse_reading(text) for _ in range(1000)], ctx.repeat, ops=1000)
+
+
+@benchmark("extract_text_from_image")
+def bench_extract_text(ctx: Context) -> dict:
+    from benchmarks.synthetic import random_reading, render_text_frame
+    from heater_reader.ocr_pipeline import extract_text_from_image
+    import cv2
+
+    if shutil.which("tesseract") is None:
+        return {"skipped": "tesseract binary not found"}
+    path = ctx.workdir / "text-frame.png"
+    cv2.imwrite(str(path), render_text_frame(random_reading(random.Random(0))))
+    return measure(lambda: extract_text_from_image(path), max(3, ctx.repeat // 5))
+
+
+@benchmark("seven_segment_recognize")
+def bench_seven_segment(ctx: Context) -> dict:
+    from benchmarks.synthetic import MODE_BOX, digit_boxes, display_crop, random_reading, render_frame
+    from heater_reader.ocr_pipeline import apply_crop
+    from heater_reader.seven_segment import SevenSegmentEngine
+
+    rng = random.Random(0)
+    crops = [apply_crop(render_frame(random_reading(rng), seed=i), display_crop()) for i in range(100)]
+    engine = SevenSegmentEngine(digit_boxes(), mode_indicator=MODE_BOX)
+    return measure(lambda: [engine.recognize(crop) for crop in crops], ctx.repeat, ops=len(crops))
+
+
+@benchmark("list_effective_readings_day")
+def bench_list_day(ctx: Context) -> dict:
+    from benchmarks.synthetic import database_range
+    from datetime import timedelta
+
+    db = ctx.database()
+    start, end = database_range(ctx.readings)
+    middle = start + (end - start) / 2
+    return measure(lambda: db.list_effective_readings(start=middle, end=middle + timedelta(days=1)), ctx.repeat)
+
+
+@benchmark("list_effective_readings_page")
+def bench_list_page(ctx: Context) -> dict:
+    db = ctx.database()
+    after_id = ctx.readings // 2
+    return measure(lambda: db.list_effective_readings(limit=1000, after_id=after_id), ctx.repeat)
+
+
+@benchmark("api_readings")
+def bench_api_readings(ctx: Context) -> dict:
+    from benchmarks.synthetic import database_range
+    from datetime import timedelta
+    from fastapi.testclient import TestClient
+    from heater_reader.app import create_app
+
+    db = ctx.database()
+    start, end = database_range(ctx.readings)
+    middle = start + (end - start) / 2
+    params = {"from": middle.isoformat(), "to": (middle + timedelta(days=1)).isoformat()}
+    with TestClient(create_app(str(db.path), db=db)) as client:
+        return measure(lambda: client.get("/api/readings", params=params).raise_for_status(), ctx.repeat)
+
+
+@benchmark("api_readings_series")
+def bench_api_series(ctx: Context) -> dict:
+    from fastapi.testclient import TestClient
+    from heater_reader.app import create_app
+
+    db = ctx.database()
+    with TestClient(create_app(str(db.path), db=db)) as client:
+        return measure(lambda: client.get("/api/readings/series").raise_for_status(), ctx.repeat)
+
+
+@benchmark("api_export")
+def bench_api_export(ctx: Context) -> dict:
+    from fastapi.testclient import TestClient
+    from heater_reader.app import create_app
+    from heater_reader.db import EXPORT_COLUMNS
+    from heater_reader.export import encode_rows
+    import tracemalloc
+
+    db = ctx.database()
+
+    def export(params: dict) -> int:
+        size = 0
+        with client.stream("GET", "/api/export", params=params) as response:
+            for chunk in response.iter_raw():
+                size += len(chunk)
+        return size
+
+    with TestClient(create_app(str(db.path), db=db)) as client:
+        results = {fmt: measure(lambda: export({"format": fmt}), max(3, ctx.repeat // 5)) for fmt in ("csv", "ndjson")}
+        results["csv_gzip"] = measure(lambda: export({"gzip": "true"}), max(3, ctx.repeat // 5))
+    # The test client buffers whole responses, so peak memory is taken on the streaming body itself.
+    tracemalloc.start()
+    for _ in encode_rows("ndjson", EXPORT_COLUMNS, db.iter_export_rows()):
+        pass
+    results["ndjson"]["peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    tracemalloc.stop()
+    return results
+
+
+@benchmark("api_snapshot")
+def bench_api_snapshot(ctx: Context) -> dict:
+    from benchmarks.synthetic import FakeCapture, random_reading, render_frame
+    from fastapi.testclient import TestClient
+    from heater_reader.app import create_app
+    from heater_reader.capture import FrameGrabber
+
+    rng = random.Random(0)
+    frames = [render_frame(random_reading(rng), seed=i) for i in range(10)]
+    url = "rtsp://bench/stream"
+    grabber = FrameGrabber(url, open_capture=lambda _: FakeCapture(frames))
+    app = create_app(str(ctx.workdir / "snapshot.db"), rtsp_url=url, frame_grabber=grabber)
+
+    def uncached() -> None:
+        app.state.snapshot_cache._snapshot = None
+        client.get("/api/snapshot").raise_for_status()
+
+    with TestClient(app) as client:
+        return {
+            "miss": measure(uncached, ctx.repeat),
+            "hit": measure(lambda: client.get("/api/snapshot").raise_for_status(), ctx.repeat),
+        }
+
+
+@benchmark("api_slow_camera")
+def bench_api_slow_camera(ctx: Context) -> dict:
+    from heater_reader.app import create_app
+    import asyncio
+    import httpx
+
+    db = ctx.database()
+    app = create_app(str(db.path), db=db, rtsp_url="rtsp://bench/stream", camera_timeout=1.0)
+
+    def slow_snapshot(rtsp_url):
+        time.sleep(2.0)
+        return b"jpeg", 10, 10
+
+    app.state.get_snapshot = slow_snapshot
+
+    async def latencies(client, path: str, params: dict | None = None) -> dict:
+        samples = []
+        for _ in range(ctx.repeat):
+            start = time.perf_counter()
+            (await client.get(path, params=params)).raise_for_status()
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return {"runs": len(samples), "median_ms": round(statistics.median(samples) * 1000, 4)}
+
+    async def scenario() -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            params = {"limit": 100}
+            results = {
+                "idle_health": await latencies(client, "/health"),
+                "idle_readings": await latencies(client, "/api/readings", params),
+            }
+            # Keep far more snapshot requests in flight than there are camera workers.
+            snapshots = [asyncio.ensure_future(client.get("/api/snapshot")) for _ in range(50)]
+            await asyncio.sleep(0.1)
+            results["loaded_health"] = await latencies(client, "/health")
+            results["loaded_readings"] = await latencies(client, "/api/readings", params)
+            await asyncio.gather(*snapshots)
+            return results
+
+    return asyncio.run(scenario())
+
+
+@benchmark("http_snapshot")
+def bench_http_snapshot(ctx: Context) -> dict:
+    from benchmarks.synthetic import FakeCapture, random_reading, render_frame
+    from heater_reader.capture import FrameGrabber, encode_frame_to_jpeg, grab_rtsp_snapshot
+    from heater_reader.snapshot_source import HttpSnapshotSource
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import threading
+
+    frame = render_frame(random_reading(random.Random(0)))
+    jpeg = encode_frame_to_jpeg(frame)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.end_headers()
+            self.wfile.write(jpeg)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/snapshot.jpg"
+    grabber = FrameGrabber("rtsp://bench/stream", open_capture=lambda _: FakeCapture([frame]))
+    source = HttpSnapshotSource(url)
+    try:
+        return {
+            "keep_alive": measure(source.snapshot, ctx.repeat),
+            "new_connection": measure(lambda: HttpSnapshotSource(url).snapshot(), ctx.repeat),
+            "rtsp_encode": measure(lambda: grab_rtsp_snapshot(grabber), ctx.repeat),
+        }
+    finally:
+        source.close()
+        grabber.stop()
+        server.shutdown()
+        server.server_close()
+
+
+@benchmark("ingest_throughput")
+def bench_ingest(ctx: Context) -> dict:
+    from benchmarks.synthetic import random_reading, render_frame, write_config
+    from heater_reader.capture import capture_and_ocr
+    from heater_reader.db import Database
+    from heater_reader.ingest import IngestPipeline
+
+    rng = random.Random(0)
+    frames = [render_frame(random_reading(rng), seed=i) for i in range(20)]
+    count = max(50, ctx.repeat * 10)
+
+    def run_once() -> None:
+        root = Path(tempfile.mkdtemp(dir=ctx.workdir))
+        try:
+            config_path = write_config(root / "config.yml", root / "images")
+            db = Database(root / "ingest.db")
+            db.init_schema()
+            ticks = iter(range(count))
+            stamp = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+            def grab():
+                i = next(ticks)
+                return frames[i % len(frames)], datetime.fromtimestamp(stamp + i, timezone.utc)
+
+            pipeline = IngestPipeline(
+                db,
+                grab=grab,
+                image_root=root / "images",
+                ocr=partial(capture_and_ocr, config_path=config_path),
+            )
+            pipeline.start_workers()
+            for _ in range(count):
+                # Keep the producer just ahead of OCR so the non-blocking store -> OCR hand-off never drops.
+                while sum(pipeline.queue_depths().values()) >= 3:
+                    time.sleep(0.0005)
+                pipeline.tick()
+            pipeline.stop()
+            stored = len(db.list_effective_readings())
+            db.close()
+            if stored != count:
+                raise RuntimeError(f"ingest stored {stored} of {count} frames")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return measure(run_once, 3, warmup=0, ops=count)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in sorted(_flatten(current["results"]).items()):
+        previous = _flatten(baseline.get("results", {})).get(name)
+        if previous is None or "median_ms" not in result or "median_ms" not in previous:
+            continue
+        ratio = result["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:40s} {previous['median_ms']:>12.3f} -> {result['median_ms']:>12.3f} ms  x{ratio:5.2f}  {status}")
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, dict]:
+    flat = {}
+    for name, result in results.items():
+        key = f"{prefix}{name}"
+        if isinstance(result, dict) and "median_ms" not in result and "skipped" not in result:
+            flat.update(_flatten(result, f"{key}."))
+        else:
+            flat[key] = result
+    return flat
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="heater-reader performance benchmarks")
+    parser.add_argument("--readings", type=int, default=1_000_000, help="rows in the synthetic database")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workdir", default="data/bench", help="where generated databases are kept between runs")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging, 0.25 = 25%%")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    ctx = Context(workdir, args.readings, args.repeat)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = BENCHMARKS[name](ctx)
+        print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "readings": args.readings,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
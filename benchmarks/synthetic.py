@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from heater_reader.db import Database, format_timestamp
+from heater_reader.ocr import ReadingText
+import cv2
+import numpy as np
+import random
+import yaml
+
+# Segment rectangles (x0, y0, x1, y1) inside a 30x50 digit box, segments a-g.
+SEGMENTS = {
+    "a": (6, 0, 24, 5),
+    "b": (24, 6, 30, 22),
+    "c": (24, 28, 30, 44),
+    "d": (6, 45, 24, 50),
+    "e": (0, 28, 6, 44),
+    "f": (0, 6, 6, 22),
+    "g": (6, 23, 24, 27),
+}
+DIGITS = {
+    "0": "abcdef", "1": "bc", "2": "abdeg", "3": "abcdg", "4": "bcfg",
+    "5": "acdfg", "6": "acdefg", "7": "abc", "8": "abcdefg", "9": "abcdfg",
+}
+FIELDS = ("boiler_current", "boiler_set", "radiator_current", "radiator_set")
+FRAME_SIZE = (480, 640)
+DISPLAY_ORIGIN = (120, 200)
+MODE_BOX = [340, 5, 12, 12]
+
+
+def random_reading(rng: random.Random) -> ReadingText:
+    return ReadingText(
+        boiler_current=rng.randint(30, 80),
+        boiler_set=rng.choice((50, 55, 60, 65)),
+        radiator_current=rng.randint(25, 60),
+        radiator_set=rng.choice((40, 45, 50)),
+        mode=rng.choice(("PRACA", "PODTRZYMANIE")),
+    )
+
+
+def digit_boxes() -> dict[str, list[list[int]]]:
+    return {
+        field: [[(column * 2 + offset) * 40 + 5, 5, 30, 50] for offset in range(2)]
+        for column, field in enumerate(FIELDS)
+    }
+
+
+def render_display(reading: ReadingText) -> np.ndarray:
+    display = np.full((60, 360, 3), 255, dtype=np.uint8)
+    for field, boxes in digit_boxes().items():
+        text = f"{getattr(reading, field):2d}"
+        for (x, y, _, _), digit in zip(boxes, text):
+            for segment in DIGITS.get(digit, ""):
+                x0, y0, x1, y1 = SEGMENTS[segment]
+                display[y + y0 : y + y1, x + x0 : x + x1] = 0
+    if reading.mode == "PRACA":
+        x, y, w, h = MODE_BOX
+        display[y : y + h, x : x + w] = 0
+    return display
+
+
+def render_frame(reading: ReadingText, noise: int = 6, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(90, 90 + max(noise, 1), size=(*FRAME_SIZE, 3), dtype=np.uint8)
+    display = render_display(reading)
+    y, x = DISPLAY_ORIGIN
+    frame[y : y + display.shape[0], x : x + display.shape[1]] = display
+    return frame
+
+
+def render_text_frame(reading: ReadingText) -> np.ndarray:
+    image = np.full((120, 640, 3), 255, dtype=np.uint8)
+    lines = (
+        f"{reading.boiler_current}/{reading.boiler_set}  {reading.radiator_current}/{reading.radiator_set}",
+        reading.mode,
+    )
+    for row, line in enumerate(lines):
+        cv2.putText(image, line, (20, 50 + row * 50), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3, cv2.LINE_AA)
+    return image
+
+
+def display_crop() -> dict[str, int]:
+    y, x = DISPLAY_ORIGIN
+    return {"x": x, "y": y, "w": 360, "h": 60}
+
+
+def write_config(path: Path, image_root: Path) -> Path:
+    raw = {
+        "capture": {"image_root": str(image_root), "crop": display_crop()},
+        "ocr": {"engine": "seven_segment", "digits": digit_boxes(), "mode_indicator": MODE_BOX},
+    }
+    path.write_text(yaml.safe_dump(raw, sort_keys=False))
+    return path
+
+
+class FakeCapture:
+    def __init__(self, frames: list[np.ndarray]) -> None:
+        self._frames = frames
+        self._index = 0
+
+    def read(self):
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        return True, frame
+
+    def release(self) -> None:
+        pass
+
+
+def build_database(
+    path: Path,
+    readings: int,
+    edit_ratio: float = 0.01,
+    interval_seconds: int = 60,
+    seed: int = 0,
+    batch_size: int = 50_000,
+) -> Database:
+    rng = random.Random(seed)
+    db = Database(path)
+    db.init_schema()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with db._connect() as conn:
+        for first in range(0, readings, batch_size):
+            rows = []
+            for i in range(first, min(first + batch_size, readings)):
+                reading = random_reading(rng)
+                captured_at = start + timedelta(seconds=i * interval_seconds)
+                rows.append(
+                    (
+                        format_timestamp(captured_at),
+                        reading.boiler_current,
+                        reading.boiler_set,
+                        reading.radiator_current,
+                        reading.radiator_set,
+                        reading.mode,
+                        captured_at.strftime("data/images/%Y/%m/%d/%H%M%S.jpg"),
+                    )
+                )
+            conn.executemany(
+                """
+                INSERT INTO readings (
+                    captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+        edits = [
+            (reading_id, rng.randint(30, 80), "bench")
+            for reading_id in rng.sample(range(1, readings + 1), int(readings * edit_ratio))
+        ]
+        conn.executemany("INSERT INTO edits (reading_id, boiler_current, edited_by) VALUES (?, ?, ?)", edits)
+    db.rebuild_effective_readings()
+    return db
+
+
+def database_range(readings: int, interval_seconds: int = 60) -> tuple[datetime, datetime]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return start, start + timedelta(seconds=readings * interval_seconds)
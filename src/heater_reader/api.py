@@ -1,52 +1,269 @@
 from datetime import datetime, timezone
-from fastapi import APIRouter, Request, Response, HTTPException
-from fastapi.responses import HTMLResponse
-from heater_reader.db import Database
-from heater_reader.config import load_config
+from email.utils import format_datetime
+from fastapi import APIRouter, Header, Query, Request, Response, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from heater_reader.db import EXPORT_COLUMNS, RAW_EXPORT_COLUMNS, Database
+from heater_reader.export import FORMATS, encode_rows, gzip_chunks
+from heater_reader.metrics import REGISTRY, render_counter, render_gauge
+from heater_reader.config import config_service
 from pathlib import Path
 from pydantic import BaseModel
-import yaml
+import asyncio
 
 router = APIRouter()
 
 
 @router.get("/health")
-def health():
-    return {"status": "ok"}
+async def health(request: Request):
+    pipeline = request.app.state.pipeline
+    if pipeline is None:
+        return {"status": "ok", "last_capture_at": None, "queue_depths": {}}
+    last = pipeline.last_capture_at
+    body = {
+        "status": "ok",
+        "last_capture_at": last.isoformat() if last else None,
+        "queue_depths": pipeline.queue_depths(),
+        "dropped_frames": pipeline.dropped_frames,
+    }
+    if hasattr(pipeline, "devices"):
+        body["devices"] = pipeline.devices()
+    return body
+
+
+def resolve_device(request: Request, device: str | None) -> str:
+    devices = request.app.state.devices
+    if device is None:
+        if not devices:
+            raise HTTPException(status_code=400, detail="rtsp_url_missing")
+        return next(iter(devices))
+    if device not in devices:
+        raise HTTPException(status_code=404, detail="unknown_device")
+    return device
+
+
+@router.get("/api/devices")
+async def list_devices(request: Request):
+    pipeline = request.app.state.pipeline
+    status = pipeline.devices() if hasattr(pipeline, "devices") else {}
+    return [{"id": device_id, **status.get(device_id, {})} for device_id in request.app.state.devices]
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    parts = [REGISTRY.render()]
+    pipeline = request.app.state.pipeline
+    if pipeline is not None:
+        depths = pipeline.queue_depths()
+        parts.append(
+            render_gauge(
+                "heater_ingest_queue_depth",
+                "Jobs waiting in each ingest queue.",
+                [({"queue": name}, depth) for name, depth in depths.items()],
+            )
+        )
+        parts.append(
+            render_gauge("heater_ingest_dropped_frames", "Frames dropped because a queue was full.", [({}, pipeline.dropped_frames)])
+        )
+        if pipeline.last_capture_at is not None:
+            parts.append(
+                render_gauge(
+                    "heater_last_capture_timestamp_seconds",
+                    "Unix time of the last stored reading.",
+                    [({}, pipeline.last_capture_at.timestamp())],
+                )
+            )
+    cache = request.app.state.ocr_cache
+    if cache is not None:
+        stats = cache.stats()
+        parts.append(
+            render_counter(
+                "heater_ocr_cache_lookups_total",
+                "OCR cache lookups by outcome since start.",
+                [({"result": name}, stats[name]) for name in ("unchanged", "hits", "misses")],
+            )
+        )
+        parts.append(render_gauge("heater_ocr_cache_entries", "Readings held in the OCR cache.", [({}, stats["size"])]))
+    return PlainTextResponse("".join(parts), media_type="text/plain; version=0.0.4")
+
+
+def parse_time_param(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_time")
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
 
 
 @router.get("/api/readings")
-def readings(request: Request):
-    db = Database(request.app.state.db_path)
-    rows = db.list_effective_readings()
-    return [dict(row) for row in rows]
+async def readings(
+    request: Request,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+    limit: int | None = Query(None, ge=1, le=10000),
+    after_id: int | None = None,
+    after: str | None = None,
+    since: int | None = Query(None, ge=0),
+    device: str | None = None,
+):
+    if since is not None and limit is not None:
+        # A truncated delta would still carry the latest seq, so the client would never ask for the cut rows.
+        raise HTTPException(status_code=400, detail="limit_with_since")
+    db: Database = request.app.state.db
+    offload = request.app.state.db_offload
+    seq = await offload.run(db.latest_change_id)
+    headers = {"ETag": f'"{seq}"', "X-Change-Seq": str(seq)}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if since is not None and since < await offload.run(db.change_floor):
+        raise HTTPException(status_code=410, detail="since_expired", headers=headers)
+    if after is not None and after_id is None:
+        raise HTTPException(status_code=400, detail="after_without_after_id")
+    try:
+        rows = await offload.run(
+            db.list_effective_readings,
+            start=parse_time_param(from_),
+            end=parse_time_param(to),
+            limit=limit,
+            after_id=after_id,
+            since=since,
+            device_id=device,
+            after_captured_at=parse_time_param(after),
+        )
+    except KeyError:
+        raise HTTPException(status_code=400, detail="unknown_after_id")
+    body = [dict(row) for row in rows]
+    if since is not None:
+        deleted = await offload.run(db.list_deleted_since, since, device)
+        body.extend({"id": reading_id, "deleted": True} for reading_id in deleted)
+    return JSONResponse(body, headers=headers)
+
+
+@router.get("/api/readings/events")
+async def reading_events(
+    request: Request,
+    last_event_id: str | None = Header(None),
+    after: int | None = Query(None, ge=0),
+):
+    if after is None and last_event_id:
+        try:
+            after = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid_last_event_id")
+    return StreamingResponse(
+        request.app.state.changes.stream(after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/api/readings/series")
+async def readings_series(
+    request: Request,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+    points: int = Query(500, ge=2, le=5000),
+    method: str = Query("minmax", pattern="^(minmax|lttb)$"),
+    device: str | None = None,
+):
+    from heater_reader.series import build_series
+
+    return await request.app.state.db_offload.run(
+        build_series,
+        request.app.state.db,
+        start=parse_time_param(from_),
+        end=parse_time_param(to),
+        points=points,
+        method=method,
+        device_id=device,
+    )
+
+
+@router.get("/api/export")
+async def export_readings(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+    raw: bool = False,
+    device: str | None = None,
+    gzip: bool = False,
+):
+    if device is not None:
+        resolve_device(request, device)
+    db: Database = request.app.state.db
+    rows = db.iter_export_rows(
+        start=parse_time_param(from_),
+        end=parse_time_param(to),
+        raw=raw,
+        device_id=device,
+    )
+    body = encode_rows(format, RAW_EXPORT_COLUMNS if raw else EXPORT_COLUMNS, rows)
+    headers = {"Cache-Control": "no-store", "Content-Disposition": f'attachment; filename="readings.{format}"'}
+    if gzip:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(request.app.state.db_offload.iterate(body), media_type=FORMATS[format], headers=headers)
 
 
 @router.get("/")
-def index():
+async def index():
     html = Path(__file__).parent / "static" / "index.html"
-    return HTMLResponse(html.read_text())
+    return HTMLResponse(await asyncio.to_thread(html.read_text))
 
 
 @router.get("/api/snapshot")
-def snapshot(request: Request):
-    rtsp_url = request.app.state.rtsp_url
+async def snapshot(request: Request, device: str | None = None):
+    device = resolve_device(request, device)
+    rtsp_url = request.app.state.devices[device]
     if not rtsp_url:
         raise HTTPException(status_code=400, detail="rtsp_url_missing")
 
-    cache = request.app.state.snapshot_cache
-    now = datetime.now(timezone.utc)
-    cached = cache.get(now)
-    if cached:
-        return Response(content=cached.bytes, media_type="image/jpeg")
-
+    cache = request.app.state.snapshot_caches[device]
+    get_snapshot = request.app.state.get_snapshot
     try:
-        data, width, height = request.app.state.get_snapshot(rtsp_url)
+        cached = await request.app.state.camera_offload.run(cache.fetch, lambda: get_snapshot(rtsp_url))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="snapshot_timeout")
     except Exception:
         raise HTTPException(status_code=503, detail="snapshot_unavailable")
 
-    cache.set(data, width=width, height=height, captured_at=now)
-    return Response(content=data, media_type="image/jpeg")
+    etag = f'"{cached.etag}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(cached.captured_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.bytes, media_type="image/jpeg", headers=headers)
+
+
+@router.get("/api/live.mjpg")
+async def live_view(
+    request: Request,
+    fps: float = Query(5.0, gt=0, le=30),
+    width: int | None = Query(None, ge=64, le=3840),
+    device: str | None = None,
+):
+    live = request.app.state.live_views.get(resolve_device(request, device))
+    if live is None:
+        raise HTTPException(status_code=400, detail="rtsp_url_missing")
+    from heater_reader.live import BOUNDARY
+
+    return StreamingResponse(
+        live.stream(fps=fps, width=width),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
 
 
 class CropPayload(BaseModel):
@@ -65,33 +282,68 @@ class EditPayload(BaseModel):
     edited_by: str = "adam"
 
 
+@router.get("/api/ocr/cache")
+async def ocr_cache_stats(request: Request, device: str | None = None):
+    caches = request.app.state.ocr_caches
+    cache = request.app.state.ocr_cache if device is None else caches.get(device)
+    if cache is None:
+        raise HTTPException(status_code=404, detail="ocr_cache_disabled")
+    return cache.stats()
+
+
 @router.get("/api/crop")
-def get_crop(request: Request):
-    cfg = load_config(request.app.state.config_path)
-    return cfg.capture.crop
+async def get_crop(request: Request, device: str | None = None):
+    cfg = await asyncio.to_thread(config_service(request.app.state.config_path).get)
+    try:
+        return cfg.device(device).crop
+    except KeyError:
+        raise HTTPException(status_code=404, detail="unknown_device")
 
 
 @router.post("/api/crop")
-def set_crop(payload: CropPayload, request: Request):
+async def set_crop(payload: CropPayload, request: Request, device: str | None = None):
     if payload.w <= 0 or payload.h <= 0 or payload.x < 0 or payload.y < 0:
         raise HTTPException(status_code=400, detail="invalid_crop")
 
-    config_path = request.app.state.config_path
-    raw = yaml.safe_load(config_path.read_text()) if config_path.exists() else {}
-    raw = raw or {}
-    raw.setdefault("capture", {})["crop"] = {
+    crop = {
         "x": payload.x,
         "y": payload.y,
         "w": payload.w,
         "h": payload.h,
     }
-    config_path.write_text(yaml.safe_dump(raw, sort_keys=False))
-    return raw["capture"]["crop"]
+
+    def set_crop_section(raw: dict) -> None:
+        entries = [entry for entry in raw.get("devices") or [] if isinstance(entry, dict)]
+        if device is None and entries:
+            # Same entry GET /api/crop reads; capture.crop would be shadowed by the device's own crop.
+            entries[0]["crop"] = crop
+            return
+        if device is not None:
+            for entry in entries:
+                if entry.get("id") == device:
+                    entry["crop"] = crop
+                    return
+            raise HTTPException(status_code=404, detail="unknown_device")
+        capture = raw.get("capture")
+        if not isinstance(capture, dict):
+            capture = raw["capture"] = {}
+        capture["crop"] = crop
+
+    await asyncio.to_thread(config_service(request.app.state.config_path).update, set_crop_section)
+    return crop
 
 
 @router.post("/api/readings/{reading_id}/edit")
-def edit_reading(reading_id: int, payload: EditPayload, request: Request):
-    db = Database(request.app.state.db_path)
-    db.insert_edit(reading_id, **payload.model_dump())
-    row = db.get_effective_reading(reading_id)
+async def edit_reading(reading_id: int, payload: EditPayload, request: Request):
+    db: Database = request.app.state.db
+
+    def apply_edit():
+        if db.get_reading(reading_id) is None:
+            return None
+        db.insert_edit(reading_id, **payload.model_dump())
+        return db.get_effective_reading(reading_id)
+
+    row = await request.app.state.db_offload.run(apply_edit)
+    if row is None:
+        raise HTTPException(status_code=404, detail="reading_not_found")
     return dict(row)
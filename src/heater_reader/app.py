@@ -1,22 +1,118 @@
-from fastapi import FastAPI
+from __future__ import annotations
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import TYPE_CHECKING
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from heater_reader.api import router
-from heater_reader.capture import SnapshotCache, fetch_rtsp_snapshot
-from heater_reader.db import Database
+from heater_reader.db import DEFAULT_DEVICE, Database, PoolTimeout
+from heater_reader.events import ChangeFeed
+from heater_reader.metrics import RequestMetrics
+from heater_reader.offload import Offload
+from heater_reader.snapshot_cache import SnapshotCache
 from pathlib import Path
 
+# Capture and OCR modules pull in OpenCV; they are imported only once a camera is actually used.
+if TYPE_CHECKING:
+    from heater_reader.capture import FrameGrabber
+    from heater_reader.ingest import IngestPipeline
+    from heater_reader.ocr_cache import OcrCache
+    from heater_reader.snapshot_source import AdaptiveSource
+
+
+def create_app(
+    db_path: str,
+    rtsp_url: str | None = None,
+    config_path: Path | None = None,
+    pipeline: IngestPipeline | None = None,
+    frame_grabber: FrameGrabber | None = None,
+    db: Database | None = None,
+    ocr_cache: OcrCache | None = None,
+    devices: dict[str, str] | None = None,
+    frame_grabbers: list[FrameGrabber] | None = None,
+    ocr_caches: dict[str, OcrCache] | None = None,
+    camera_workers: int = 2,
+    camera_timeout: float = 10.0,
+    snapshot_sources: list[AdaptiveSource] | None = None,
+) -> FastAPI:
+    db = db or Database(db_path)
+    sources = {source.rtsp_url: source for source in snapshot_sources or []}
+    grabbers: dict[str, FrameGrabber] = {}
+    for grabber in [frame_grabber, *(frame_grabbers or []), *(source.grabber for source in sources.values())]:
+        if grabber is not None:
+            grabbers.setdefault(grabber.rtsp_url, grabber)
+    if devices is None:
+        devices = {DEFAULT_DEVICE: rtsp_url} if rtsp_url else {}
+    ocr_caches = dict(ocr_caches or {})
+    if ocr_cache is not None:
+        ocr_caches.setdefault(next(iter(devices), DEFAULT_DEVICE), ocr_cache)
+    # Separate pools so a stalled camera cannot take the threads that serve database reads.
+    db_offload = Offload("db", db.pool_size)
+    camera_offload = Offload("camera", camera_workers, timeout=camera_timeout)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if pipeline is not None:
+            pipeline.start()
+        yield
+        if pipeline is not None:
+            pipeline.stop()
+        for grabber in grabbers.values():
+            grabber.stop()
+        for source in sources.values():
+            source.close()
+        camera_offload.shutdown()
+        db_offload.shutdown()
+        db.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(RequestMetrics)
+
+    @app.exception_handler(PoolTimeout)
+    async def database_busy(request: Request, exc: PoolTimeout) -> JSONResponse:
+        return JSONResponse({"detail": "database_busy"}, status_code=503)
 
-def create_app(db_path: str, rtsp_url: str | None = None, config_path: Path | None = None) -> FastAPI:
-    app = FastAPI()
     app.state.db_path = db_path
-    app.state.rtsp_url = rtsp_url
+    app.state.db = db
+    app.state.devices = devices
+    app.state.rtsp_url = next(iter(devices.values()), rtsp_url)
     app.state.config_path = config_path or Path("config.yml")
-    app.state.snapshot_cache = SnapshotCache(ttl_seconds=10)
+    app.state.snapshot_caches = {device_id: SnapshotCache(ttl_seconds=10) for device_id in devices}
+    app.state.snapshot_cache = next(iter(app.state.snapshot_caches.values()), SnapshotCache(ttl_seconds=10))
+    app.state.pipeline = pipeline
+    app.state.ocr_caches = ocr_caches
+    app.state.ocr_cache = ocr_cache or next(iter(ocr_caches.values()), None)
+    app.state.db_offload = db_offload
+    app.state.camera_offload = camera_offload
+    app.state.changes = ChangeFeed(db, offload=db_offload)
 
-    Database(db_path).init_schema()
+    db.init_schema()
+
+    def get_grabber(url: str) -> FrameGrabber:
+        grabber = grabbers.get(url)
+        if grabber is None:
+            from heater_reader.capture import FrameGrabber
+
+            grabber = grabbers.setdefault(url, FrameGrabber(url))
+        return grabber
 
     def get_snapshot(url: str):
-        return fetch_rtsp_snapshot(url)
+        from heater_reader.capture import grab_rtsp_snapshot
 
+        source = sources.get(url)
+        if source is not None:
+            return source.snapshot()
+        return grab_rtsp_snapshot(get_grabber(url))
+
+    app.state.frame_grabbers = grabbers
     app.state.get_snapshot = get_snapshot
+    app.state.live_views = {}
+    if any(devices.values()):
+        from heater_reader.live import MjpegBroadcaster
+
+        app.state.live_views = {
+            device_id: MjpegBroadcaster(partial(get_grabber, url)) for device_id, url in devices.items() if url
+        }
+    app.state.live = next(iter(app.state.live_views.values()), None)
     app.include_router(router)
     return app
@@ -0,0 +1,103 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator
+from heater_reader.capture import capture_and_ocr
+from heater_reader.db import DEFAULT_DEVICE, Database
+from heater_reader.image_store import build_store, captured_at_for_ref
+from heater_reader.ocr import ReadingText
+import os
+import time
+
+
+@dataclass
+class BackfillStats:
+    total: int = 0
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed_seconds: float = 0.0
+    failures: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def images_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.processed / self.elapsed_seconds
+
+
+def iter_archive(image_root: Path) -> Iterator[str]:
+    root = Path(image_root)
+    refs = [str(path) for path in root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]/*.jpg")]
+    store = build_store(root, "pack")
+    for pack in store.packs():
+        refs.extend(store.refs(pack))
+    yield from sorted(refs)
+
+
+def _attempt(ocr: Callable[[str], ReadingText | None], path: str) -> tuple[ReadingText | None, str | None]:
+    # Runs in the worker so one unreadable image is reported instead of aborting the whole map.
+    try:
+        reading = ocr(path)
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+    return reading, None if reading is not None else "no reading recognized"
+
+
+def reprocess_archive(
+    db: Database,
+    image_root: Path,
+    ocr: Callable[[str], ReadingText | None] | None = None,
+    config_path: Path | None = None,
+    workers: int | None = None,
+    batch_size: int = 200,
+    restart: bool = False,
+    executor: Executor | None = None,
+    report: Callable[[BackfillStats], None] | None = None,
+    device_id: str | None = None,
+) -> BackfillStats:
+    image_root = Path(image_root)
+    root_key = str(image_root)
+    if restart:
+        db.clear_backfill_checkpoint(root_key)
+    checkpoint = db.get_backfill_checkpoint(root_key)
+
+    paths = [str(path) for path in iter_archive(image_root)]
+    stats = BackfillStats(total=len(paths))
+    compacted = db.compacted_image_paths(root_key)
+    pending = [path for path in paths if path not in compacted and (checkpoint is None or path > checkpoint)]
+    stats.skipped = len(paths) - len(pending)
+    paths = pending
+
+    ocr = ocr or partial(capture_and_ocr, config_path=config_path, device_id=device_id)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(batch_size, len(paths) // (workers * 4)))
+    owns_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    started = time.monotonic()
+    batch: list[tuple[str, datetime, ReadingText]] = []
+    try:
+        results = executor.map(partial(_attempt, ocr), paths, chunksize=chunksize)
+        for index, (path, (reading, error)) in enumerate(zip(paths, results), 1):
+            if reading is None:
+                stats.failed += 1
+                stats.failures.append((path, error))
+                db.insert_capture_error(f"reprocess: {path}: {error}", device_id=device_id or DEFAULT_DEVICE)
+            else:
+                batch.append((path, captured_at_for_ref(path), reading))
+            stats.processed += 1
+            if index % batch_size == 0 or index == len(paths):
+                db.apply_ocr_results(batch, checkpoint=(root_key, path), device_id=device_id or DEFAULT_DEVICE)
+                batch = []
+                stats.elapsed_seconds = time.monotonic() - started
+                if report is not None:
+                    report(stats)
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+    stats.elapsed_seconds = time.monotonic() - started
+    return stats
@@ -1,59 +1,42 @@
-from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from heater_reader.ocr_pipeline import extract_text_from_image
-from heater_reader.ocr import parse_reading, ReadingText
+from heater_reader.image_store import image_exists, image_path_for
+from heater_reader.metrics import STAGE_SECONDS
+from heater_reader.ocr_pipeline import recognize_image
+from heater_reader.ocr import ReadingText
+from heater_reader.snapshot_cache import Snapshot, SnapshotCache  # noqa: F401 - re-exported
 import cv2
 import numpy as np
 import os
+import threading
+import time
 
 
-def image_path_for(root: Path, ts: datetime) -> Path:
-    return root / ts.strftime("%Y/%m/%d/%H%M%S.jpg")
-
-
-def capture_and_ocr(image_path: Path) -> ReadingText | None:
-    if not image_path.exists():
+def capture_and_ocr(
+    image_path: Path | str, config_path: Path | None = None, cache=None, device_id: str | None = None
+) -> ReadingText | None:
+    if not image_exists(image_path):
         return None
 
-    text = extract_text_from_image(image_path)
-    return parse_reading(text)
-
-
-@dataclass
-class Snapshot:
-    bytes: bytes
-    width: int
-    height: int
-    captured_at: datetime
-
-
-class SnapshotCache:
-    def __init__(self, ttl_seconds: int = 10) -> None:
-        self._ttl = ttl_seconds
-        self._snapshot: Snapshot | None = None
-
-    def get(self, now: datetime) -> Snapshot | None:
-        if self._snapshot is None:
-            return None
-        age = (now - self._snapshot.captured_at).total_seconds()
-        if age > self._ttl:
-            return None
-        return self._snapshot
-
-    def set(self, data: bytes, width: int, height: int, captured_at: datetime | None = None) -> None:
-        if captured_at is None:
-            captured_at = datetime.now(timezone.utc)
-        self._snapshot = Snapshot(data, width, height, captured_at)
+    return recognize_image(image_path, config_path, cache=cache, device_id=device_id)
 
 
 def encode_frame_to_jpeg(frame: np.ndarray) -> bytes:
-    ok, buf = cv2.imencode(".jpg", frame)
+    with STAGE_SECONDS.time("jpeg_encode"):
+        ok, buf = cv2.imencode(".jpg", frame)
     if not ok:
         raise ValueError("Failed to encode frame")
     return buf.tobytes()
 
 
+def decode_jpeg(data: bytes) -> np.ndarray:
+    with STAGE_SECONDS.time("jpeg_decode"):
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Failed to decode JPEG")
+    return frame
+
+
 def build_opencv_capture_options(rtsp_transport: str | None) -> str | None:
     if not rtsp_transport:
         return None
@@ -69,7 +52,8 @@ def set_opencv_capture_options(rtsp_transport: str | None) -> None:
 
 def fetch_rtsp_snapshot(rtsp_url: str, rtsp_transport: str | None = "tcp") -> tuple[bytes, int, int]:
     set_opencv_capture_options(rtsp_transport)
-    cap = cv2.VideoCapture(rtsp_url)
+    with STAGE_SECONDS.time("rtsp_connect"):
+        cap = cv2.VideoCapture(rtsp_url)
     ok, frame = cap.read()
     cap.release()
     if not ok or frame is None:
@@ -77,3 +61,112 @@ def fetch_rtsp_snapshot(rtsp_url: str, rtsp_transport: str | None = "tcp") -> tu
     data = encode_frame_to_jpeg(frame)
     height, width = frame.shape[:2]
     return data, width, height
+
+
+class FrameGrabber:
+    def __init__(
+        self,
+        rtsp_url: str,
+        rtsp_transport: str | None = "tcp",
+        open_capture=None,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 30.0,
+        max_age_seconds: float = 10.0,
+    ) -> None:
+        self.rtsp_url = rtsp_url
+        self._rtsp_transport = rtsp_transport
+        self._open_capture = open_capture or cv2.VideoCapture
+        self._backoff_initial = backoff_initial
+        self._backoff_max = backoff_max
+        self._max_age = max_age_seconds
+        self._cond = threading.Condition()
+        self._frame: np.ndarray | None = None
+        self._captured_at: datetime | None = None
+        self._received_at = 0.0
+        self._streamed_at = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+            self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def streaming(self) -> bool:
+        # Live views poll wait_newer at least once a second while a client is connected.
+        return time.monotonic() - self._streamed_at < 5.0
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        with self._cond:
+            self._thread = None
+            self._cond.notify_all()
+
+    def _fresh(self) -> bool:
+        return self._frame is not None and time.monotonic() - self._received_at <= self._max_age
+
+    def latest(self, timeout: float = 5.0) -> tuple[np.ndarray, datetime]:
+        self.start()
+        with self._cond:
+            if not self._fresh():
+                self._cond.wait_for(lambda: self._fresh() or self._stop.is_set(), timeout)
+            if self._frame is None:
+                raise RuntimeError("No RTSP frame available")
+            # The last frame outlives a dropped stream; handing it out would store the same reading again.
+            if not self._fresh():
+                age = time.monotonic() - self._received_at
+                raise RuntimeError(f"Last RTSP frame is {age:.0f}s old; stream is not delivering")
+            return self._frame, self._captured_at
+
+    def wait_newer(self, since: datetime | None, timeout: float = 5.0) -> tuple[np.ndarray, datetime]:
+        self._streamed_at = time.monotonic()
+        self.start()
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._stop.is_set() or (self._frame is not None and self._captured_at != since),
+                timeout,
+            )
+            if self._frame is None or self._captured_at == since:
+                raise RuntimeError("No new RTSP frame available")
+            return self._frame, self._captured_at
+
+    def _run(self) -> None:
+        backoff = self._backoff_initial
+        while not self._stop.is_set():
+            set_opencv_capture_options(self._rtsp_transport)
+            with STAGE_SECONDS.time("rtsp_connect"):
+                cap = self._open_capture(self.rtsp_url)
+            try:
+                while not self._stop.is_set():
+                    ok, frame = cap.read()
+                    if not ok or frame is None:
+                        break
+                    with self._cond:
+                        self._frame = frame
+                        self._captured_at = datetime.now(timezone.utc)
+                        self._received_at = time.monotonic()
+                        self._cond.notify_all()
+                    backoff = self._backoff_initial
+            finally:
+                cap.release()
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, self._backoff_max)
+
+
+def grab_rtsp_snapshot(grabber: FrameGrabber, timeout: float = 5.0) -> tuple[bytes, int, int]:
+    frame, _ = grabber.latest(timeout)
+    data = encode_frame_to_jpeg(frame)
+    height, width = frame.shape[:2]
+    return data, width, height
@@ -1,7 +1,217 @@
+from functools import partial
+from pathlib import Path
 import argparse
 
 
 def parse_args(argv):
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", default="config.yml")
+    parser.add_argument("--db", default="data/readings.db")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="capture, OCR and serve the dashboard")
+    run.add_argument("--host", default="127.0.0.1")
+    run.add_argument("--port", type=int, default=8000)
+
+    sub.add_parser("rebuild-effective", help="recompute effective readings from the edits log")
+
+    reprocess = sub.add_parser("reprocess", help="re-run OCR over the stored image archive")
+    reprocess.add_argument("--workers", type=int, default=None)
+    reprocess.add_argument("--batch-size", type=int, default=200)
+    reprocess.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+
+    pack = sub.add_parser("pack-images", help="move per-capture JPEGs into daily pack files")
+    pack.add_argument(
+        "--crop-older-than",
+        type=int,
+        default=None,
+        metavar="DAYS",
+        help="keep only the configured crop region in packs older than DAYS",
+    )
+
+    compact = sub.add_parser("compact", help="apply the retention policy and reclaim free pages")
+    compact.add_argument(
+        "--enable-auto-vacuum",
+        action="store_true",
+        help="one-time full VACUUM that lets databases created by older versions return free pages",
+    )
     return parser.parse_args(argv)
+
+
+def run(args) -> None:
+    import uvicorn
+    from heater_reader.app import create_app
+    from heater_reader.capture import FrameGrabber, capture_and_ocr
+    from heater_reader.config import config_service
+    from heater_reader.db import Database
+    from heater_reader.image_store import build_store
+    from heater_reader.ingest import IngestPipeline
+    from heater_reader.ocr_cache import OcrCache
+    from heater_reader.ocr_pipeline import recognize_frame
+    from heater_reader.scheduler import DeviceScheduler
+    from heater_reader.snapshot_source import AdaptiveSource, HttpSnapshotSource
+
+    config_path = Path(args.config)
+    config = config_service(config_path)
+    cfg = config.get()
+    devices = cfg.devices or [cfg.capture]
+    for device in devices:
+        if not device.rtsp_url:
+            raise SystemExit(f"rtsp_url is required for device {device.device_id}")
+
+    db = Database(args.db)
+    db.init_schema()
+    grabbers, sources, ocr_caches, pipelines = [], [], {}, []
+    for device in devices:
+        grabber = FrameGrabber(device.rtsp_url, max_age_seconds=2 * device.interval_seconds)
+        grab = grabber.latest
+        if device.onvif_snapshot_url:
+            source = AdaptiveSource(HttpSnapshotSource(device.onvif_snapshot_url), grabber)
+            sources.append(source)
+            grab = source.latest
+        ocr_cache = ocr_caches[device.device_id] = OcrCache()
+        config.subscribe(lambda _, cache=ocr_cache: cache.clear())
+        grabbers.append(grabber)
+        pipelines.append(
+            IngestPipeline(
+                db,
+                grab=grab,
+                image_root=device.image_root,
+                ocr=partial(capture_and_ocr, config_path=config_path, cache=ocr_cache, device_id=device.device_id),
+                interval_seconds=device.interval_seconds,
+                store=build_store(device.image_root, device.storage),
+                ocr_frame=partial(
+                    recognize_frame, config_path=config_path, cache=ocr_cache, device_id=device.device_id
+                ),
+                device_id=device.device_id,
+            )
+        )
+    app = create_app(
+        args.db,
+        config_path=config_path,
+        pipeline=pipelines[0] if len(pipelines) == 1 else DeviceScheduler(pipelines),
+        db=db,
+        devices={device.device_id: device.rtsp_url for device in devices},
+        frame_grabbers=grabbers,
+        ocr_caches=ocr_caches,
+        snapshot_sources=sources,
+    )
+    uvicorn.run(app, host=getattr(args, "host", "127.0.0.1"), port=getattr(args, "port", 8000))
+
+
+def rebuild_effective(args) -> None:
+    from heater_reader.db import Database
+
+    db = Database(args.db)
+    db.init_schema()
+    count = db.rebuild_effective_readings()
+    print(f"rebuilt {count} effective readings")
+
+
+def reprocess(args) -> None:
+    from heater_reader.backfill import reprocess_archive
+    from heater_reader.config import load_config
+    from heater_reader.db import Database
+
+    config_path = Path(args.config)
+    cfg = load_config(config_path)
+    db = Database(args.db)
+    db.init_schema()
+
+    def report(stats) -> None:
+        done = stats.skipped + stats.processed
+        print(f"{done}/{stats.total} images ({stats.images_per_second:.1f} img/s)", flush=True)
+
+    for device in cfg.devices or [cfg.capture]:
+        stats = reprocess_archive(
+            db,
+            device.image_root,
+            config_path=config_path,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            restart=args.restart,
+            report=report,
+            device_id=device.device_id,
+        )
+        print(
+            f"{device.device_id}: reprocessed {stats.processed} images ({stats.failed} failed, "
+            f"{stats.skipped} already done) in {stats.elapsed_seconds:.1f}s, {stats.images_per_second:.1f} img/s"
+        )
+        for path, error in stats.failures:
+            print(f"  failed {path}: {error}")
+
+
+def pack_images(args) -> None:
+    from datetime import date, datetime, timedelta, timezone
+    from heater_reader.config import config_service
+    from heater_reader.db import Database
+    from heater_reader.image_store import PackStore
+
+    cfg = config_service(Path(args.config)).get()
+    devices = cfg.devices or [cfg.capture]
+    if args.crop_older_than is not None:
+        for device in devices:
+            if not device.crop:
+                raise SystemExit(f"crop is required for device {device.device_id} to crop old packs")
+    db = Database(args.db)
+    db.init_schema()
+    today = datetime.now(timezone.utc).date()
+
+    for device in devices:
+        store = PackStore(device.image_root)
+        packed = 0
+        for day_dir in sorted(store.root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]")):
+            if not day_dir.is_dir() or date(*map(int, day_dir.relative_to(store.root).parts)) >= today:
+                continue
+            moves = store.import_directory(day_dir)
+            db.rename_image_paths(moves)
+            for old, _ in moves:
+                Path(old).unlink()
+            if not any(day_dir.iterdir()):
+                day_dir.rmdir()
+            packed += len(moves)
+        print(f"{device.device_id}: packed {packed} images")
+
+        if args.crop_older_than is not None:
+            cutoff = today - timedelta(days=args.crop_older_than)
+            cropped = 0
+            for pack in store.packs():
+                if date(*map(int, pack.with_suffix("").relative_to(store.root).parts)) < cutoff:
+                    cropped += store.crop(pack, device.crop)
+            print(f"{device.device_id}: cropped {cropped} packs")
+
+
+def compact(args) -> None:
+    from heater_reader.config import config_service
+    from heater_reader.db import Database
+    from heater_reader.retention import apply_retention
+
+    cfg = config_service(Path(args.config)).get()
+    db = Database(args.db)
+    db.init_schema()
+    if args.enable_auto_vacuum:
+        enabled = db.enable_incremental_vacuum()
+        print("enabled incremental auto-vacuum" if enabled else "incremental auto-vacuum already enabled")
+    stats = apply_retention(db, cfg.retention)
+    print(
+        f"compacted {stats.compacted} readings, pruned {stats.errors_pruned} capture errors "
+        f"and {stats.changes_pruned} change records, freed {stats.pages_freed} pages"
+    )
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.command in (None, "run"):
+        run(args)
+    elif args.command == "rebuild-effective":
+        rebuild_effective(args)
+    elif args.command == "reprocess":
+        reprocess(args)
+    elif args.command == "pack-images":
+        pack_images(args)
+    elif args.command == "compact":
+        compact(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
+import copy
+import os
+import shutil
+import tempfile
+import threading
 import yaml
 
 
@@ -10,16 +16,76 @@ class CaptureConfig:
     rtsp_url: str | None = None
     onvif_snapshot_url: str | None = None
     crop: dict[str, int] | None = None
+    storage: str = "files"
+    perspective: list[list[float]] | None = None
+    perspective_size: list[int] | None = None
+    device_id: str = "default"
+
+
+DIGIT_WHITELIST = "0123456789/"
+MODE_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+@dataclass
+class RegionConfig:
+    box: list[int]
+    whitelist: str = DIGIT_WHITELIST
+    psm: int = 7
+
+    def tesseract_config(self) -> str:
+        config = f"--psm {self.psm}"
+        if self.whitelist:
+            config += f" -c tessedit_char_whitelist={self.whitelist}"
+        return config
+
+
+@dataclass
+class OcrConfig:
+    engine: str = "tesseract"
+    min_confidence: float = 0.6
+    digits: dict[str, list[list[int]]] | None = None
+    mode_indicator: list[int] | None = None
+    invert: bool = False
+    regions: dict[str, RegionConfig] | None = None
+    region_scale: float = 2.0
+
+
+@dataclass
+class RetentionConfig:
+    raw_days: int = 30
+    bucket_minutes: int = 5
+    errors_days: int = 90
+    changes_days: int = 30
+    batch_size: int = 500
 
 
 @dataclass
 class AppConfig:
     capture: CaptureConfig = field(default_factory=CaptureConfig)
+    ocr: OcrConfig = field(default_factory=OcrConfig)
+    retention: RetentionConfig = field(default_factory=RetentionConfig)
+    devices: list[CaptureConfig] = field(default_factory=list)
+
+    def device(self, device_id: str | None = None) -> CaptureConfig:
+        if device_id is None:
+            return self.devices[0] if self.devices else self.capture
+        for device in self.devices:
+            if device.device_id == device_id:
+                return device
+        if device_id == self.capture.device_id:
+            return self.capture
+        raise KeyError(device_id)
+
+
+DEFAULT_CONFIG = AppConfig()
 
 
 def load_config(path: Path) -> AppConfig:
     raw = yaml.safe_load(path.read_text()) if path.exists() else {}
-    capture_raw = (raw or {}).get("capture", {})
+    return parse_config(raw or {})
+
+
+def parse_capture(capture_raw: dict, device_id: str = "default") -> CaptureConfig:
     crop_raw = capture_raw.get("crop")
     crop = None
     if isinstance(crop_raw, dict):
@@ -29,12 +95,173 @@ def load_config(path: Path) -> AppConfig:
             "w": int(crop_raw.get("w", 0)),
             "h": int(crop_raw.get("h", 0)),
         }
+    perspective_raw = capture_raw.get("perspective")
+    perspective = None
+    if isinstance(perspective_raw, list) and len(perspective_raw) == 4:
+        perspective = [[float(v) for v in point] for point in perspective_raw]
+    size_raw = capture_raw.get("perspective_size")
 
-    capture = CaptureConfig(
+    return CaptureConfig(
         interval_seconds=int(capture_raw.get("interval_seconds", 60)),
         image_root=Path(capture_raw.get("image_root", "data/images")),
         rtsp_url=capture_raw.get("rtsp_url"),
         onvif_snapshot_url=capture_raw.get("onvif_snapshot_url"),
         crop=crop,
+        storage=str(capture_raw.get("storage", "files")),
+        perspective=perspective,
+        perspective_size=[int(v) for v in size_raw] if size_raw else None,
+        device_id=device_id,
+    )
+
+
+def parse_devices(capture_raw: dict, devices_raw) -> list[CaptureConfig]:
+    if not isinstance(devices_raw, list):
+        return []
+    devices = []
+    base_root = Path(capture_raw.get("image_root", "data/images"))
+    for entry in devices_raw:
+        device_id = str(entry["id"])
+        # Devices inherit the top-level capture settings and get their own image directory.
+        merged = {**capture_raw, "image_root": str(base_root / device_id)}
+        merged.update((key, value) for key, value in entry.items() if key != "id")
+        devices.append(parse_capture(merged, device_id))
+    return devices
+
+
+def parse_config(raw: dict) -> AppConfig:
+    capture_raw = raw.get("capture") or {}
+    capture = parse_capture(capture_raw)
+    devices = parse_devices(capture_raw, raw.get("devices"))
+    ocr_raw = raw.get("ocr") or {}
+    digits_raw = ocr_raw.get("digits")
+    digits = None
+    if isinstance(digits_raw, dict):
+        digits = {name: [[int(v) for v in box] for box in boxes] for name, boxes in digits_raw.items()}
+    mode_raw = ocr_raw.get("mode_indicator")
+    regions_raw = ocr_raw.get("regions")
+    regions = None
+    if isinstance(regions_raw, dict):
+        regions = {name: parse_region(name, value) for name, value in regions_raw.items()}
+
+    ocr = OcrConfig(
+        engine=str(ocr_raw.get("engine", "tesseract")),
+        min_confidence=float(ocr_raw.get("min_confidence", 0.6)),
+        digits=digits,
+        mode_indicator=[int(v) for v in mode_raw] if mode_raw else None,
+        invert=bool(ocr_raw.get("invert", False)),
+        regions=regions,
+        region_scale=float(ocr_raw.get("region_scale", 2.0)),
     )
-    return AppConfig(capture=capture)
+    retention_raw = raw.get("retention") or {}
+    retention = RetentionConfig(
+        raw_days=int(retention_raw.get("raw_days", 30)),
+        bucket_minutes=int(retention_raw.get("bucket_minutes", 5)),
+        errors_days=int(retention_raw.get("errors_days", 90)),
+        changes_days=int(retention_raw.get("changes_days", 30)),
+        batch_size=int(retention_raw.get("batch_size", 500)),
+    )
+    return AppConfig(capture=capture, ocr=ocr, retention=retention, devices=devices)
+
+
+def parse_region(name: str, raw) -> RegionConfig:
+    default_whitelist = MODE_WHITELIST if name == "mode" else DIGIT_WHITELIST
+    if isinstance(raw, dict):
+        return RegionConfig(
+            box=[int(v) for v in raw["box"]],
+            whitelist=str(raw.get("whitelist", default_whitelist)),
+            psm=int(raw.get("psm", 7)),
+        )
+    return RegionConfig(box=[int(v) for v in raw], whitelist=default_whitelist)
+
+
+class ConfigService:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._stamp: tuple[int, int, int] | None = None
+        self._raw: dict = {}
+        self._config: AppConfig | None = None
+        self._subscribers: list[Callable[[AppConfig], None]] = []
+
+    def subscribe(self, callback: Callable[[AppConfig], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def get(self) -> AppConfig:
+        stamp = self._current_stamp()
+        with self._lock:
+            if self._config is not None and stamp == self._stamp:
+                return self._config
+            changed = self._config is not None
+            self._load(stamp)
+            config = self._config
+        if changed:
+            self._notify(config)
+        return config
+
+    def raw(self) -> dict:
+        self.get()
+        with self._lock:
+            return copy.deepcopy(self._raw)
+
+    def update(self, mutate: Callable[[dict], None]) -> AppConfig:
+        self.get()
+        with self._lock:
+            raw = copy.deepcopy(self._raw)
+            mutate(raw)
+            self._write(raw)
+            self._load(self._current_stamp())
+            config = self._config
+        self._notify(config)
+        return config
+
+    def _current_stamp(self) -> tuple[int, int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _load(self, stamp: tuple[int, int, int] | None) -> None:
+        raw = yaml.safe_load(self.path.read_text()) if stamp is not None else {}
+        self._raw = raw or {}
+        self._config = parse_config(self._raw)
+        self._stamp = stamp
+
+    def _write(self, raw: dict) -> None:
+        # Write next to the real file so a symlinked config stays a symlink.
+        target = self.path.resolve()
+        directory = target.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{target.name}.", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as handle:
+                handle.write(yaml.safe_dump(raw, sort_keys=False))
+                handle.flush()
+                os.fsync(handle.fileno())
+            if target.exists():
+                shutil.copymode(target, tmp)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def _notify(self, config: AppConfig) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(config)
+
+
+_services: dict[Path, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def config_service(path: Path) -> ConfigService:
+    key = Path(path).absolute()
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = ConfigService(key)
+        return service
@@ -1,26 +1,200 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import sqlite3
+import threading
 from heater_reader.ocr import ReadingText
 from heater_reader.paths import ensure_dir
 
 
+def format_timestamp(ts: datetime) -> str:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+SCHEMA_VERSION = 9
+
+DEFAULT_DEVICE = "default"
+
+EXPORT_COLUMNS = (
+    "id", "captured_at", "device_id", "boiler_current", "boiler_set", "radiator_current", "radiator_set", "mode"
+)
+RAW_EXPORT_COLUMNS = EXPORT_COLUMNS + ("image_path", "verified")
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, path: Path, size: int = 4, cached_statements: int = 256, timeout: float = 10.0) -> None:
+        self.path = Path(path)
+        self._size = size
+        self._timeout = timeout
+        self._cached_statements = cached_statements
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._available = threading.BoundedSemaphore(size)
+        ensure_dir(self.path.parent)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self._cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        # auto_vacuum is fixed once the header is written, which switching to WAL already does.
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if not self._available.acquire(timeout=self._timeout):
+            raise PoolTimeout(f"no database connection free after {self._timeout:g}s ({self._size} in use)")
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                with self._lock:
+                    self._idle.append(conn)
+        finally:
+            self._available.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+SERIES_FIELDS = ("boiler_current", "boiler_set", "radiator_current", "radiator_set")
+
+ROLLUP_TABLES = {"hour": "readings_hourly", "day": "readings_daily"}
+
+_ROLLUP_COLUMNS = ", ".join(
+    f"{name}_sum, {name}_n, {name}_min, {name}_max" for name in SERIES_FIELDS
+)
+
+
+def _rollup_ddl(table: str) -> str:
+    columns = ",\n".join(
+        f"{name}_sum INTEGER, {name}_n INTEGER NOT NULL, {name}_min INTEGER, {name}_max INTEGER"
+        for name in SERIES_FIELDS
+    )
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table} (device_id TEXT NOT NULL, bucket TEXT NOT NULL, "
+        f"samples INTEGER NOT NULL, {columns}, PRIMARY KEY (device_id, bucket));"
+    )
+
+
+_HOURLY_SELECT = "SELECT device_id, substr(captured_at, 1, 13) || ':00:00', COUNT(*), " + ", ".join(
+    f"SUM({name}), COUNT({name}), MIN({name}), MAX({name})" for name in SERIES_FIELDS
+) + " FROM effective_readings"
+
+_DAILY_SELECT = "SELECT device_id, substr(bucket, 1, 10) || ' 00:00:00', SUM(samples), " + ", ".join(
+    f"SUM({name}_sum), SUM({name}_n), MIN({name}_min), MAX({name}_max)" for name in SERIES_FIELDS
+) + " FROM readings_hourly"
+
+
+_APPLY_EDIT_SQL = """
+    UPDATE effective_readings SET
+        boiler_current = COALESCE(?, boiler_current),
+        boiler_set = COALESCE(?, boiler_set),
+        radiator_current = COALESCE(?, radiator_current),
+        radiator_set = COALESCE(?, radiator_set),
+        mode = COALESCE(?, mode),
+        edited = 1
+    WHERE id = ?
+"""
+
+
 @dataclass
 class Database:
     path: Path
+    pool_size: int = 4
+    pool_timeout: float = 10.0
+    pool: ConnectionPool = field(init=False, repr=False)
+    _listeners: list[Callable[[], None]] = field(default_factory=list, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.path = Path(self.path)
+        self.pool = ConnectionPool(self.path, size=self.pool_size, timeout=self.pool_timeout)
 
-    def _connect(self) -> sqlite3.Connection:
-        ensure_dir(self.path.parent)
-        conn = sqlite3.connect(self.path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self) -> None:
+        for callback in list(self._listeners):
+            callback()
+
+    def _record_changes(
+        self, conn: sqlite3.Connection, kind: str, reading_ids: list[int], device_id: str | None = None
+    ) -> None:
+        # Deleted readings are gone by the time their tombstone is written, so callers pass the device for those.
+        conn.executemany(
+            """
+            INSERT INTO changes (reading_id, kind, device_id)
+            VALUES (?, ?, COALESCE(?, (SELECT device_id FROM readings WHERE id = ?), 'default'))
+            """,
+            ((reading_id, kind, device_id, reading_id) for reading_id in reading_ids),
+        )
+
+    @contextmanager
+    def _connect(self):
+        with self.pool.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self) -> None:
+        self.pool.close()
 
     def init_schema(self) -> None:
         with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            has_effective = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'effective_readings'"
+            ).fetchone()
+            has_rollups = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'readings_hourly'"
+            ).fetchone()
+            for table in ("readings", "capture_errors", "effective_readings", "changes"):
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                if columns and "device_id" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN device_id TEXT NOT NULL DEFAULT 'default'")
+            if has_rollups and "device_id" not in [
+                row[1] for row in conn.execute("PRAGMA table_info(readings_hourly)")
+            ]:
+                conn.execute("DROP TABLE readings_hourly")
+                conn.execute("DROP TABLE readings_daily")
+                has_rollups = None
             conn.executescript(
                 """
                 CREATE TABLE IF NOT EXISTS readings (
@@ -32,7 +206,8 @@ class Database:
                     radiator_set INTEGER,
                     mode TEXT NOT NULL,
                     image_path TEXT NOT NULL,
-                    verified INTEGER NOT NULL DEFAULT 0
+                    verified INTEGER NOT NULL DEFAULT 0,
+                    device_id TEXT NOT NULL DEFAULT 'default'
                 );
 
                 CREATE TABLE IF NOT EXISTS edits (
@@ -48,33 +223,519 @@ class Database:
                     FOREIGN KEY (reading_id) REFERENCES readings(id)
                 );
 
+                CREATE TABLE IF NOT EXISTS edits_archive (
+                    id INTEGER PRIMARY KEY,
+                    edit_id INTEGER NOT NULL,
+                    reading_id INTEGER NOT NULL,
+                    merged_into INTEGER NOT NULL,
+                    boiler_current INTEGER,
+                    boiler_set INTEGER,
+                    radiator_current INTEGER,
+                    radiator_set INTEGER,
+                    mode TEXT,
+                    edited_by TEXT NOT NULL,
+                    edited_at TEXT NOT NULL
+                );
+
                 CREATE TABLE IF NOT EXISTS capture_errors (
                     id INTEGER PRIMARY KEY,
                     captured_at TEXT NOT NULL DEFAULT (datetime('now')),
-                    error TEXT NOT NULL
+                    error TEXT NOT NULL,
+                    device_id TEXT NOT NULL DEFAULT 'default'
+                );
+
+                CREATE TABLE IF NOT EXISTS effective_readings (
+                    id INTEGER PRIMARY KEY,
+                    captured_at TEXT NOT NULL,
+                    boiler_current INTEGER,
+                    boiler_set INTEGER,
+                    radiator_current INTEGER,
+                    radiator_set INTEGER,
+                    mode TEXT NOT NULL,
+                    image_path TEXT NOT NULL,
+                    edited INTEGER NOT NULL DEFAULT 0,
+                    device_id TEXT NOT NULL DEFAULT 'default',
+                    FOREIGN KEY (id) REFERENCES readings(id)
+                );
+
+                CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+                    image_root TEXT PRIMARY KEY,
+                    last_path TEXT NOT NULL,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                );
+
+                CREATE TABLE IF NOT EXISTS readings_compacted (
+                    id INTEGER PRIMARY KEY,
+                    samples INTEGER NOT NULL,
+                    boiler_current_min INTEGER,
+                    boiler_current_max INTEGER,
+                    boiler_set_min INTEGER,
+                    boiler_set_max INTEGER,
+                    radiator_current_min INTEGER,
+                    radiator_current_max INTEGER,
+                    radiator_set_min INTEGER,
+                    radiator_set_max INTEGER,
+                    FOREIGN KEY (id) REFERENCES readings(id)
+                );
+
+                CREATE TABLE IF NOT EXISTS compacted_images (
+                    image_path TEXT PRIMARY KEY,
+                    reading_id INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    reading_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    changed_at TEXT NOT NULL DEFAULT (datetime('now')),
+                    device_id TEXT NOT NULL DEFAULT 'default'
                 );
+
+                {hourly}
+                {daily}
+
+                CREATE INDEX IF NOT EXISTS idx_readings_captured_at ON readings(captured_at, id);
+                CREATE INDEX IF NOT EXISTS idx_readings_image_path ON readings(image_path);
+                CREATE INDEX IF NOT EXISTS idx_capture_errors_captured_at ON capture_errors(captured_at);
+                CREATE INDEX IF NOT EXISTS idx_changes_changed_at ON changes(changed_at);
+                CREATE INDEX IF NOT EXISTS idx_edits_reading_edited_at ON edits(reading_id, edited_at, id);
+                CREATE INDEX IF NOT EXISTS idx_edits_archive_merged_into ON edits_archive(merged_into);
+                CREATE INDEX IF NOT EXISTS idx_effective_captured_at ON effective_readings(captured_at, id);
+                CREATE INDEX IF NOT EXISTS idx_effective_device_captured_at
+                    ON effective_readings(device_id, captured_at, id);
+                """.format(hourly=_rollup_ddl("readings_hourly"), daily=_rollup_ddl("readings_daily"))
+            )
+            # Changes recorded before they carried a device take it from the reading, where it still exists.
+            conn.execute(
+                """
+                UPDATE changes SET device_id = (SELECT device_id FROM readings WHERE id = changes.reading_id)
+                WHERE EXISTS (SELECT 1 FROM readings WHERE id = changes.reading_id)
+                """
+            )
+            # Rows compacted before the mapping existed only still know their own frame.
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO compacted_images (image_path, reading_id)
+                SELECT r.image_path, r.id FROM readings r JOIN readings_compacted c ON c.id = r.id
+                """
+            )
+            if not has_effective:
+                self._rebuild_effective(conn)
+            elif not has_rollups:
+                self._rebuild_rollups(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def rebuild_effective_readings(self) -> int:
+        with self._connect() as conn:
+            return self._rebuild_effective(conn)
+
+    def _rebuild_effective(self, conn: sqlite3.Connection) -> int:
+        conn.execute("DELETE FROM effective_readings")
+        conn.execute(
+            """
+            INSERT INTO effective_readings (
+                id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                device_id
+            )
+            SELECT id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                   device_id
+            FROM readings
+            """
+        )
+        edits = conn.execute(
+            """
+            SELECT boiler_current, boiler_set, radiator_current, radiator_set, mode, reading_id
+            FROM edits
+            ORDER BY edited_at ASC, id ASC
+            """
+        )
+        conn.executemany(_APPLY_EDIT_SQL, (tuple(row) for row in edits.fetchall()))
+        self._rebuild_rollups(conn)
+        return conn.execute("SELECT COUNT(*) FROM effective_readings").fetchone()[0]
+
+    def _rebuild_rollups(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM readings_hourly")
+        conn.execute("DELETE FROM readings_daily")
+        conn.execute(f"INSERT INTO readings_hourly (device_id, bucket, samples, {_ROLLUP_COLUMNS}) {_HOURLY_SELECT} GROUP BY 1, 2")
+        conn.execute(f"INSERT INTO readings_daily (device_id, bucket, samples, {_ROLLUP_COLUMNS}) {_DAILY_SELECT} GROUP BY 1, 2")
+
+    def _refresh_rollups(self, conn: sqlite3.Connection, captured_ats: list[str]) -> None:
+        hours = sorted({ts[:13] + ":00:00" for ts in captured_ats})
+        days = sorted({ts[:10] + " 00:00:00" for ts in captured_ats})
+        self._refresh_rollup(conn, "readings_hourly", _HOURLY_SELECT, "captured_at", hours, timedelta(hours=1))
+        self._refresh_rollup(conn, "readings_daily", _DAILY_SELECT, "bucket", days, timedelta(days=1))
+
+    def _refresh_rollup(self, conn, table: str, select: str, column: str, buckets: list[str], width: timedelta) -> None:
+        ranges = [
+            (bucket, format_timestamp(datetime.strptime(bucket, "%Y-%m-%d %H:%M:%S") + width))
+            for bucket in buckets
+        ]
+        conn.executemany(f"DELETE FROM {table} WHERE bucket = ?", ((bucket,) for bucket in buckets))
+        conn.executemany(
+            f"""
+            INSERT INTO {table} (device_id, bucket, samples, {_ROLLUP_COLUMNS})
+            {select} WHERE {column} >= ? AND {column} < ? GROUP BY 1, 2
+            """,
+            ranges,
+        )
+
+    def _refresh_effective(self, conn: sqlite3.Connection, reading_ids: list[int]) -> None:
+        marks = ", ".join("?" * len(reading_ids))
+        conn.execute(f"DELETE FROM effective_readings WHERE id IN ({marks})", reading_ids)
+        conn.execute(
+            f"""
+            INSERT INTO effective_readings (
+                id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                device_id
+            )
+            SELECT id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                   device_id
+            FROM readings WHERE id IN ({marks})
+            """,
+            reading_ids,
+        )
+        edits = conn.execute(
+            f"""
+            SELECT boiler_current, boiler_set, radiator_current, radiator_set, mode, reading_id
+            FROM edits
+            WHERE reading_id IN ({marks})
+            ORDER BY edited_at ASC, id ASC
+            """,
+            reading_ids,
+        )
+        conn.executemany(_APPLY_EDIT_SQL, (tuple(row) for row in edits.fetchall()))
+        captured_ats = conn.execute(
+            f"SELECT captured_at FROM effective_readings WHERE id IN ({marks})", reading_ids
+        ).fetchall()
+        self._refresh_rollups(conn, [row[0] for row in captured_ats])
+
+    def apply_ocr_results(
+        self,
+        results: list[tuple[str, datetime, ReadingText]],
+        checkpoint: tuple[str, str] | None = None,
+        device_id: str = DEFAULT_DEVICE,
+    ) -> int:
+        rows = [
+            (
+                reading.boiler_current,
+                reading.boiler_set,
+                reading.radiator_current,
+                reading.radiator_set,
+                reading.mode,
+                image_path,
+                format_timestamp(captured_at),
+            )
+            for image_path, captured_at, reading in results
+        ]
+        with self._connect() as conn:
+            # Frames merged by retention belong to an averaged row; re-reading one would split or overwrite it.
+            if rows:
+                marks = ", ".join("?" * len(rows))
+                compacted = {
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT image_path FROM compacted_images WHERE image_path IN ({marks})",
+                        [row[5] for row in rows],
+                    )
+                }
+                rows = [row for row in rows if row[5] not in compacted]
+            conn.executemany(
+                """
+                UPDATE readings SET
+                    boiler_current = ?, boiler_set = ?, radiator_current = ?, radiator_set = ?, mode = ?
+                WHERE image_path = ? AND id NOT IN (SELECT id FROM readings_compacted)
+                """,
+                (row[:6] for row in rows),
+            )
+            conn.executemany(
                 """
+                INSERT INTO readings (
+                    boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path, captured_at,
+                    device_id
+                )
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM readings WHERE image_path = ?)
+                """,
+                (row + (device_id, row[5]) for row in rows),
+            )
+            paths = [row[5] for row in rows]
+            reading_ids = []
+            if paths:
+                marks = ", ".join("?" * len(paths))
+                reading_ids = [
+                    row[0]
+                    for row in conn.execute(f"SELECT id FROM readings WHERE image_path IN ({marks})", paths)
+                ]
+            if reading_ids:
+                self._refresh_effective(conn, reading_ids)
+                self._record_changes(conn, "update", reading_ids)
+            if checkpoint is not None:
+                conn.execute(
+                    """
+                    INSERT INTO backfill_checkpoints (image_root, last_path) VALUES (?, ?)
+                    ON CONFLICT(image_root) DO UPDATE SET
+                        last_path = excluded.last_path,
+                        updated_at = datetime('now')
+                    """,
+                    checkpoint,
+                )
+        if reading_ids:
+            self._notify()
+        return len(reading_ids)
+
+    def compacted_image_paths(self, prefix: str) -> set[str]:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "SELECT image_path FROM compacted_images WHERE substr(image_path, 1, length(?)) = ?",
+                (prefix, prefix),
             )
+            return {row[0] for row in cur}
+
+    def rename_image_paths(self, moves: list[tuple[str, str]]) -> None:
+        with self._connect() as conn:
+            for table in ("readings", "effective_readings", "compacted_images"):
+                conn.executemany(
+                    f"UPDATE {table} SET image_path = ? WHERE image_path = ?",
+                    ((new, old) for old, new in moves),
+                )
+
+    def compact_readings_batch(
+        self,
+        start: str,
+        before: datetime,
+        bucket_seconds: int,
+        batch_size: int,
+        device_id: str = DEFAULT_DEVICE,
+    ) -> tuple[int, str | None]:
+        sql = """
+            SELECT e.id, e.captured_at, e.boiler_current, e.boiler_set, e.radiator_current,
+                   e.radiator_set, e.mode, e.image_path, e.device_id,
+                   CAST(strftime('%s', e.captured_at) AS INTEGER) AS epoch
+            FROM effective_readings e
+            WHERE e.device_id = ? AND e.captured_at >= ? AND e.captured_at < ?
+              AND NOT EXISTS (SELECT 1 FROM readings_compacted c WHERE c.id = e.id)
+            ORDER BY e.captured_at ASC, e.id ASC
+            LIMIT ?
+        """
+        with self._connect() as conn:
+            rows = conn.execute(sql, (device_id, start, format_timestamp(before), batch_size + 1)).fetchall()
+            next_start = None
+            if len(rows) > batch_size:
+                last_bucket = rows[-1]["epoch"] // bucket_seconds
+                cut = next(i for i, row in enumerate(rows) if row["epoch"] // bucket_seconds == last_bucket)
+                if cut > 0:
+                    next_start = rows[cut]["captured_at"]
+                    rows = rows[:cut]
+                else:
+                    # A single bucket larger than the batch is still compacted as one row.
+                    bucket_end = datetime.fromtimestamp((last_bucket + 1) * bucket_seconds, tz=timezone.utc)
+                    next_start = format_timestamp(min(bucket_end, before))
+                    rows = conn.execute(sql, (device_id, start, next_start, -1)).fetchall()
+            runs: list[list[sqlite3.Row]] = []
+            for row in rows:
+                previous = runs[-1][-1] if runs else None
+                if (
+                    previous is not None
+                    and previous["epoch"] // bucket_seconds == row["epoch"] // bucket_seconds
+                    and previous["mode"] == row["mode"]
+                ):
+                    runs[-1].append(row)
+                else:
+                    runs.append([row])
+            removed = 0
+            for run in runs:
+                removed += self._compact_run(conn, run)
+            if removed:
+                self._refresh_rollups(conn, [row["captured_at"] for row in rows])
+        if removed:
+            self._notify()
+        return removed, next_start
+
+    def _compact_run(self, conn: sqlite3.Connection, run: list[sqlite3.Row]) -> int:
+        stats: dict[str, tuple[int | None, int | None, int | None]] = {}
+        for name in SERIES_FIELDS:
+            values = [row[name] for row in run if row[name] is not None]
+            if values:
+                stats[name] = (round(sum(values) / len(values)), min(values), max(values))
+            else:
+                stats[name] = (None, None, None)
+        first = run[0]
+        if len(run) == 1:
+            reading_id = first["id"]
+        else:
+            cur = conn.execute(
+                """
+                INSERT INTO readings (
+                    captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                    device_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    first["captured_at"],
+                    *(stats[name][0] for name in SERIES_FIELDS),
+                    first["mode"],
+                    first["image_path"],
+                    first["device_id"],
+                ),
+            )
+            reading_id = cur.lastrowid
+            conn.execute(
+                """
+                INSERT INTO effective_readings (
+                    id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                    device_id
+                )
+                SELECT id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                       device_id
+                FROM readings WHERE id = ?
+                """,
+                (reading_id,),
+            )
+            old_ids = [(row["id"],) for row in run]
+            # Edits would override the merged averages if re-pointed, so they are archived against the merged row.
+            conn.executemany(
+                """
+                INSERT INTO edits_archive (
+                    edit_id, reading_id, merged_into, boiler_current, boiler_set, radiator_current, radiator_set, mode,
+                    edited_by, edited_at
+                )
+                SELECT id, reading_id, ?, boiler_current, boiler_set, radiator_current, radiator_set, mode,
+                       edited_by, edited_at
+                FROM edits WHERE reading_id = ?
+                """,
+                ((reading_id, old_id) for (old_id,) in old_ids),
+            )
+            conn.executemany("DELETE FROM changes WHERE reading_id = ?", old_ids)
+            conn.executemany("DELETE FROM edits WHERE reading_id = ?", old_ids)
+            conn.executemany("DELETE FROM effective_readings WHERE id = ?", old_ids)
+            conn.executemany("DELETE FROM readings WHERE id = ?", old_ids)
+            self._record_changes(conn, "delete", [old_id for (old_id,) in old_ids], first["device_id"])
+            self._record_changes(conn, "compact", [reading_id])
+        conn.executemany(
+            "INSERT OR REPLACE INTO compacted_images (image_path, reading_id) VALUES (?, ?)",
+            ((row["image_path"], reading_id) for row in run),
+        )
+        conn.execute(
+            """
+            INSERT INTO readings_compacted (
+                id, samples, boiler_current_min, boiler_current_max, boiler_set_min, boiler_set_max,
+                radiator_current_min, radiator_current_max, radiator_set_min, radiator_set_max
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (reading_id, len(run), *(value for name in SERIES_FIELDS for value in stats[name][1:])),
+        )
+        return len(run) - 1
+
+    def device_ids(self) -> list[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT device_id FROM effective_readings ORDER BY 1")]
+
+    def prune_before(self, table: str, column: str, before: datetime, batch_size: int) -> int:
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {column} < ? LIMIT ?)",
+                (format_timestamp(before), batch_size),
+            )
+            return cur.rowcount
+
+    def enable_incremental_vacuum(self) -> bool:
+        with self.pool.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            # Rewrites the whole file under an exclusive lock; run once for databases created before it was set.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+    def incremental_vacuum(self, pages: int = 1000) -> int:
+        with self.pool.connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            freed = 0
+            while True:
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if free == 0:
+                    return freed
+                conn.execute(f"PRAGMA incremental_vacuum({pages})").fetchall()
+                freed += min(free, pages)
+
+    def get_backfill_checkpoint(self, image_root: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_path FROM backfill_checkpoints WHERE image_root = ?",
+                (image_root,),
+            ).fetchone()
+            return row["last_path"] if row else None
+
+    def clear_backfill_checkpoint(self, image_root: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM backfill_checkpoints WHERE image_root = ?", (image_root,))
 
-    def insert_reading(self, reading: ReadingText, image_path: str) -> int:
+    def insert_reading(
+        self,
+        reading: ReadingText,
+        image_path: str,
+        captured_at: datetime | None = None,
+        device_id: str = DEFAULT_DEVICE,
+    ) -> int:
+        if captured_at is None:
+            captured_at = datetime.now(timezone.utc)
         with self._connect() as conn:
             cur = conn.execute(
                 """
                 INSERT INTO readings (
-                    boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path
-                ) VALUES (?, ?, ?, ?, ?, ?)
+                    captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                    device_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
+                    format_timestamp(captured_at),
                     reading.boiler_current,
                     reading.boiler_set,
                     reading.radiator_current,
                     reading.radiator_set,
                     reading.mode,
                     image_path,
+                    device_id,
                 ),
             )
+            conn.execute(
+                """
+                INSERT INTO effective_readings (
+                    id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                    device_id
+                )
+                SELECT id, captured_at, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path,
+                       device_id
+                FROM readings WHERE id = ?
+                """,
+                (cur.lastrowid,),
+            )
+            self._refresh_rollups(conn, [format_timestamp(captured_at)])
+            self._record_changes(conn, "reading", [cur.lastrowid])
+        self._notify()
+        return int(cur.lastrowid)
+
+    def insert_capture_error(
+        self, error: str, captured_at: datetime | None = None, device_id: str = DEFAULT_DEVICE
+    ) -> int:
+        if captured_at is None:
+            captured_at = datetime.now(timezone.utc)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO capture_errors (captured_at, error, device_id) VALUES (?, ?, ?)",
+                (format_timestamp(captured_at), error, device_id),
+            )
             return int(cur.lastrowid)
 
+    def list_capture_errors(self, device_id: str | None = None):
+        with self._connect() as conn:
+            if device_id is None:
+                cur = conn.execute("SELECT * FROM capture_errors ORDER BY id ASC")
+            else:
+                cur = conn.execute("SELECT * FROM capture_errors WHERE device_id = ? ORDER BY id ASC", (device_id,))
+            return cur.fetchall()
+
     def get_reading(self, reading_id: int) -> sqlite3.Row:
         with self._connect() as conn:
             cur = conn.execute("SELECT * FROM readings WHERE id = ?", (reading_id,))
@@ -106,45 +767,224 @@ class Database:
                     edited_by,
                 ),
             )
-            return int(cur.lastrowid)
+            conn.execute(
+                _APPLY_EDIT_SQL,
+                (boiler_current, boiler_set, radiator_current, radiator_set, mode, reading_id),
+            )
+            row = conn.execute("SELECT captured_at FROM effective_readings WHERE id = ?", (reading_id,)).fetchone()
+            if row is not None:
+                self._refresh_rollups(conn, [row[0]])
+            self._record_changes(conn, "edit", [reading_id])
+        self._notify()
+        return int(cur.lastrowid)
 
     def get_effective_reading(self, reading_id: int):
         with self._connect() as conn:
             cur = conn.execute(
                 """
-                SELECT
-                    r.id,
-                    COALESCE(e.boiler_current, r.boiler_current) AS boiler_current,
-                    COALESCE(e.boiler_set, r.boiler_set) AS boiler_set,
-                    COALESCE(e.radiator_current, r.radiator_current) AS radiator_current,
-                    COALESCE(e.radiator_set, r.radiator_set) AS radiator_set,
-                    COALESCE(e.mode, r.mode) AS mode,
-                    r.image_path
-                FROM readings r
-                LEFT JOIN edits e ON e.reading_id = r.id
-                WHERE r.id = ?
-                ORDER BY e.edited_at DESC
-                LIMIT 1
+                SELECT id, boiler_current, boiler_set, radiator_current, radiator_set, mode, image_path
+                FROM effective_readings
+                WHERE id = ?
                 """,
                 (reading_id,),
             )
             return cur.fetchone()
 
-    def list_effective_readings(self):
+    def list_effective_readings(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int | None = None,
+        after_id: int | None = None,
+        since: int | None = None,
+        device_id: str | None = None,
+        after_captured_at: datetime | None = None,
+    ):
+        clauses = []
+        params: list = []
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(device_id)
+        if since is not None:
+            clauses.append("id IN (SELECT reading_id FROM changes WHERE id > ?)")
+            params.append(since)
+        if start is not None:
+            clauses.append("captured_at >= ?")
+            params.append(format_timestamp(start))
+        if end is not None:
+            clauses.append("captured_at < ?")
+            params.append(format_timestamp(end))
         with self._connect() as conn:
+            if after_id is not None:
+                # The (captured_at, id) cursor survives the row being compacted away; a bare id needs the row.
+                if after_captured_at is None:
+                    row = conn.execute(
+                        "SELECT captured_at FROM effective_readings WHERE id = ?", (after_id,)
+                    ).fetchone()
+                    if row is None:
+                        raise KeyError(after_id)
+                    cursor_at = row[0]
+                else:
+                    cursor_at = format_timestamp(after_captured_at)
+                clauses.append("(captured_at, id) > (?, ?)")
+                params.extend([cursor_at, after_id])
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            limit_sql = ""
+            if limit is not None:
+                limit_sql = "LIMIT ?"
+                params.append(limit)
             cur = conn.execute(
+                f"""
+                SELECT id, boiler_current, boiler_set, radiator_current, radiator_set, mode, captured_at, device_id
+                FROM effective_readings
+                {where}
+                ORDER BY captured_at ASC, id ASC
+                {limit_sql}
+                """,
+                params,
+            )
+            return cur.fetchall()
+
+    def iter_export_rows(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        raw: bool = False,
+        device_id: str | None = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[list[tuple]]:
+        table, columns = ("readings", RAW_EXPORT_COLUMNS) if raw else ("effective_readings", EXPORT_COLUMNS)
+        clauses = []
+        params: list = []
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(device_id)
+        if start is not None:
+            clauses.append("captured_at >= ?")
+            params.append(format_timestamp(start))
+        if end is not None:
+            clauses.append("captured_at < ?")
+            params.append(format_timestamp(end))
+        # Keyset pagination: a pooled connection is held only while one chunk is read, never for a whole download.
+        after: tuple[str, int] | None = None
+        while True:
+            page = list(clauses)
+            page_params = list(params)
+            if after is not None:
+                page.append("(captured_at, id) > (?, ?)")
+                page_params.extend(after)
+            where = f"WHERE {' AND '.join(page)}" if page else ""
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                cur.row_factory = None
+                rows = cur.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY captured_at ASC, id ASC LIMIT ?",
+                    [*page_params, chunk_size],
+                ).fetchall()
+                cur.close()
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            after = (rows[-1][1], rows[-1][0])
+
+    def readings_extent(self, device_id: str | None = None) -> tuple[str, str] | None:
+        with self._connect() as conn:
+            if device_id is None:
+                row = conn.execute("SELECT MIN(captured_at), MAX(captured_at) FROM effective_readings").fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT MIN(captured_at), MAX(captured_at) FROM effective_readings WHERE device_id = ?",
+                    (device_id,),
+                ).fetchone()
+            if row[0] is None:
+                return None
+            return row[0], row[1]
+
+    def list_series_rows(self, resolution: str, start: datetime, end: datetime, device_id: str | None = None):
+        params = [format_timestamp(start), format_timestamp(end)]
+        device_sql = ""
+        if device_id is not None:
+            device_sql = "AND device_id = ?"
+            params.append(device_id)
+        if resolution == "raw":
+            columns = ", ".join(
+                f"{name}, {name} IS NOT NULL, {name}, {name}" for name in SERIES_FIELDS
+            )
+            sql = f"""
+                SELECT captured_at, 1, {columns}
+                FROM effective_readings
+                WHERE captured_at >= ? AND captured_at < ? {device_sql}
+                ORDER BY captured_at ASC, id ASC
+            """
+        else:
+            columns = ", ".join(
+                f"SUM({name}_sum) AS {name}_sum, SUM({name}_n) AS {name}_n, "
+                f"MIN({name}_min) AS {name}_min, MAX({name}_max) AS {name}_max"
+                for name in SERIES_FIELDS
+            )
+            sql = f"""
+                SELECT bucket, SUM(samples) AS samples, {columns}
+                FROM {ROLLUP_TABLES[resolution]}
+                WHERE bucket >= ? AND bucket < ? {device_sql}
+                GROUP BY bucket
+                ORDER BY bucket ASC
+            """
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def list_archived_edits(self, reading_id: int):
+        with self._connect() as conn:
+            return conn.execute(
                 """
-                SELECT
-                    r.id,
-                    COALESCE(e.boiler_current, r.boiler_current) AS boiler_current,
-                    COALESCE(e.boiler_set, r.boiler_set) AS boiler_set,
-                    COALESCE(e.radiator_current, r.radiator_current) AS radiator_current,
-                    COALESCE(e.radiator_set, r.radiator_set) AS radiator_set,
-                    COALESCE(e.mode, r.mode) AS mode,
-                    r.captured_at
-                FROM readings r
-                LEFT JOIN edits e ON e.reading_id = r.id
-                ORDER BY r.captured_at ASC
+                SELECT edit_id AS id, reading_id, boiler_current, boiler_set, radiator_current, radiator_set, mode,
+                       edited_by, edited_at
+                FROM edits_archive
+                WHERE merged_into = ?
+                ORDER BY edited_at ASC, edit_id ASC
+                """,
+                (reading_id,),
+            ).fetchall()
+
+    def latest_change_id(self) -> int:
+        with self._connect() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+            return row[0] if row else 0
+
+    def change_floor(self) -> int:
+        # The oldest change sequence a client can still resume from; anything earlier may have been pruned.
+        with self._connect() as conn:
+            oldest = conn.execute("SELECT MIN(id) FROM changes").fetchone()[0]
+            if oldest is not None:
+                return oldest - 1
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+            return row[0] if row else 0
+
+    def list_deleted_since(self, since: int, device_id: str | None = None) -> list[int]:
+        clauses = ["id > ?", "kind = 'delete'"]
+        params: list = [since]
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(device_id)
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"SELECT DISTINCT reading_id FROM changes WHERE {' AND '.join(clauses)} ORDER BY reading_id",
+                params,
+            )
+            return [row[0] for row in cur]
+
+    def list_changes(self, after_id: int, limit: int = 500):
+        with self._connect() as conn:
+            cur = conn.execute(
                 """
+                SELECT c.id AS change_id, c.kind, c.reading_id AS id, e.boiler_current, e.boiler_set,
+                       e.radiator_current, e.radiator_set, e.mode, e.captured_at, c.device_id
+                FROM changes c
+                LEFT JOIN effective_readings e ON e.id = c.reading_id
+                WHERE c.id > ?
+                ORDER BY c.id ASC
+                LIMIT ?
+                """,
+                (after_id, limit),
             )
             return cur.fetchall()
@@ -0,0 +1,63 @@
+from heater_reader.db import Database
+from heater_reader.offload import Offload
+import asyncio
+import json
+import threading
+
+
+def format_event(row) -> str:
+    if row["kind"] == "delete":
+        data = {"id": row["id"]}
+    else:
+        data = {key: row[key] for key in row.keys() if key not in ("change_id", "kind")}
+    return f"id: {row['change_id']}\nevent: {row['kind']}\ndata: {json.dumps(data)}\n\n"
+
+
+class ChangeFeed:
+    def __init__(
+        self, db: Database, batch_size: int = 500, heartbeat_seconds: float = 15.0, offload: Offload | None = None
+    ) -> None:
+        self._db = db
+        self._run = offload.run if offload is not None else asyncio.to_thread
+        self._batch_size = batch_size
+        self._heartbeat = heartbeat_seconds
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+        db.add_listener(self._wake)
+
+    def _wake(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+
+    async def stream(self, last_event_id: int | None = None):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            reset = last_event_id is not None and last_event_id < await self._run(self._db.change_floor)
+            if last_event_id is None or reset:
+                last_event_id = await self._run(self._db.latest_change_id)
+            yield "retry: 3000\n\n"
+            if reset:
+                # Changes after the client's last event were pruned; it has to reload before following the feed.
+                yield f"id: {last_event_id}\nevent: reset\ndata: {{}}\n\n"
+            while True:
+                rows = await self._run(self._db.list_changes, last_event_id, self._batch_size)
+                for row in rows:
+                    yield format_event(row)
+                    last_event_id = row["change_id"]
+                if len(rows) == self._batch_size:
+                    continue
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), self._heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                waiter[1].clear()
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
@@ -0,0 +1,46 @@
+from typing import Iterable, Iterator
+import csv
+import io
+import json
+import zlib
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def csv_chunks(columns: tuple[str, ...], chunks: Iterable[list[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(columns: tuple[str, ...], chunks: Iterable[list[tuple]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n" for row in rows).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode_rows(fmt: str, columns: tuple[str, ...], chunks: Iterable[list[tuple]]) -> Iterator[bytes]:
+    if fmt == "csv":
+        return csv_chunks(columns, chunks)
+    if fmt == "ndjson":
+        return ndjson_chunks(columns, chunks)
+    raise ValueError(f"unknown export format: {fmt}")
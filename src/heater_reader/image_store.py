@@ -0,0 +1,239 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Protocol
+from heater_reader.paths import ensure_dir
+import mmap
+import numpy as np
+import os
+import struct
+import threading
+
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+_MAGIC = b"HRPK"
+_HEADER = struct.Struct("<4sHH")
+_FLAG_CROPPED = 1
+_RECORD = np.dtype([("second", "<u4"), ("offset", "<u8"), ("length", "<u4")])
+
+
+class ImageStore(Protocol):
+    def write(self, captured_at: datetime, jpeg: bytes) -> str: ...
+
+
+def image_path_for(root: Path, ts: datetime) -> Path:
+    return root / ts.strftime("%Y/%m/%d/%H%M%S.jpg")
+
+
+def is_pack_ref(ref: str | Path) -> bool:
+    return f"{PACK_SUFFIX}#" in str(ref)
+
+
+def split_pack_ref(ref: str | Path) -> tuple[Path, int]:
+    pack, name = str(ref).rsplit("#", 1)
+    return Path(pack), int(name[:2]) * 3600 + int(name[2:4]) * 60 + int(name[4:6])
+
+
+def pack_ref(pack: Path, second: int) -> str:
+    return f"{pack}#{second // 3600:02d}{second // 60 % 60:02d}{second % 60:02d}"
+
+
+class DirectoryStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def write(self, captured_at: datetime, jpeg: bytes) -> str:
+        path = image_path_for(self.root, captured_at)
+        ensure_dir(path.parent)
+        path.write_bytes(jpeg)
+        return str(path)
+
+
+class PackStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._indexes: dict[Path, tuple[tuple[int, int], bool, dict[int, tuple[int, int]]]] = {}
+        self._maps: dict[Path, tuple[int, int, mmap.mmap]] = {}
+
+    def pack_for(self, ts: datetime) -> Path:
+        return self.root / ts.strftime(f"%Y/%m/%d{PACK_SUFFIX}")
+
+    def write(self, captured_at: datetime, jpeg: bytes) -> str:
+        pack = self.pack_for(captured_at)
+        second = captured_at.hour * 3600 + captured_at.minute * 60 + captured_at.second
+        with self._lock:
+            self._append(pack, [(second, jpeg)])
+        return pack_ref(pack, second)
+
+    def _append(self, pack: Path, entries: list[tuple[int, bytes]], flags: int = 0) -> None:
+        ensure_dir(pack.parent)
+        index = pack.with_suffix(INDEX_SUFFIX)
+        records = np.zeros(len(entries), dtype=_RECORD)
+        with open(pack, "ab") as handle:
+            offset = handle.seek(0, os.SEEK_END)
+            for i, (second, data) in enumerate(entries):
+                handle.write(data)
+                records[i] = (second, offset, len(data))
+                offset += len(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        with open(index, "ab") as handle:
+            if handle.seek(0, os.SEEK_END) == 0:
+                handle.write(_HEADER.pack(_MAGIC, 1, flags))
+            handle.write(records.tobytes())
+
+    def _index(self, pack: Path) -> tuple[bool, dict[int, tuple[int, int]]]:
+        index = pack.with_suffix(INDEX_SUFFIX)
+        st = index.stat()
+        stamp = (st.st_ino, st.st_size)
+        cached = self._indexes.get(pack)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        raw = index.read_bytes()
+        magic, _, flags = _HEADER.unpack_from(raw)
+        if magic != _MAGIC:
+            raise ValueError(f"not an image pack index: {index}")
+        body = raw[_HEADER.size :]
+        records = np.frombuffer(body[: len(body) - len(body) % _RECORD.itemsize], dtype=_RECORD)
+        entries = {
+            int(second): (int(offset), int(length))
+            for second, offset, length in zip(records["second"], records["offset"], records["length"])
+        }
+        cropped = bool(flags & _FLAG_CROPPED)
+        self._indexes[pack] = (stamp, cropped, entries)
+        return cropped, entries
+
+    def _map(self, pack: Path, end: int) -> mmap.mmap:
+        inode = os.stat(pack).st_ino
+        cached = self._maps.get(pack)
+        if cached is not None and cached[0] == inode and cached[1] >= end:
+            return cached[2]
+        with open(pack, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[pack] = (inode, len(mapped), mapped)
+        return mapped
+
+    def read(self, ref: str | Path) -> memoryview:
+        pack, second = split_pack_ref(ref)
+        with self._lock:
+            _, entries = self._index(pack)
+            if second not in entries:
+                raise FileNotFoundError(str(ref))
+            offset, length = entries[second]
+            mapped = self._map(pack, offset + length)
+        return memoryview(mapped)[offset : offset + length]
+
+    def is_cropped(self, ref: str | Path) -> bool:
+        pack, _ = split_pack_ref(ref)
+        with self._lock:
+            return self._index(pack)[0]
+
+    def exists(self, ref: str | Path) -> bool:
+        pack, second = split_pack_ref(ref)
+        if not pack.with_suffix(INDEX_SUFFIX).exists():
+            return False
+        with self._lock:
+            return second in self._index(pack)[1]
+
+    def refs(self, pack: Path) -> list[str]:
+        with self._lock:
+            _, entries = self._index(pack)
+        return [pack_ref(pack, second) for second in sorted(entries)]
+
+    def import_directory(self, day_dir: Path) -> list[tuple[str, str]]:
+        relative = Path(day_dir).relative_to(self.root)
+        pack = self.root / f"{relative}{PACK_SUFFIX}"
+        with self._lock:
+            existing = self._index(pack)[1] if pack.with_suffix(INDEX_SUFFIX).exists() else {}
+            moves = []
+            entries = []
+            for path in sorted(Path(day_dir).glob("*.jpg")):
+                stem = path.stem
+                second = int(stem[:2]) * 3600 + int(stem[2:4]) * 60 + int(stem[4:6])
+                if second not in existing:
+                    entries.append((second, path.read_bytes()))
+                moves.append((str(path), pack_ref(pack, second)))
+            if entries:
+                self._append(pack, entries)
+        return moves
+
+    def crop(self, pack: Path, crop: dict[str, int]) -> bool:
+        from heater_reader.ocr_pipeline import apply_crop
+        import cv2
+
+        with self._lock:
+            cropped, entries = self._index(pack)
+        if cropped:
+            return False
+        rewritten = []
+        for second in sorted(entries):
+            data = np.frombuffer(self.read(pack_ref(pack, second)), dtype=np.uint8)
+            image = apply_crop(cv2.imdecode(data, cv2.IMREAD_COLOR), crop)
+            ok, buf = cv2.imencode(".jpg", image)
+            if not ok:
+                raise ValueError(f"failed to encode cropped frame from {pack}")
+            rewritten.append((second, buf.tobytes()))
+        self.rewrite(pack, rewritten, cropped=True)
+        return True
+
+    def packs(self) -> Iterator[Path]:
+        yield from sorted(self.root.glob(f"[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]{PACK_SUFFIX}"))
+
+    def rewrite(self, pack: Path, entries: list[tuple[int, bytes]], cropped: bool) -> None:
+        tmp = pack.with_name(f".{pack.name}.tmp")
+        tmp_index = tmp.with_suffix(INDEX_SUFFIX)
+        for path in (tmp, tmp_index):
+            if path.exists():
+                path.unlink()
+        self._append(tmp, entries, flags=_FLAG_CROPPED if cropped else 0)
+        with self._lock:
+            os.replace(tmp, pack)
+            os.replace(tmp_index, pack.with_suffix(INDEX_SUFFIX))
+            self._indexes.pop(pack, None)
+            self._maps.pop(pack, None)
+
+
+_pack_stores: dict[Path, PackStore] = {}
+_pack_lock = threading.Lock()
+
+
+def pack_store_for(ref: str | Path) -> PackStore:
+    root = split_pack_ref(ref)[0].parent.parent.parent
+    with _pack_lock:
+        store = _pack_stores.get(root)
+        if store is None:
+            store = _pack_stores[root] = PackStore(root)
+        return store
+
+
+def build_store(root: Path, storage: str = "files") -> ImageStore:
+    if storage == "pack":
+        with _pack_lock:
+            return _pack_stores.setdefault(Path(root), PackStore(root))
+    return DirectoryStore(root)
+
+
+def image_exists(ref: str | Path) -> bool:
+    if is_pack_ref(ref):
+        return pack_store_for(ref).exists(ref)
+    return Path(ref).exists()
+
+
+def load_image(ref: str | Path) -> tuple[np.ndarray, bool]:
+    import cv2
+
+    if is_pack_ref(ref):
+        store = pack_store_for(ref)
+        data = np.frombuffer(store.read(ref), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR), store.is_cropped(ref)
+    return cv2.imread(str(ref)), False
+
+
+def captured_at_for_ref(ref: str | Path) -> datetime:
+    text = str(ref)
+    if is_pack_ref(text):
+        pack, second = split_pack_ref(text)
+        day = datetime.strptime("/".join(pack.with_suffix("").parts[-3:]), "%Y/%m/%d")
+        return day.replace(hour=second // 3600, minute=second // 60 % 60, second=second % 60, tzinfo=timezone.utc)
+    parts = Path(text).with_suffix("").parts[-4:]
+    return datetime.strptime("/".join(parts), "%Y/%m/%d/%H%M%S").replace(tzinfo=timezone.utc)
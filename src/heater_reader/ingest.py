@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+from heater_reader.capture import decode_jpeg, encode_frame_to_jpeg
+from heater_reader.image_store import DirectoryStore, ImageStore
+from heater_reader.db import DEFAULT_DEVICE, Database
+from heater_reader.metrics import STAGE_ERRORS, STAGE_SECONDS
+from heater_reader.ocr import ReadingText
+import numpy as np
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+@dataclass
+class CaptureJob:
+    frame: np.ndarray | None
+    captured_at: datetime
+    image_path: Path | str | None = None
+    reading: ReadingText | None = None
+    jpeg: bytes | None = None
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        db: Database,
+        grab: Callable[[], tuple[np.ndarray | bytes, datetime]],
+        image_root: Path,
+        ocr: Callable[[Path | str], ReadingText | None],
+        interval_seconds: float = 60,
+        queue_size: int = 4,
+        retries: int = 1,
+        store: ImageStore | None = None,
+        ocr_frame: Callable[[np.ndarray], ReadingText | None] | None = None,
+        device_id: str = DEFAULT_DEVICE,
+    ) -> None:
+        self.db = db
+        self.device_id = device_id
+        self._grab = grab
+        self._image_store = store or DirectoryStore(Path(image_root))
+        self._ocr = ocr
+        self._ocr_frame = ocr_frame
+        self.interval_seconds = interval_seconds
+        self._retries = retries
+        self._store_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._ocr_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._insert_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._workers: list[threading.Thread] = []
+        self._scheduler: threading.Thread | None = None
+        self.dropped_frames = 0
+        self.last_capture_at: datetime | None = None
+        self._last_grabbed_at: datetime | None = None
+
+    def queue_depths(self) -> dict[str, int]:
+        return {
+            "store": self._store_queue.qsize(),
+            "ocr": self._ocr_queue.qsize(),
+            "insert": self._insert_queue.qsize(),
+        }
+
+    def start_workers(self) -> None:
+        if self._workers:
+            return
+        stages = [
+            ("store", self._store_queue, self._store, self._ocr_queue, False),
+            ("ocr", self._ocr_queue, self._recognize, self._insert_queue, True),
+            ("insert", self._insert_queue, self._insert, None, True),
+        ]
+        for name, source, handle, target, block in stages:
+            thread = threading.Thread(
+                target=self._work,
+                args=(name, source, handle, target, block),
+                name=f"ingest-{name}",
+                daemon=True,
+            )
+            thread.start()
+            self._workers.append(thread)
+
+    def start(self) -> None:
+        self.start_workers()
+        if self._scheduler is None:
+            self._stop.clear()
+            self._scheduler = threading.Thread(target=self._schedule, name="ingest-scheduler", daemon=True)
+            self._scheduler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join()
+            self._scheduler = None
+        if self._workers:
+            self._store_queue.put(_STOP)
+            for thread in self._workers:
+                thread.join()
+            self._workers = []
+
+    def tick(self) -> bool:
+        job = None
+        for _ in range(self._retries + 1):
+            try:
+                with STAGE_SECONDS.time("grab"):
+                    frame, captured_at = self._grab()
+                job = CaptureJob(frame=frame, captured_at=captured_at or datetime.now(timezone.utc))
+                if isinstance(frame, bytes):
+                    # Camera-encoded JPEGs are stored as-is and only decoded if OCR needs pixels.
+                    job.frame, job.jpeg = None, frame
+                break
+            except Exception as exc:
+                self._record_error("capture", exc)
+        if job is None:
+            return False
+        # A source that keeps handing back the same frame must not produce a duplicate reading.
+        if self._last_grabbed_at is not None and job.captured_at <= self._last_grabbed_at:
+            stale = RuntimeError(f"frame captured at {job.captured_at.isoformat()} is not newer than the last one")
+            self._record_error("capture", stale)
+            return False
+        self._last_grabbed_at = job.captured_at
+        return self._offer(self._store_queue, job, "store")
+
+    def _schedule(self) -> None:
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.tick()
+            next_tick += self.interval_seconds
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now
+            self._stop.wait(next_tick - now)
+
+    def _work(self, name, source: queue.Queue, handle, target: queue.Queue | None, block: bool) -> None:
+        while True:
+            job = source.get()
+            if job is _STOP:
+                if target is not None:
+                    target.put(_STOP)
+                return
+            try:
+                job = handle(job)
+            except Exception as exc:
+                self._record_error(name, exc)
+                continue
+            if job is None or target is None:
+                continue
+            if block:
+                target.put(job)
+            else:
+                self._offer(target, job, name)
+
+    def _offer(self, target: queue.Queue, job: CaptureJob, stage: str) -> bool:
+        try:
+            target.put_nowait(job)
+            return True
+        except queue.Full:
+            self.dropped_frames += 1
+            detail = f" {job.image_path}" if job.image_path else ""
+            self._record_error(stage, RuntimeError(f"backlog full, dropped frame{detail}"))
+            return False
+
+    def _store(self, job: CaptureJob) -> CaptureJob:
+        jpeg = job.jpeg if job.jpeg is not None else encode_frame_to_jpeg(job.frame)
+        with STAGE_SECONDS.time("image_write"):
+            job.image_path = self._image_store.write(job.captured_at, jpeg)
+        if self._ocr_frame is None:
+            job.frame = None
+            job.jpeg = None
+        return job
+
+    def _recognize(self, job: CaptureJob) -> CaptureJob:
+        with STAGE_SECONDS.time("ocr"):
+            if job.jpeg is not None and job.frame is None:
+                job.frame = decode_jpeg(job.jpeg)
+            if job.frame is not None:
+                reading = self._ocr_frame(job.frame)
+                job.frame = None
+                job.jpeg = None
+            else:
+                reading = self._ocr(job.image_path)
+        if reading is None:
+            raise RuntimeError(f"OCR produced no reading for {job.image_path}")
+        job.reading = reading
+        return job
+
+    def _insert(self, job: CaptureJob) -> None:
+        with STAGE_SECONDS.time("db_insert"):
+            self.db.insert_reading(
+                job.reading, image_path=str(job.image_path), captured_at=job.captured_at, device_id=self.device_id
+            )
+        self.last_capture_at = job.captured_at
+
+    def _record_error(self, stage: str, exc: Exception) -> None:
+        STAGE_ERRORS.inc(stage)
+        try:
+            self.db.insert_capture_error(f"{stage}: {exc}", device_id=self.device_id)
+        except Exception:
+            pass
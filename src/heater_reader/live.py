@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Callable
+from heater_reader.capture import FrameGrabber, encode_frame_to_jpeg
+import asyncio
+import cv2
+import numpy as np
+import threading
+import time
+
+BOUNDARY = "frame"
+
+
+def resize_to_width(frame: np.ndarray, width: int | None) -> np.ndarray:
+    height, current = frame.shape[:2]
+    if not width or width >= current:
+        return frame
+    return cv2.resize(frame, (width, max(1, round(height * width / current))), interpolation=cv2.INTER_AREA)
+
+
+def multipart_chunk(jpeg: bytes) -> bytes:
+    header = f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+    return header.encode() + jpeg + b"\r\n"
+
+
+class LiveSubscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, fps: float, width: int | None) -> None:
+        self.width = width
+        self.interval = 1.0 / fps
+        self.last_sent = 0.0
+        self.dropped = 0
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._lock = threading.Lock()
+        self._jpeg: bytes | None = None
+
+    def offer(self, jpeg: bytes) -> None:
+        with self._lock:
+            if self._jpeg is not None:
+                self.dropped += 1
+            self._jpeg = jpeg
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass
+
+    async def next(self) -> bytes:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            with self._lock:
+                jpeg, self._jpeg = self._jpeg, None
+            if jpeg is not None:
+                return jpeg
+
+
+class MjpegBroadcaster:
+    def __init__(self, grabber: Callable[[], FrameGrabber]) -> None:
+        self._grabber = grabber
+        self._subscribers: list[LiveSubscriber] = []
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.frames_encoded = 0
+
+    def subscribe(self, fps: float = 5.0, width: int | None = None) -> LiveSubscriber:
+        subscriber = LiveSubscriber(asyncio.get_running_loop(), fps, width)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="mjpeg-broadcast", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    async def stream(self, fps: float = 5.0, width: int | None = None):
+        subscriber = self.subscribe(fps, width)
+        try:
+            while True:
+                yield multipart_chunk(await subscriber.next())
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _run(self) -> None:
+        grabber = self._grabber()
+        last: datetime | None = None
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers)
+                if not subscribers:
+                    self._thread = None
+                    return
+            try:
+                frame, captured_at = grabber.wait_newer(last, timeout=1.0)
+            except RuntimeError:
+                continue
+            last = captured_at
+            now = time.monotonic()
+            encoded: dict[int | None, bytes] = {}
+            for subscriber in subscribers:
+                if now - subscriber.last_sent < subscriber.interval:
+                    continue
+                width = subscriber.width if subscriber.width and subscriber.width < frame.shape[1] else None
+                if width not in encoded:
+                    encoded[width] = encode_frame_to_jpeg(resize_to_width(frame, width))
+                subscriber.last_sent = now
+                subscriber.offer(encoded[width])
+            self.frames_encoded += len(encoded)
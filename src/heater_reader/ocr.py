@@ -34,3 +34,29 @@ def parse_reading(text: str) -> ReadingText:
         radiator_set=radiator_set,
         mode=mode,
     )
+
+
+def _parse_pair(text: str) -> tuple[int | None, int | None]:
+    match = _TEMP_PAIR.search(text)
+    if match is None:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_fields(texts: dict[str, str]) -> ReadingText:
+    boiler_current, boiler_set = _parse_pair(texts.get("boiler", ""))
+    radiator_current, radiator_set = _parse_pair(texts.get("radiator", ""))
+    mode_text = texts.get("mode", "").upper()
+    mode = "UNKNOWN"
+    if "PRACA" in mode_text:
+        mode = "PRACA"
+    elif "PODTRZYMANIE" in mode_text:
+        mode = "PODTRZYMANIE"
+
+    return ReadingText(
+        boiler_current=boiler_current,
+        boiler_set=boiler_set,
+        radiator_current=radiator_current,
+        radiator_set=radiator_set,
+        mode=mode,
+    )
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Callable
+from heater_reader.ocr import ReadingText
+from heater_reader.seven_segment import binarize
+import cv2
+import hashlib
+import numpy as np
+import threading
+
+
+def changed_beyond_noise(binary: np.ndarray, last: np.ndarray, noise_pixels: int = 1) -> bool:
+    # Opening the difference drops specks and edge flicker up to noise_pixels wide; a lit or unlit segment survives.
+    diff = (binary != last).astype(np.uint8)
+    kernel = np.ones((noise_pixels + 1, noise_pixels + 1), dtype=np.uint8)
+    return bool(cv2.morphologyEx(diff, cv2.MORPH_OPEN, kernel).any())
+
+
+def display_key(binary: np.ndarray) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(binary.shape, dtype=np.int64).tobytes())
+    digest.update(np.packbits(binary).tobytes())
+    return digest.digest()
+
+
+class OcrCache:
+    def __init__(self, maxsize: int = 256, noise_pixels: int = 1) -> None:
+        self._maxsize = maxsize
+        self._noise_pixels = noise_pixels
+        self._entries: OrderedDict[bytes, ReadingText] = OrderedDict()
+        self._last_binary: np.ndarray | None = None
+        self._last_reading: ReadingText | None = None
+        self._lock = threading.Lock()
+        self.unchanged = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "unchanged": self.unchanged,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._last_binary = None
+            self._last_reading = None
+
+    def recognize(
+        self, image: np.ndarray, recognize: Callable[[np.ndarray], ReadingText | None]
+    ) -> ReadingText | None:
+        binary = binarize(image)
+        # The LRU is keyed on the full-resolution display so a one-segment change can never collide.
+        key = display_key(binary)
+        with self._lock:
+            last = self._last_binary
+            if (
+                last is not None
+                and self._last_reading is not None
+                and last.shape == binary.shape
+                and not changed_beyond_noise(binary, last, self._noise_pixels)
+            ):
+                self.unchanged += 1
+                return self._last_reading
+            reading = self._entries.get(key)
+            if reading is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._remember(binary, reading)
+                return reading
+            self.misses += 1
+
+        reading = recognize(image)
+        if reading is None:
+            return None
+        with self._lock:
+            self._entries[key] = reading
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+            self._remember(binary, reading)
+        return reading
+
+    def _remember(self, binary: np.ndarray, reading: ReadingText) -> None:
+        self._last_binary = binary
+        self._last_reading = reading
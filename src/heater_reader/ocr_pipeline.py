@@ -1,7 +1,65 @@
 from pathlib import Path
-import pytesseract
+from typing import Protocol
+from heater_reader.image_store import load_image
+from heater_reader.metrics import STAGE_SECONDS
+from heater_reader.ocr import ReadingText, parse_reading
+from heater_reader.tesseract_pool import TesseractExecutor, default_executor
 import cv2
 import numpy as np
+import threading
+
+
+class OcrEngine(Protocol):
+    def recognize(self, image: np.ndarray) -> tuple[ReadingText | None, float]: ...
+
+
+class TesseractEngine:
+    def __init__(self, executor: TesseractExecutor | None = None) -> None:
+        self._executor = executor
+
+    def recognize(self, image: np.ndarray) -> tuple[ReadingText | None, float]:
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        executor = self._executor or default_executor()
+        with STAGE_SECONDS.time("tesseract"):
+            text = executor.image_to_string(gray)
+        with STAGE_SECONDS.time("parse_reading"):
+            return parse_reading(text), 1.0
+
+
+class FallbackEngine:
+    def __init__(self, primary: OcrEngine, fallback: OcrEngine, min_confidence: float) -> None:
+        self._primary = primary
+        self._fallback = fallback
+        self._min_confidence = min_confidence
+
+    def recognize(self, image: np.ndarray) -> tuple[ReadingText | None, float]:
+        reading, confidence = self._primary.recognize(image)
+        if reading is not None and confidence >= self._min_confidence:
+            return reading, confidence
+        return self._fallback.recognize(image)
+
+
+def build_engine(cfg) -> OcrEngine:
+    tesseract = TesseractEngine()
+    if cfg.engine == "seven_segment" and cfg.digits:
+        from heater_reader.seven_segment import SevenSegmentEngine
+
+        engine = SevenSegmentEngine(cfg.digits, mode_indicator=cfg.mode_indicator, invert=cfg.invert)
+        return FallbackEngine(engine, tesseract, cfg.min_confidence)
+    return tesseract
+
+
+_engine_cache: tuple[object, OcrEngine] | None = None
+_engine_lock = threading.Lock()
+
+
+def engine_for(cfg) -> OcrEngine:
+    global _engine_cache
+    with _engine_lock:
+        # Every config load builds new objects; compare by value so an unchanged reload keeps the engine.
+        if _engine_cache is None or _engine_cache[0] != cfg:
+            _engine_cache = (cfg, build_engine(cfg))
+        return _engine_cache[1]
 
 
 def apply_crop(image: np.ndarray, crop: dict[str, int] | None) -> np.ndarray:
@@ -17,9 +75,49 @@ def apply_crop(image: np.ndarray, crop: dict[str, int] | None) -> np.ndarray:
 def extract_text_from_image(path: Path, config_path: Path | None = None) -> str:
     image = cv2.imread(str(path))
     if config_path:
-        from heater_reader.config import load_config
+        from heater_reader.config import config_service
 
-        cfg = load_config(config_path)
+        cfg = config_service(config_path).get()
         image = apply_crop(image, cfg.capture.crop)
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    return pytesseract.image_to_string(gray)
+    return default_executor().image_to_string(gray)
+
+
+def recognize_image(
+    path: Path | str, config_path: Path | None = None, cache=None, device_id: str | None = None
+) -> ReadingText | None:
+    with STAGE_SECONDS.time("image_load"):
+        image, cropped = load_image(path)
+    return recognize_frame(image, config_path, cache=cache, cropped=cropped, device_id=device_id)
+
+
+def recognize_frame(
+    frame: np.ndarray,
+    config_path: Path | None = None,
+    cache=None,
+    cropped: bool = False,
+    device_id: str | None = None,
+) -> ReadingText | None:
+    from heater_reader.config import DEFAULT_CONFIG, config_service
+    from heater_reader.roi import plan_for
+
+    cfg = config_service(config_path).get() if config_path else DEFAULT_CONFIG
+    plan = plan_for(cfg, cropped, device_id)
+    display = plan.display(frame)
+    engine = engine_for(cfg.ocr)
+    use_regions = bool(cfg.ocr.regions) and cfg.ocr.engine == "tesseract"
+
+    def recognize(_view: np.ndarray) -> ReadingText | None:
+        if use_regions:
+            return plan.read(frame)
+        return engine.recognize(display)[0]
+
+    view = None
+    if cache is not None:
+        if plan.localized:
+            view = display
+        elif use_regions and plan.regions:
+            view = plan.region_view(frame)
+    if view is not None:
+        return cache.recognize(view, recognize)
+    return recognize(display)
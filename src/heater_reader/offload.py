@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+import asyncio
+
+T = TypeVar("T")
+_DONE = object()
+
+
+class Offload:
+    def __init__(self, name: str, max_workers: int, timeout: float | None = None) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"offload-{name}")
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        # A job still queued when the caller gives up is cancelled before it ever takes a worker.
+        future = asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        if self.timeout is None:
+            return await future
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        try:
+            while (item := await self.run(next, iterator, _DONE)) is not _DONE:
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            try:
+                if close is not None:
+                    close()
+            except ValueError:
+                # Still running in a worker after a cancelled next(); it is closed when collected.
+                pass
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
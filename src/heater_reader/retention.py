@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from heater_reader.config import RetentionConfig
+from heater_reader.db import Database
+
+
+@dataclass
+class RetentionStats:
+    compacted: int = 0
+    errors_pruned: int = 0
+    changes_pruned: int = 0
+    pages_freed: int = 0
+
+
+def bucket_cutoff(now: datetime, days: int, bucket_seconds: int) -> datetime:
+    cutoff = now.astimezone(timezone.utc) - timedelta(days=days)
+    epoch = int(cutoff.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % bucket_seconds, tz=timezone.utc)
+
+
+def apply_retention(db: Database, policy: RetentionConfig, now: datetime | None = None) -> RetentionStats:
+    now = now or datetime.now(timezone.utc)
+    stats = RetentionStats()
+    bucket_seconds = policy.bucket_minutes * 60
+
+    if policy.raw_days > 0 and bucket_seconds > 0:
+        before = bucket_cutoff(now, policy.raw_days, bucket_seconds)
+        for device_id in db.device_ids():
+            start: str | None = ""
+            while start is not None:
+                removed, start = db.compact_readings_batch(
+                    start, before, bucket_seconds, policy.batch_size, device_id=device_id
+                )
+                stats.compacted += removed
+
+    if policy.errors_days > 0:
+        before = now - timedelta(days=policy.errors_days)
+        while pruned := db.prune_before("capture_errors", "captured_at", before, policy.batch_size):
+            stats.errors_pruned += pruned
+
+    if policy.changes_days > 0:
+        before = now - timedelta(days=policy.changes_days)
+        while pruned := db.prune_before("changes", "changed_at", before, policy.batch_size):
+            stats.changes_pruned += pruned
+
+    stats.pages_freed = db.incremental_vacuum()
+    return stats
@@ -0,0 +1,98 @@
+from heater_reader.config import AppConfig, RegionConfig
+from heater_reader.metrics import STAGE_SECONDS
+from heater_reader.ocr import ReadingText, parse_fields
+from heater_reader.tesseract_pool import TesseractExecutor, default_executor
+import cv2
+import numpy as np
+import threading
+
+
+def _crop_box(crop: dict[str, int] | None) -> tuple[int, int, int, int] | None:
+    if not crop:
+        return None
+    return crop.get("x", 0), crop.get("y", 0), crop.get("w", 0), crop.get("h", 0)
+
+
+class RoiPlan:
+    def __init__(self, cfg: AppConfig, cropped: bool = False, device_id: str | None = None) -> None:
+        capture = cfg.device(device_id)
+        crop = _crop_box(capture.crop)
+        # Display coordinates are relative to the crop; packs that were cropped on disk start at its origin.
+        self._origin = np.float32(crop[:2]) if crop else np.zeros(2, dtype=np.float32)
+        self._shift = self._origin if cropped else np.zeros(2, dtype=np.float32)
+        self._crop = None if cropped else crop
+        # Only a crop or rectified display is small enough for the OCR cache's change check to see digits.
+        self.localized = crop is not None or bool(capture.perspective)
+        self._inverse = None
+        self._display_maps = None
+        if capture.perspective:
+            source = np.float32(capture.perspective)
+            if capture.perspective_size:
+                width, height = capture.perspective_size
+            else:
+                width = round(max(np.linalg.norm(source[1] - source[0]), np.linalg.norm(source[2] - source[3])))
+                height = round(max(np.linalg.norm(source[3] - source[0]), np.linalg.norm(source[2] - source[1])))
+            target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+            self._inverse = cv2.getPerspectiveTransform(target, source)
+            self._display_maps = self._maps((0, 0, width, height), 1.0)
+        self.regions: dict[str, tuple[RegionConfig, tuple[np.ndarray, np.ndarray]]] = {
+            name: (region, self._maps(region.box, cfg.ocr.region_scale))
+            for name, region in (cfg.ocr.regions or {}).items()
+        }
+
+    def _maps(self, box, scale: float) -> tuple[np.ndarray, np.ndarray]:
+        x, y, w, h = box
+        out_w, out_h = max(1, round(w * scale)), max(1, round(h * scale))
+        xs = x + (np.arange(out_w, dtype=np.float32) + 0.5) * (w / out_w) - 0.5
+        ys = y + (np.arange(out_h, dtype=np.float32) + 0.5) * (h / out_h) - 0.5
+        grid = np.stack(np.meshgrid(xs, ys), axis=-1)
+        if self._inverse is not None:
+            grid = cv2.perspectiveTransform(grid.reshape(-1, 1, 2), self._inverse).reshape(out_h, out_w, 2)
+        else:
+            grid = grid + self._origin
+        grid = grid - self._shift
+        return cv2.convertMaps(grid[..., 0], grid[..., 1], cv2.CV_16SC2)
+
+    def display(self, frame: np.ndarray) -> np.ndarray:
+        if self._display_maps is not None:
+            return cv2.remap(frame, *self._display_maps, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        if self._crop is None:
+            return frame
+        x, y, w, h = self._crop
+        return frame[y : y + h, x : x + w]
+
+    def region_view(self, frame: np.ndarray) -> np.ndarray:
+        rois = list(self.extract(frame).values())
+        width = max(roi.shape[1] for roi in rois)
+        return np.vstack([np.pad(roi, ((0, 0), (0, width - roi.shape[1])), mode="edge") for roi in rois])
+
+    def extract(self, frame: np.ndarray) -> dict[str, np.ndarray]:
+        rois = {}
+        with STAGE_SECONDS.time("roi_remap"):
+            for name, (_, maps) in self.regions.items():
+                roi = cv2.remap(frame, *maps, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+                rois[name] = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        return rois
+
+    def read(self, frame: np.ndarray, executor: TesseractExecutor | None = None) -> ReadingText:
+        executor = executor or default_executor()
+        futures = {
+            name: executor.submit(roi, self.regions[name][0].tesseract_config())
+            for name, roi in self.extract(frame).items()
+        }
+        with STAGE_SECONDS.time("tesseract_regions"):
+            texts = {name: future.result() for name, future in futures.items()}
+        with STAGE_SECONDS.time("parse_reading"):
+            return parse_fields(texts)
+
+
+_plans: dict[tuple[str | None, bool], tuple[AppConfig, RoiPlan]] = {}
+_plans_lock = threading.Lock()
+
+
+def plan_for(cfg: AppConfig, cropped: bool = False, device_id: str | None = None) -> RoiPlan:
+    with _plans_lock:
+        cached = _plans.get((device_id, cropped))
+        if cached is None or cached[0] is not cfg:
+            cached = _plans[device_id, cropped] = (cfg, RoiPlan(cfg, cropped, device_id))
+        return cached[1]
@@ -0,0 +1,81 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from heater_reader.ingest import IngestPipeline
+import heapq
+import threading
+import time
+
+
+class DeviceScheduler:
+    def __init__(self, pipelines: list[IngestPipeline]) -> None:
+        self.pipelines = {pipeline.device_id: pipeline for pipeline in pipelines}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._ticks: ThreadPoolExecutor | None = None
+
+    @property
+    def last_capture_at(self) -> datetime | None:
+        stamps = [p.last_capture_at for p in self.pipelines.values() if p.last_capture_at is not None]
+        return max(stamps) if stamps else None
+
+    @property
+    def dropped_frames(self) -> int:
+        return sum(pipeline.dropped_frames for pipeline in self.pipelines.values())
+
+    def queue_depths(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for pipeline in self.pipelines.values():
+            for stage, depth in pipeline.queue_depths().items():
+                totals[stage] = totals.get(stage, 0) + depth
+        return totals
+
+    def devices(self) -> dict[str, dict]:
+        return {
+            device_id: {
+                "last_capture_at": pipeline.last_capture_at.isoformat() if pipeline.last_capture_at else None,
+                "queue_depths": pipeline.queue_depths(),
+                "dropped_frames": pipeline.dropped_frames,
+            }
+            for device_id, pipeline in self.pipelines.items()
+        }
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        for pipeline in self.pipelines.values():
+            pipeline.start_workers()
+        self._stop.clear()
+        self._ticks = ThreadPoolExecutor(max_workers=max(1, len(self.pipelines)), thread_name_prefix="device-tick")
+        self._thread = threading.Thread(target=self._schedule, name="device-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._ticks is not None:
+            self._ticks.shutdown(wait=True)
+            self._ticks = None
+        for pipeline in self.pipelines.values():
+            pipeline.stop()
+
+    def _schedule(self) -> None:
+        now = time.monotonic()
+        count = len(self.pipelines)
+        # Stagger first ticks across the shortest interval so devices do not all hit OCR at once.
+        spread = min((p.interval_seconds for p in self.pipelines.values()), default=0)
+        due = [(now + spread * index / max(count, 1), device_id) for index, device_id in enumerate(self.pipelines)]
+        heapq.heapify(due)
+        running: dict[str, Future] = {}
+        while due and not self._stop.is_set():
+            when, device_id = heapq.heappop(due)
+            if self._stop.wait(max(0.0, when - time.monotonic())):
+                return
+            pipeline = self.pipelines[device_id]
+            previous = running.get(device_id)
+            if previous is None or previous.done():
+                # A grab that blocks on one camera must not delay ticks for the others.
+                running[device_id] = self._ticks.submit(pipeline.tick)
+            when += pipeline.interval_seconds
+            heapq.heappush(due, (max(when, time.monotonic()), device_id))
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+from heater_reader.db import SERIES_FIELDS, Database
+import numpy as np
+
+RESOLUTIONS = (("day", 86400), ("hour", 3600))
+
+
+def choose_resolution(span_seconds: float, points: int) -> str:
+    bucket_seconds = span_seconds / max(points, 1)
+    for resolution, seconds in RESOLUTIONS:
+        if bucket_seconds >= seconds:
+            return resolution
+    return "raw"
+
+
+def floor_to(ts: datetime, resolution: str) -> datetime:
+    if resolution == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts
+
+
+def to_epoch(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[s]").astype(np.int64)
+
+
+def format_epoch(values: np.ndarray) -> list[str]:
+    return [ts.replace("T", " ") for ts in np.datetime_as_string(values.astype("datetime64[s]"))]
+
+
+def rows_to_arrays(rows) -> tuple[np.ndarray, np.ndarray]:
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 1 + 4 * len(SERIES_FIELDS)))
+    t = to_epoch([row[0] for row in rows])
+    values = np.array([tuple(row)[1:] for row in rows], dtype=float)
+    return t, values
+
+
+def bucket_series(t: np.ndarray, values: np.ndarray, start: int, end: int, points: int) -> dict:
+    span = max(end - start, 1)
+    idx = np.clip((t - start) * points // span, 0, points - 1)
+    samples = np.bincount(idx, weights=values[:, 0], minlength=points)
+    keep = samples > 0
+    result = {"t": format_epoch(start + np.flatnonzero(keep) * span // points)}
+    for offset, name in enumerate(SERIES_FIELDS):
+        sums, counts, mins, maxs = values[:, 1 + 4 * offset : 5 + 4 * offset].T
+        present = counts > 0
+        total = np.bincount(idx, weights=np.where(present, sums, 0), minlength=points)
+        n = np.bincount(idx, weights=counts, minlength=points)
+        low = np.full(points, np.inf)
+        high = np.full(points, -np.inf)
+        np.minimum.at(low, idx[present], mins[present])
+        np.maximum.at(high, idx[present], maxs[present])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = total / n
+        has = n[keep] > 0
+        result[name] = {
+            "avg": _nullable(np.round(avg[keep], 2), has),
+            "min": _nullable(low[keep], has),
+            "max": _nullable(high[keep], has),
+        }
+    return result
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+    x = x.astype(float)
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else size
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def lttb_series(t: np.ndarray, values: np.ndarray, points: int) -> dict:
+    result = {}
+    for offset, name in enumerate(SERIES_FIELDS):
+        sums, counts = values[:, 1 + 4 * offset], values[:, 2 + 4 * offset]
+        present = counts > 0
+        x = t[present]
+        y = sums[present] / counts[present]
+        keep = lttb(x, y, points)
+        result[name] = {"t": format_epoch(x[keep]), "value": np.round(y[keep], 2).tolist()}
+    return result
+
+
+def build_series(
+    db: Database,
+    start: datetime | None,
+    end: datetime | None,
+    points: int,
+    method: str = "minmax",
+    device_id: str | None = None,
+) -> dict:
+    if start is None or end is None:
+        now = datetime.now(timezone.utc)
+        first, last = now, now
+        extent = db.readings_extent(device_id)
+        if extent is not None:
+            first, last = (datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc) for ts in extent)
+        start = start or first
+        end = end or last + timedelta(seconds=1)
+    resolution = choose_resolution((end - start).total_seconds(), points)
+    start = floor_to(start.astimezone(timezone.utc), resolution)
+    t, values = rows_to_arrays(db.list_series_rows(resolution, start, end, device_id))
+    if method == "lttb":
+        series = lttb_series(t, values, points)
+    else:
+        series = bucket_series(t, values, int(start.timestamp()), int(end.timestamp()), points)
+    return {"resolution": resolution, "method": method, **series}
+
+
+def _nullable(values: np.ndarray, mask: np.ndarray) -> list:
+    return [float(v) if ok else None for v, ok in zip(values, mask)]
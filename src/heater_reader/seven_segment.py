@@ -0,0 +1,113 @@
+from heater_reader.metrics import STAGE_SECONDS
+from heater_reader.ocr import ReadingText
+import cv2
+import numpy as np
+
+CELL_WIDTH = 24
+CELL_HEIGHT = 40
+
+# (row_from, row_to, col_from, col_to) as fractions of the digit cell, segments a-g.
+_SEGMENT_BOXES = (
+    (0.00, 0.10, 0.30, 0.70),
+    (0.15, 0.40, 0.80, 1.00),
+    (0.60, 0.85, 0.80, 1.00),
+    (0.90, 1.00, 0.30, 0.70),
+    (0.60, 0.85, 0.00, 0.20),
+    (0.15, 0.40, 0.00, 0.20),
+    (0.45, 0.55, 0.30, 0.70),
+)
+
+_DIGITS = {
+    "abcdef": "0",
+    "bc": "1",
+    "abdeg": "2",
+    "abcdg": "3",
+    "bcfg": "4",
+    "acdfg": "5",
+    "acdefg": "6",
+    "cdefg": "6",
+    "abc": "7",
+    "abcf": "7",
+    "abcdefg": "8",
+    "abcdfg": "9",
+    "abcfg": "9",
+    "": "",
+}
+
+
+def _segment_masks() -> np.ndarray:
+    masks = np.zeros((len(_SEGMENT_BOXES), CELL_HEIGHT, CELL_WIDTH), dtype=np.float32)
+    for index, (r0, r1, c0, c1) in enumerate(_SEGMENT_BOXES):
+        masks[index, round(r0 * CELL_HEIGHT) : round(r1 * CELL_HEIGHT), round(c0 * CELL_WIDTH) : round(c1 * CELL_WIDTH)] = 1
+    return masks / masks.sum(axis=(1, 2), keepdims=True)
+
+
+_MASKS = _segment_masks()
+_PATTERNS = {
+    sum(1 << "abcdefg".index(segment) for segment in segments): digit for segments, digit in _DIGITS.items()
+}
+
+
+def binarize(image: np.ndarray, invert: bool = False) -> np.ndarray:
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    mode = cv2.THRESH_BINARY if invert else cv2.THRESH_BINARY_INV
+    _, binary = cv2.threshold(gray, 0, 1, mode | cv2.THRESH_OTSU)
+    return binary
+
+
+def read_digits(binary: np.ndarray, boxes: list[list[int]]) -> tuple[str | None, float]:
+    cells = np.stack(
+        [
+            cv2.resize(binary[y : y + h, x : x + w], (CELL_WIDTH, CELL_HEIGHT), interpolation=cv2.INTER_AREA)
+            for x, y, w, h in boxes
+        ]
+    ).astype(np.float32)
+    ratios = np.einsum("nhw,shw->ns", cells, _MASKS)
+    lit = ratios > 0.5
+    codes = lit @ (1 << np.arange(len(_SEGMENT_BOXES)))
+    confidence = float(np.abs(ratios * 2 - 1).min())
+    digits = [_PATTERNS.get(int(code)) for code in codes]
+    if any(digit is None for digit in digits):
+        return None, 0.0
+    return "".join(digits) or None, confidence
+
+
+class SevenSegmentEngine:
+    def __init__(
+        self,
+        digits: dict[str, list[list[int]]],
+        mode_indicator: list[int] | None = None,
+        invert: bool = False,
+    ) -> None:
+        self._digits = digits
+        self._mode_indicator = mode_indicator
+        self._invert = invert
+
+    def recognize(self, image: np.ndarray) -> tuple[ReadingText | None, float]:
+        with STAGE_SECONDS.time("seven_segment"):
+            return self._recognize(image)
+
+    def _recognize(self, image: np.ndarray) -> tuple[ReadingText | None, float]:
+        binary = binarize(image, self._invert)
+        values: dict[str, int | None] = {}
+        confidence = 1.0
+        for field, boxes in self._digits.items():
+            text, field_confidence = read_digits(binary, boxes)
+            if field_confidence == 0.0:
+                return None, 0.0
+            values[field] = int(text) if text else None
+            confidence = min(confidence, field_confidence)
+
+        mode = "UNKNOWN"
+        if self._mode_indicator:
+            x, y, w, h = self._mode_indicator
+            mode = "PRACA" if binary[y : y + h, x : x + w].mean() > 0.5 else "PODTRZYMANIE"
+
+        reading = ReadingText(
+            boiler_current=values.get("boiler_current"),
+            boiler_set=values.get("boiler_set"),
+            radiator_current=values.get("radiator_current"),
+            radiator_set=values.get("radiator_set"),
+            mode=mode,
+        )
+        return reading, confidence
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+from heater_reader.metrics import SNAPSHOT_CACHE
+import hashlib
+import threading
+
+
+@dataclass
+class Snapshot:
+    bytes: bytes
+    width: int
+    height: int
+    captured_at: datetime
+    etag: str = ""
+
+
+class SnapshotCache:
+    def __init__(self, ttl_seconds: int = 10, max_stale_seconds: int = 300, timeout: float = 15.0) -> None:
+        self._ttl = ttl_seconds
+        self._max_stale = max_stale_seconds
+        self._timeout = timeout
+        self._snapshot: Snapshot | None = None
+        self._cond = threading.Condition()
+        self._refreshing = False
+        self._generation = 0
+        self._error: Exception | None = None
+
+    def get(self, now: datetime) -> Snapshot | None:
+        with self._cond:
+            snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        age = (now - snapshot.captured_at).total_seconds()
+        if age > self._ttl:
+            return None
+        return snapshot
+
+    def set(self, data: bytes, width: int, height: int, captured_at: datetime | None = None) -> Snapshot:
+        if captured_at is None:
+            captured_at = datetime.now(timezone.utc)
+        etag = hashlib.blake2b(data, digest_size=12).hexdigest()
+        snapshot = Snapshot(data, width, height, captured_at, etag)
+        with self._cond:
+            self._snapshot = snapshot
+        return snapshot
+
+    def fetch(self, fetcher: Callable[[], tuple[bytes, int, int]], now: datetime | None = None) -> Snapshot:
+        if now is None:
+            now = datetime.now(timezone.utc)
+        with self._cond:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                age = (now - snapshot.captured_at).total_seconds()
+                if age <= self._ttl:
+                    SNAPSHOT_CACHE.inc("hit")
+                    return snapshot
+                if age <= self._ttl + self._max_stale:
+                    SNAPSHOT_CACHE.inc("stale")
+                    if not self._refreshing:
+                        self._refreshing = True
+                        threading.Thread(
+                            target=self._refresh_quietly, args=(fetcher,), name="snapshot-refresh", daemon=True
+                        ).start()
+                    return snapshot
+            if self._refreshing:
+                SNAPSHOT_CACHE.inc("wait")
+                generation = self._generation
+                if not self._cond.wait_for(lambda: self._generation != generation, self._timeout):
+                    raise TimeoutError("snapshot refresh timed out")
+                if self._error is not None:
+                    raise RuntimeError("snapshot refresh failed") from self._error
+                return self._snapshot
+            self._refreshing = True
+        SNAPSHOT_CACHE.inc("miss")
+        return self._refresh(fetcher)
+
+    def _refresh(self, fetcher: Callable[[], tuple[bytes, int, int]]) -> Snapshot:
+        try:
+            data, width, height = fetcher()
+        except Exception as exc:
+            self._finish(exc)
+            raise
+        snapshot = self.set(data, width=width, height=height)
+        self._finish(None)
+        return snapshot
+
+    def _refresh_quietly(self, fetcher: Callable[[], tuple[bytes, int, int]]) -> None:
+        try:
+            self._refresh(fetcher)
+        except Exception:
+            pass
+
+    def _finish(self, error: Exception | None) -> None:
+        with self._cond:
+            self._refreshing = False
+            self._error = error
+            self._generation += 1
+            self._cond.notify_all()
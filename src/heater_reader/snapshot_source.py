@@ -0,0 +1,202 @@
+from base64 import b64encode
+from datetime import datetime, timezone
+from urllib.parse import unquote, urlsplit
+from heater_reader.capture import FrameGrabber, grab_rtsp_snapshot
+from heater_reader.metrics import REGISTRY, STAGE_SECONDS
+import http.client
+import struct
+import threading
+import time
+
+SNAPSHOT_SOURCE = REGISTRY.counter(
+    "heater_snapshot_source_total", "Frames and snapshots fetched from each source by outcome.", ("source", "result")
+)
+
+# Start-of-frame markers carry the image size; C4 (DHT), C8 (JPG) and CC (DAC) share the range but do not.
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_dimensions(data: bytes) -> tuple[int, int]:
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("not a JPEG image")
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            offset += 1
+            continue
+        marker = data[offset + 1]
+        if marker == 0xFF or 0xD0 <= marker <= 0xD9:
+            offset += 2 if marker != 0xFF else 1
+            continue
+        (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        if marker in _SOF_MARKERS and offset + 9 <= len(data):
+            height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+            return width, height
+        offset += 2 + length
+    raise ValueError("JPEG has no frame header")
+
+
+class HttpSnapshotSource:
+    def __init__(self, url: str, timeout: float = 5.0, pool_size: int = 2) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported snapshot URL: {url}")
+        self.url = url
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self._target = parts.path or "/"
+        if parts.query:
+            self._target += f"?{parts.query}"
+        self._headers = {"Connection": "keep-alive", "Accept": "image/jpeg"}
+        if parts.username:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            self._headers["Authorization"] = "Basic " + b64encode(credentials.encode()).decode()
+        self._timeout = timeout
+        self._pool_size = pool_size
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _open(self) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=self._timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self._pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def fetch(self) -> bytes:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        # A pooled connection may have been dropped by the camera; retry once on a fresh one.
+        for reused in (conn is not None, False):
+            if conn is None:
+                conn = self._open()
+            try:
+                with STAGE_SECONDS.time("http_snapshot"):
+                    conn.request("GET", self._target, headers=self._headers)
+                    response = conn.getresponse()
+                    body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                conn = None
+                if reused:
+                    continue
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if response.status != 200:
+                raise RuntimeError(f"snapshot request failed with HTTP {response.status}")
+            return body
+        raise RuntimeError("snapshot request failed")
+
+    def snapshot(self) -> tuple[bytes, int, int]:
+        data = self.fetch()
+        width, height = jpeg_dimensions(data)
+        return data, width, height
+
+    def latest(self) -> tuple[bytes, datetime]:
+        data = self.fetch()
+        jpeg_dimensions(data)
+        return data, datetime.now(timezone.utc)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class AdaptiveSource:
+    def __init__(
+        self,
+        http_source: HttpSnapshotSource,
+        grabber: FrameGrabber,
+        retry_seconds: float = 60.0,
+        probe_every: int = 50,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.http = http_source
+        self.grabber = grabber
+        self.rtsp_url = grabber.rtsp_url
+        self._retry = retry_seconds
+        self._probe_every = probe_every
+        self._smoothing = smoothing
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._http_failed_at: float | None = None
+        self._started_grabber = False
+        self.latency: dict[str, float | None] = {"http": None, "rtsp": None}
+
+    def order(self) -> list[str]:
+        with self._lock:
+            self._calls += 1
+            if self._http_failed_at is not None and time.monotonic() - self._http_failed_at < self._retry:
+                return ["rtsp", "http"]
+            http_latency, rtsp_latency = self.latency["http"], self.latency["rtsp"]
+            # RTSP is only worth comparing while its stream is already being decoded, e.g. for a live view.
+            if rtsp_latency is None or not self.grabber.running:
+                return ["http", "rtsp"]
+            if http_latency is None or self._calls % self._probe_every == 0:
+                faster, slower = "http", "rtsp"
+            else:
+                faster, slower = ("http", "rtsp") if http_latency <= rtsp_latency else ("rtsp", "http")
+            return [faster, slower]
+
+    def _record(self, source: str, seconds: float | None) -> None:
+        with self._lock:
+            if seconds is None:
+                if source == "http":
+                    self._http_failed_at = time.monotonic()
+                return
+            if source == "http":
+                self._http_failed_at = None
+            previous = self.latency[source]
+            self.latency[source] = seconds if previous is None else previous + self._smoothing * (seconds - previous)
+
+    def _release_grabber(self) -> None:
+        # Keep decoding the stream only while HTTP is down or a live view is watching it.
+        with self._lock:
+            if not self._started_grabber or self.grabber.streaming:
+                return
+            self._started_grabber = False
+        self.grabber.stop()
+
+    def _first(self, fetchers: dict, timed: tuple[str, ...] = ("http", "rtsp")):
+        error: Exception | None = None
+        for source in self.order():
+            if source == "rtsp" and not self.grabber.running:
+                with self._lock:
+                    self._started_grabber = True
+            started = time.perf_counter()
+            try:
+                result = fetchers[source]()
+            except Exception as exc:
+                SNAPSHOT_SOURCE.inc(source, "error")
+                self._record(source, None)
+                error = exc
+                continue
+            SNAPSHOT_SOURCE.inc(source, "ok")
+            if source in timed:
+                self._record(source, time.perf_counter() - started)
+            if source == "http":
+                self._release_grabber()
+            return result
+        raise RuntimeError("no snapshot source available") from error
+
+    def snapshot(self) -> tuple[bytes, int, int]:
+        return self._first({"http": self.http.snapshot, "rtsp": lambda: grab_rtsp_snapshot(self.grabber)})
+
+    def latest(self) -> tuple:
+        # The grabber hands back an already decoded frame, so only HTTP timings are comparable here.
+        return self._first({"http": self.http.latest, "rtsp": self.grabber.latest}, timed=("http",))
+
+    def close(self) -> None:
+        self.http.close()
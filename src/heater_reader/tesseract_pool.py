@@ -0,0 +1,160 @@
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable
+import cv2
+import numpy as np
+import os
+import queue
+import re
+import shlex
+import subprocess
+import tempfile
+import threading
+
+_STOP = object()
+
+
+def _cli_batch(images: list[np.ndarray], config: str = "") -> list[str]:
+    import pytesseract
+
+    with tempfile.TemporaryDirectory(prefix="heater-ocr-") as tmp:
+        paths = []
+        for index, image in enumerate(images):
+            path = Path(tmp) / f"{index}.png"
+            cv2.imwrite(str(path), image)
+            paths.append(str(path))
+        listing = Path(tmp) / "batch.txt"
+        listing.write_text("\n".join(paths) + "\n")
+        result = subprocess.run(
+            [pytesseract.pytesseract.tesseract_cmd, str(listing), "stdout", *shlex.split(config)],
+            capture_output=True,
+            check=True,
+        )
+    text = result.stdout.decode("utf-8", errors="replace")
+    # Every page, even an empty one, ends with a form feed.
+    pages = text.removesuffix("\f").split("\f")
+    if len(pages) != len(images):
+        raise RuntimeError(f"tesseract returned {len(pages)} pages for {len(images)} images")
+    return pages
+
+
+class _TesserocrBatch:
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def __call__(self, images: list[np.ndarray], config: str = "") -> list[str]:
+        from PIL import Image
+        import tesserocr
+
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = self._local.api = tesserocr.PyTessBaseAPI()
+        psm = re.search(r"--psm\s+(\d+)", config)
+        variables = re.findall(r"-c\s+(\w+)=(\S*)", config)
+        api.SetPageSegMode(int(psm.group(1)) if psm else tesserocr.PSM.AUTO)
+        for name, value in variables:
+            api.SetVariable(name, value)
+        texts = []
+        try:
+            for image in images:
+                api.SetImage(Image.fromarray(image))
+                texts.append(api.GetUTF8Text())
+        finally:
+            for name, _ in variables:
+                api.SetVariable(name, "")
+        return texts
+
+
+def default_backend() -> Callable[[list[np.ndarray]], list[str]]:
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        return _cli_batch
+    return _TesserocrBatch()
+
+
+class TesseractExecutor:
+    def __init__(
+        self,
+        workers: int | None = None,
+        batch_size: int = 8,
+        backend: Callable[[list[np.ndarray]], list[str]] | None = None,
+    ) -> None:
+        self._workers = max(1, min(workers or os.cpu_count() or 1, os.cpu_count() or 1))
+        self._batch_size = batch_size
+        self._backend = backend or default_backend()
+        self._queue: queue.Queue = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def submit(self, image: np.ndarray, config: str = "") -> Future:
+        self._start()
+        future: Future = Future()
+        self._queue.put((image, config, future))
+        return future
+
+    def image_to_string(self, image: np.ndarray, config: str = "") -> str:
+        return self.submit(image, config).result()
+
+    def map(self, images: list[np.ndarray]) -> list[str]:
+        return [future.result() for future in [self.submit(image) for image in images]]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self._workers):
+                thread = threading.Thread(target=self._run, name=f"tesseract-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            jobs = [job]
+            while len(jobs) < self._batch_size:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                jobs.append(job)
+            groups: dict[str, list] = {}
+            for image, config, future in jobs:
+                groups.setdefault(config, []).append((image, future))
+            for config, group in groups.items():
+                self.batches += 1
+                images = [image for image, _ in group]
+                try:
+                    texts = self._backend(images, config) if config else self._backend(images)
+                except Exception as exc:
+                    for _, future in group:
+                        future.set_exception(exc)
+                    continue
+                for (_, future), text in zip(group, texts):
+                    future.set_result(text)
+
+
+_default: TesseractExecutor | None = None
+_default_lock = threading.Lock()
+
+
+def default_executor() -> TesseractExecutor:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TesseractExecutor()
+        return _default
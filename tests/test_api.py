@@ -21,3 +21,13 @@ def test_create_app_initializes_schema(tmp_path):
     response = client.get("/api/readings")
 
     assert response.status_code == 200
+
+
+def test_ocr_cache_stats_endpoint(tmp_path):
+    from heater_reader.ocr_cache import OcrCache
+
+    client = TestClient(create_app(str(tmp_path / "db.sqlite"), ocr_cache=OcrCache()))
+    disabled = TestClient(create_app(str(tmp_path / "db.sqlite")))
+
+    assert client.get("/api/ocr/cache").json() == {"unchanged": 0, "hits": 0, "misses": 0, "size": 0}
+    assert disabled.get("/api/ocr/cache").status_code == 404
@@ -1,7 +1,10 @@
+from datetime import datetime, timezone
 from fastapi.testclient import TestClient
 from heater_reader.app import create_app
+from heater_reader.config import RetentionConfig
 from heater_reader.db import Database
 from heater_reader.ocr import ReadingText
+from heater_reader.retention import apply_retention
 
 
 def test_readings_endpoint_returns_effective_values(tmp_path):
@@ -17,3 +20,160 @@ def test_readings_endpoint_returns_effective_values(tmp_path):
     response = client.get("/api/readings")
     assert response.status_code == 200
     assert response.json()[0]["boiler_current"] == 47
+
+
+def test_readings_endpoint_filters_time_range_and_paginates(tmp_path):
+    db_path = tmp_path / "db.sqlite"
+    db = Database(db_path)
+    db.init_schema()
+    for minute in range(5):
+        db.insert_reading(
+            ReadingText(40 + minute, 55, 42, 50, "PRACA"),
+            image_path="path.jpg",
+            captured_at=datetime(2026, 1, 31, 10, minute, tzinfo=timezone.utc),
+        )
+
+    app = create_app(str(db_path))
+    client = TestClient(app)
+
+    params = {"from": "2026-01-31T10:01:00Z", "to": "2026-01-31T10:04:00Z", "limit": 2}
+    first = client.get("/api/readings", params=params).json()
+    second = client.get("/api/readings", params={**params, "after_id": first[-1]["id"]}).json()
+
+    assert [r["boiler_current"] for r in first] == [41, 42]
+    assert [r["boiler_current"] for r in second] == [43]
+
+
+def test_series_endpoint_downsamples_readings(tmp_path):
+    db_path = tmp_path / "db.sqlite"
+    db = Database(db_path)
+    db.init_schema()
+    for minute in range(30):
+        db.insert_reading(
+            ReadingText(40 + minute % 7, 55, 42, 50, "PRACA"),
+            image_path="path.jpg",
+            captured_at=datetime(2026, 1, 31, 10, minute, tzinfo=timezone.utc),
+        )
+
+    client = TestClient(create_app(str(db_path)))
+
+    buckets = client.get("/api/readings/series", params={"points": 5}).json()
+    sampled = client.get("/api/readings/series", params={"points": 5, "method": "lttb"}).json()
+
+    assert len(buckets["t"]) == 5
+    assert len(sampled["boiler_current"]["t"]) == 5
+    assert client.get("/api/readings/series", params={"method": "bogus"}).status_code == 422
+
+
+def test_events_endpoint_rejects_invalid_last_event_id(tmp_path):
+    client = TestClient(create_app(str(tmp_path / "db.sqlite")))
+
+    response = client.get("/api/readings/events", headers={"Last-Event-ID": "abc"})
+
+    assert response.status_code == 400
+
+
+def test_readings_endpoint_returns_delta_since_change_seq_and_etag(tmp_path):
+    db_path = tmp_path / "db.sqlite"
+    db = Database(db_path)
+    db.init_schema()
+    first = db.insert_reading(ReadingText(45, 55, 42, 50, "PRACA"), image_path="a.jpg")
+    db.insert_reading(ReadingText(46, 55, 42, 50, "PRACA"), image_path="b.jpg")
+
+    client = TestClient(create_app(str(db_path)))
+    full = client.get("/api/readings")
+    seq = int(full.headers["x-change-seq"])
+
+    unchanged = client.get("/api/readings", headers={"If-None-Match": full.headers["etag"]})
+    db.insert_edit(first, boiler_current=47)
+    delta = client.get("/api/readings", params={"since": seq}, headers={"If-None-Match": full.headers["etag"]})
+
+    assert unchanged.status_code == 304
+    assert delta.status_code == 200
+    assert [row["boiler_current"] for row in delta.json()] == [47]
+    assert int(delta.headers["x-change-seq"]) > seq
+
+
+def test_readings_delta_reports_deleted_ids_and_expires_after_pruning(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    old = [
+        db.insert_reading(
+            ReadingText(40 + minute, 55, 42, 50, "PRACA"),
+            image_path=f"{minute}.jpg",
+            captured_at=datetime(2026, 1, 1, 10, minute, tzinfo=timezone.utc),
+        )
+        for minute in range(3)
+    ]
+    client = TestClient(create_app(str(db.path), db=db))
+    seq = int(client.get("/api/readings").headers["x-change-seq"])
+
+    apply_retention(db, RetentionConfig(raw_days=30, changes_days=0), now=datetime(2026, 3, 1, tzinfo=timezone.utc))
+    delta = client.get("/api/readings", params={"since": seq}).json()
+
+    assert [row["boiler_current"] for row in delta[:1]] == [41]
+    assert delta[1:] == [{"id": reading_id, "deleted": True} for reading_id in old]
+
+    db.prune_before("changes", "changed_at", datetime(2100, 1, 1, tzinfo=timezone.utc), 1000)
+    expired = client.get("/api/readings", params={"since": seq})
+
+    assert expired.status_code == 410
+    assert expired.json()["detail"] == "since_expired"
+    assert int(expired.headers["x-change-seq"]) > seq
+
+
+def test_readings_delta_rejects_limit(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    client = TestClient(create_app(str(db.path), db=db))
+
+    response = client.get("/api/readings", params={"since": 0, "limit": 10})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "limit_with_since"
+
+
+def test_readings_delta_only_reports_deleted_ids_of_the_requested_device(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    old = [
+        db.insert_reading(
+            ReadingText(40 + minute, 55, 42, 50, "PRACA"),
+            image_path=f"annex/{minute}.jpg",
+            captured_at=datetime(2026, 1, 1, 10, minute, tzinfo=timezone.utc),
+            device_id="annex",
+        )
+        for minute in range(3)
+    ]
+    client = TestClient(create_app(str(db.path), db=db))
+    seq = int(client.get("/api/readings").headers["x-change-seq"])
+
+    apply_retention(db, RetentionConfig(raw_days=30), now=datetime(2026, 3, 1, tzinfo=timezone.utc))
+
+    annex = client.get("/api/readings", params={"since": seq, "device": "annex"}).json()
+    boiler = client.get("/api/readings", params={"since": seq, "device": "boiler"}).json()
+    assert annex[1:] == [{"id": reading_id, "deleted": True} for reading_id in old]
+    assert boiler == []
+
+
+def test_readings_pagination_survives_the_cursor_row_being_compacted(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    for minute in (0, 1, 5, 6, 10):
+        db.insert_reading(
+            ReadingText(40 + minute, 55, 42, 50, "PRACA"),
+            image_path=f"{minute}.jpg",
+            captured_at=datetime(2026, 1, 1, 10, minute, tzinfo=timezone.utc),
+        )
+    client = TestClient(create_app(str(db.path), db=db))
+    first = client.get("/api/readings", params={"limit": 3}).json()
+
+    apply_retention(db, RetentionConfig(raw_days=30), now=datetime(2026, 3, 1, tzinfo=timezone.utc))
+    cursor = {"limit": 3, "after_id": first[-1]["id"], "after": first[-1]["captured_at"]}
+    second = client.get("/api/readings", params=cursor).json()
+    stale = client.get("/api/readings", params={"limit": 3, "after_id": first[-1]["id"]})
+
+    assert [row["captured_at"] for row in second] == ["2026-01-01 10:05:00", "2026-01-01 10:10:00"]
+    assert [row["boiler_current"] for row in second] == [46, 50]
+    assert stale.status_code == 400
+    assert stale.json()["detail"] == "unknown_after_id"
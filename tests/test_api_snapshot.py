@@ -14,3 +14,23 @@ def test_snapshot_endpoint_returns_jpeg(monkeypatch):
 
     assert response.status_code == 200
     assert response.headers["content-type"].startswith("image/jpeg")
+
+
+def test_snapshot_endpoint_answers_conditional_get(tmp_path):
+    calls = []
+
+    def fake_snapshot(rtsp_url):
+        calls.append(rtsp_url)
+        return b"jpeg", 10, 10
+
+    app = create_app(str(tmp_path / "db.sqlite"), rtsp_url="rtsp://example")
+    app.state.get_snapshot = fake_snapshot
+    client = TestClient(app)
+
+    first = client.get("/api/snapshot")
+    second = client.get("/api/snapshot", headers={"If-None-Match": first.headers["etag"]})
+
+    assert "last-modified" in first.headers
+    assert second.status_code == 304
+    assert second.content == b""
+    assert len(calls) == 1
@@ -0,0 +1,132 @@
+import asyncio
+import httpx
+import threading
+import time
+from heater_reader.app import create_app
+from heater_reader.db import Database
+from heater_reader.offload import Offload
+from heater_reader.ocr import ReadingText
+
+
+def make_app(tmp_path, **kwargs):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    db.insert_reading(ReadingText(45, 55, 42, 50, "PRACA"), image_path="a.jpg")
+    return create_app(str(db.path), db=db, rtsp_url="rtsp://example", **kwargs)
+
+
+def test_health_and_readings_stay_fast_while_snapshots_hang(tmp_path):
+    release = threading.Event()
+    app = make_app(tmp_path, camera_workers=1, camera_timeout=5)
+
+    def hanging_snapshot(rtsp_url):
+        release.wait(5)
+        return b"jpeg", 10, 10
+
+    app.state.get_snapshot = hanging_snapshot
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            snapshots = [asyncio.ensure_future(client.get("/api/snapshot")) for _ in range(8)]
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            health = await client.get("/health")
+            readings = await client.get("/api/readings")
+            elapsed = time.perf_counter() - started
+            release.set()
+            responses = await asyncio.gather(*snapshots)
+            return health, readings, elapsed, responses
+
+    health, readings, elapsed, responses = asyncio.run(scenario())
+
+    assert health.status_code == 200
+    assert readings.json()[0]["boiler_current"] == 45
+    assert elapsed < 1.0
+    assert [response.status_code for response in responses] == [200] * 8
+
+
+def test_snapshot_times_out_and_frees_the_request(tmp_path):
+    release = threading.Event()
+    app = make_app(tmp_path, camera_timeout=0.1)
+
+    def hanging_snapshot(rtsp_url):
+        release.wait(5)
+        return b"jpeg", 10, 10
+
+    app.state.get_snapshot = hanging_snapshot
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/snapshot")
+
+    response = asyncio.run(scenario())
+    release.set()
+
+    assert response.status_code == 504
+    assert response.json()["detail"] == "snapshot_timeout"
+
+
+def test_offload_cancels_queued_jobs_on_timeout():
+    offload = Offload("test", 1, timeout=0.05)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        blocker = asyncio.ensure_future(offload.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        try:
+            await offload.run(ran.append, 1)
+        except asyncio.TimeoutError:
+            pass
+        release.set()
+        try:
+            await blocker
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(scenario())
+    offload.shutdown()
+
+    assert ran == []
+
+
+def test_offload_iterate_streams_and_closes_the_source():
+    offload = Offload("test", 1)
+    closed = []
+
+    def source():
+        try:
+            yield from range(5)
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        items = []
+        async for item in offload.iterate(source()):
+            items.append(item)
+            if item == 2:
+                break
+        return items
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+    offload.shutdown()
+    assert closed == [True]
+
+
+def test_readings_fail_fast_when_the_connection_pool_is_exhausted(tmp_path):
+    db = Database(tmp_path / "db.sqlite", pool_size=1, pool_timeout=0.05)
+    db.init_schema()
+    app = create_app(str(db.path), db=db)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            with db._connect():
+                return await client.get("/api/readings")
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "database_busy"}
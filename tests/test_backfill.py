@@ -0,0 +1,131 @@
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from heater_reader.backfill import reprocess_archive
+from heater_reader.db import Database
+from heater_reader.image_store import captured_at_for_ref
+from heater_reader.ocr import ReadingText
+
+
+def make_archive(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"jpeg")
+    return [str(root / name) for name in names]
+
+
+def test_captured_at_comes_from_archive_path(tmp_path):
+    ts = captured_at_for_ref(tmp_path / "2026" / "01" / "31" / "100506.jpg")
+    assert ts.isoformat() == "2026-01-31T10:05:06+00:00"
+
+
+def test_reprocess_updates_existing_and_inserts_missing_readings(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    root = tmp_path / "images"
+    first, second = make_archive(root, ["2026/01/31/100506.jpg", "2026/01/31/100606.jpg"])
+    captured_at = captured_at_for_ref(root / "2026" / "01" / "31" / "100506.jpg")
+    reading_id = db.insert_reading(ReadingText(1, 1, 1, 1, "UNKNOWN"), image_path=first, captured_at=captured_at)
+    db.insert_edit(reading_id, mode="PODTRZYMANIE")
+
+    with ThreadPoolExecutor(2) as executor:
+        stats = reprocess_archive(
+            db,
+            root,
+            ocr=lambda path: ReadingText(45, 55, 42, 50, "PRACA"),
+            executor=executor,
+            batch_size=1,
+        )
+
+    assert stats.processed == 2
+    assert db.get_reading(reading_id)["boiler_current"] == 45
+    effective = db.get_effective_reading(reading_id)
+    assert effective["boiler_current"] == 45
+    assert effective["mode"] == "PODTRZYMANIE"
+    rows = db.list_effective_readings()
+    assert [row["captured_at"] for row in rows] == ["2026-01-31 10:05:06", "2026-01-31 10:06:06"]
+    assert db.get_backfill_checkpoint(str(root)) == second
+
+
+def test_reprocess_resumes_after_checkpoint(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    root = tmp_path / "images"
+    make_archive(root, ["2026/01/31/100506.jpg", "2026/01/31/100606.jpg", "2026/02/01/000000.jpg"])
+    seen = []
+
+    def interrupted_ocr(path):
+        if path.endswith("000000.jpg"):
+            raise KeyboardInterrupt
+        return ReadingText(45, 55, 42, 50, "PRACA")
+
+    with ThreadPoolExecutor(1) as executor:
+        try:
+            reprocess_archive(db, root, ocr=interrupted_ocr, executor=executor, batch_size=1)
+        except KeyboardInterrupt:
+            pass
+
+    def ocr(path):
+        seen.append(path)
+        return ReadingText(45, 55, 42, 50, "PRACA")
+
+    with ThreadPoolExecutor(1) as executor:
+        stats = reprocess_archive(db, root, ocr=ocr, executor=executor)
+
+    assert stats.skipped == 2
+    assert seen == [str(root / "2026" / "02" / "01" / "000000.jpg")]
+    assert len(db.list_effective_readings()) == 3
+
+
+def test_reprocess_records_failed_images_with_their_errors(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    root = tmp_path / "images"
+    broken, unreadable, _ = make_archive(
+        root, ["2026/01/31/100506.jpg", "2026/01/31/100606.jpg", "2026/01/31/100706.jpg"]
+    )
+
+    def ocr(path):
+        if path == broken:
+            raise ValueError("Failed to decode JPEG")
+        return None if path == unreadable else ReadingText(45, 55, 42, 50, "PRACA")
+
+    with ThreadPoolExecutor(2) as executor:
+        stats = reprocess_archive(db, root, ocr=ocr, executor=executor, batch_size=2)
+
+    assert stats.failed == 2
+    assert stats.failures == [(broken, "ValueError: Failed to decode JPEG"), (unreadable, "no reading recognized")]
+    errors = sorted(row["error"] for row in db.list_capture_errors())
+    assert errors == [
+        f"reprocess: {broken}: ValueError: Failed to decode JPEG",
+        f"reprocess: {unreadable}: no reading recognized",
+    ]
+    assert [row["captured_at"] for row in db.list_effective_readings()] == ["2026-01-31 10:07:06"]
+
+
+def test_reprocess_leaves_compacted_buckets_alone(tmp_path):
+    from heater_reader.config import RetentionConfig
+    from heater_reader.retention import apply_retention
+
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    root = tmp_path / "images"
+    paths = make_archive(root, [f"2026/01/31/10{minute:02d}00.jpg" for minute in range(5)])
+    for value, path in enumerate(paths):
+        db.insert_reading(ReadingText(40 + value, 55, 42, 50, "PRACA"), path, captured_at=captured_at_for_ref(path))
+    apply_retention(db, RetentionConfig(raw_days=30, bucket_minutes=5), now=datetime(2026, 3, 5, tzinfo=timezone.utc))
+    seen = []
+
+    def ocr(path):
+        seen.append(path)
+        return ReadingText(99, 55, 42, 50, "PRACA")
+
+    with ThreadPoolExecutor(1) as executor:
+        stats = reprocess_archive(db, root, ocr=ocr, executor=executor)
+    direct = [(paths[0], captured_at_for_ref(paths[0]), ReadingText(99, 55, 42, 50, "PRACA"))]
+    assert db.apply_ocr_results(direct) == 0
+
+    assert seen == []
+    assert stats.skipped == 5
+    rows = db.list_effective_readings()
+    assert [(row["boiler_current"], row["captured_at"]) for row in rows] == [(42, "2026-01-31 10:00:00")]
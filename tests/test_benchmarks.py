@@ -0,0 +1,30 @@
+import random
+from benchmarks.run import compare, measure
+from benchmarks.synthetic import MODE_BOX, build_database, digit_boxes, display_crop, random_reading, render_frame
+from heater_reader.ocr_pipeline import apply_crop
+from heater_reader.seven_segment import SevenSegmentEngine
+
+
+def test_synthetic_frames_decode_to_their_reading():
+    rng = random.Random(3)
+    engine = SevenSegmentEngine(digit_boxes(), mode_indicator=MODE_BOX)
+    for seed in range(5):
+        reading = random_reading(rng)
+        decoded, _ = engine.recognize(apply_crop(render_frame(reading, seed=seed), display_crop()))
+        assert decoded == reading
+
+
+def test_synthetic_database_applies_edits(tmp_path):
+    db = build_database(tmp_path / "bench.db", 200, edit_ratio=0.05)
+
+    assert len(db.list_effective_readings()) == 200
+    with db._connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM edits").fetchone()[0] == 10
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = {"results": {"fast": {"median_ms": 10.0}, "api": {"hit": {"median_ms": 1.0}}, "gone": {"median_ms": 1}}}
+    current = {"results": {"fast": {"median_ms": 11.0}, "api": {"hit": {"median_ms": 2.0}}, "tess": {"skipped": "x"}}}
+
+    assert compare(current, baseline, threshold=0.25) == ["api.hit"]
+    assert measure(lambda: None, 3)["runs"] == 3
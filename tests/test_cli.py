@@ -4,3 +4,24 @@ from heater_reader.cli import parse_args
 def test_parse_args_defaults():
     args = parse_args([])
     assert args.config == "config.yml"
+
+
+def test_parse_args_rebuild_effective():
+    args = parse_args(["--db", "x.db", "rebuild-effective"])
+    assert args.command == "rebuild-effective"
+    assert args.db == "x.db"
+
+
+def test_parse_args_reprocess():
+    args = parse_args(["reprocess", "--workers", "2", "--restart"])
+    assert args.command == "reprocess"
+    assert args.workers == 2
+    assert args.batch_size == 200
+    assert args.restart
+
+
+def test_parse_args_compact():
+    args = parse_args(["--db", "x.db", "compact"])
+    assert args.command == "compact"
+    assert not args.enable_auto_vacuum
+    assert parse_args(["compact", "--enable-auto-vacuum"]).enable_auto_vacuum
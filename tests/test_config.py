@@ -9,3 +9,74 @@ def test_load_config_uses_defaults_when_missing_fields(tmp_path):
 
     assert cfg.capture.interval_seconds == 60
     assert cfg.capture.image_root.name == "images"
+
+
+def test_load_config_parses_seven_segment_engine(tmp_path):
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(
+        "ocr:\n"
+        "  engine: seven_segment\n"
+        "  digits:\n"
+        "    boiler_current: [[0, 0, 20, 40], [24, 0, 20, 40]]\n"
+        "  mode_indicator: [100, 0, 10, 10]\n"
+    )
+
+    cfg = load_config(config_path)
+
+    assert cfg.ocr.engine == "seven_segment"
+    assert cfg.ocr.digits == {"boiler_current": [[0, 0, 20, 40], [24, 0, 20, 40]]}
+    assert cfg.ocr.mode_indicator == [100, 0, 10, 10]
+    assert cfg.ocr.min_confidence == 0.6
+
+
+def test_config_service_caches_until_file_changes(tmp_path):
+    from heater_reader.config import ConfigService
+
+    config_path = tmp_path / "config.yml"
+    config_path.write_text("capture:\n  interval_seconds: 60\n")
+    service = ConfigService(config_path)
+    seen = []
+    service.subscribe(seen.append)
+
+    first = service.get()
+    assert service.get() is first
+
+    config_path.write_text("capture:\n  interval_seconds: 300\n")
+    assert service.get().capture.interval_seconds == 300
+    assert len(seen) == 1
+
+
+def test_config_service_update_writes_atomically_and_notifies(tmp_path):
+    from heater_reader.config import ConfigService
+
+    config_path = tmp_path / "config.yml"
+    config_path.write_text("capture:\n  interval_seconds: 60\n")
+    service = ConfigService(config_path)
+    seen = []
+    service.subscribe(seen.append)
+
+    cfg = service.update(lambda raw: raw["capture"].update(crop={"x": 1, "y": 2, "w": 3, "h": 4}))
+
+    assert cfg.capture.crop == {"x": 1, "y": 2, "w": 3, "h": 4}
+    assert load_config(config_path).capture.interval_seconds == 60
+    assert seen == [cfg]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["config.yml"]
+
+
+def test_config_service_update_keeps_mode_and_symlink(tmp_path):
+    import stat
+    from heater_reader.config import ConfigService
+
+    real = tmp_path / "etc" / "config.yml"
+    real.parent.mkdir()
+    real.write_text("capture:\n  interval_seconds: 60\n")
+    real.chmod(0o640)
+    link = tmp_path / "config.yml"
+    link.symlink_to(real)
+
+    ConfigService(link).update(lambda raw: raw["capture"].update(interval_seconds=120))
+
+    assert link.is_symlink()
+    assert load_config(real).capture.interval_seconds == 120
+    assert stat.S_IMODE(real.stat().st_mode) == 0o640
+    assert sorted(p.name for p in real.parent.iterdir()) == ["config.yml"]
@@ -1,5 +1,6 @@
+import pytest
 from pathlib import Path
-from heater_reader.db import Database
+from heater_reader.db import Database, PoolTimeout
 from heater_reader.ocr import ReadingText
 
 
@@ -39,3 +40,57 @@ def test_db_creates_parent_directory_for_string_path(tmp_path):
     db.init_schema()
 
     assert db_path.exists()
+
+
+def test_effective_readings_return_one_row_per_reading(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+
+    reading_id = db.insert_reading(ReadingText(45, 55, 42, 50, "PRACA"), image_path="path.jpg")
+    db.insert_edit(reading_id, boiler_current=47, edited_by="adam")
+    db.insert_edit(reading_id, boiler_current=48, edited_by="adam")
+
+    rows = db.list_effective_readings()
+    assert len(rows) == 1
+    assert rows[0]["boiler_current"] == 48
+
+
+def test_edits_accumulate_and_rebuild_matches(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+
+    reading_id = db.insert_reading(ReadingText(45, 55, 42, 50, "PRACA"), image_path="path.jpg")
+    db.insert_edit(reading_id, boiler_current=47, edited_by="adam")
+    db.insert_edit(reading_id, mode="PODTRZYMANIE", edited_by="adam")
+    before = dict(db.get_effective_reading(reading_id))
+
+    assert db.rebuild_effective_readings() == 1
+    after = dict(db.get_effective_reading(reading_id))
+
+    assert before["boiler_current"] == 47
+    assert before["mode"] == "PODTRZYMANIE"
+    assert after == before
+
+
+def test_database_uses_wal_and_reuses_pooled_connections(tmp_path):
+    db = Database(tmp_path / "db.sqlite", pool_size=2)
+    db.init_schema()
+
+    with db._connect() as first:
+        mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+    with db._connect() as second:
+        assert second is first
+
+    assert mode == "wal"
+    db.close()
+
+
+def test_pool_acquire_times_out_when_all_connections_are_busy(tmp_path):
+    db = Database(tmp_path / "db.sqlite", pool_size=1, pool_timeout=0.05)
+    db.init_schema()
+
+    with db._connect():
+        with pytest.raises(PoolTimeout):
+            db.get_reading(1)
+
+    assert db.get_reading(1) is None
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from pathlib import Path
+import numpy as np
+import pytest
+import time
+from heater_reader.app import create_app
+from heater_reader.config import load_config
+from heater_reader.db import Database
+from heater_reader.ingest import IngestPipeline
+from heater_reader.ocr import ReadingText
+from heater_reader.scheduler import DeviceScheduler
+
+CONFIG = """
+capture:
+  image_root: data/images
+  interval_seconds: 30
+  crop: {x: 1, y: 2, w: 3, h: 4}
+devices:
+  - id: boiler
+    rtsp_url: rtsp://boiler/stream
+  - id: annex
+    rtsp_url: rtsp://annex/stream
+    interval_seconds: 120
+    crop: {x: 5, y: 6, w: 7, h: 8}
+"""
+
+
+def test_load_config_parses_devices_with_inherited_capture_settings(tmp_path):
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(CONFIG)
+
+    cfg = load_config(config_path)
+
+    assert [device.device_id for device in cfg.devices] == ["boiler", "annex"]
+    boiler, annex = cfg.devices
+    assert boiler.interval_seconds == 30
+    assert boiler.crop == {"x": 1, "y": 2, "w": 3, "h": 4}
+    assert boiler.image_root == Path("data/images/boiler")
+    assert annex.interval_seconds == 120
+    assert annex.crop == {"x": 5, "y": 6, "w": 7, "h": 8}
+    assert cfg.device() is boiler
+    assert cfg.device("annex") is annex
+    with pytest.raises(KeyError):
+        cfg.device("garage")
+
+
+def test_readings_and_errors_are_filtered_by_device(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    ts = datetime(2026, 1, 31, 10, tzinfo=timezone.utc)
+    db.insert_reading(ReadingText(45, 55, 42, 50, "PRACA"), "a.jpg", ts, device_id="boiler")
+    db.insert_reading(ReadingText(60, 65, 40, 45, "PRACA"), "b.jpg", ts, device_id="annex")
+    db.insert_capture_error("offline", ts, device_id="annex")
+
+    boiler = db.list_effective_readings(device_id="boiler")
+    assert [row["boiler_current"] for row in boiler] == [45]
+    assert boiler[0]["device_id"] == "boiler"
+    assert len(db.list_effective_readings()) == 2
+    assert len(db.list_capture_errors(device_id="annex")) == 1
+    assert db.list_capture_errors(device_id="boiler") == []
+    assert sorted(db.device_ids()) == ["annex", "boiler"]
+
+
+def test_scheduler_ticks_every_device(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    start = datetime(2026, 1, 31, 10, tzinfo=timezone.utc)
+
+    def make_pipeline(device_id, offset):
+        ticks = iter(range(1000))
+
+        def grab():
+            return np.zeros((10, 10, 3), dtype=np.uint8), start + timedelta(seconds=offset + next(ticks))
+
+        return IngestPipeline(
+            db,
+            grab=grab,
+            image_root=tmp_path / device_id,
+            ocr=lambda path: ReadingText(45, 55, 42, 50, "PRACA"),
+            interval_seconds=0.01,
+            device_id=device_id,
+        )
+
+    scheduler = DeviceScheduler([make_pipeline("boiler", 0), make_pipeline("annex", 5000)])
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not all(
+        db.list_effective_readings(device_id=device_id) for device_id in ("boiler", "annex")
+    ):
+        time.sleep(0.01)
+    scheduler.stop()
+
+    assert db.list_effective_readings(device_id="boiler")
+    assert db.list_effective_readings(device_id="annex")
+    assert set(scheduler.devices()) == {"boiler", "annex"}
+    assert scheduler.last_capture_at is not None
+
+
+def test_api_filters_and_snapshots_per_device(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    ts = datetime(2026, 1, 31, 10, tzinfo=timezone.utc)
+    db.insert_reading(ReadingText(45, 55, 42, 50, "PRACA"), "a.jpg", ts, device_id="boiler")
+    db.insert_reading(ReadingText(60, 65, 40, 45, "PRACA"), "b.jpg", ts, device_id="annex")
+    calls = []
+
+    def fake_snapshot(rtsp_url):
+        calls.append(rtsp_url)
+        return b"jpeg", 10, 10
+
+    app = create_app(
+        str(tmp_path / "db.sqlite"),
+        db=db,
+        devices={"boiler": "rtsp://boiler/stream", "annex": "rtsp://annex/stream"},
+    )
+    app.state.get_snapshot = fake_snapshot
+    client = TestClient(app)
+
+    readings = client.get("/api/readings", params={"device": "annex"}).json()
+    assert [row["boiler_current"] for row in readings] == [60]
+    assert [device["id"] for device in client.get("/api/devices").json()] == ["boiler", "annex"]
+
+    assert client.get("/api/snapshot", params={"device": "annex"}).status_code == 200
+    assert client.get("/api/snapshot", params={"device": "annex"}).status_code == 200
+    assert client.get("/api/snapshot").status_code == 200
+    assert calls == ["rtsp://annex/stream", "rtsp://boiler/stream"]
+    assert client.get("/api/snapshot", params={"device": "garage"}).status_code == 404
+
+
+def test_crop_update_targets_the_device_entry(tmp_path):
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(CONFIG)
+    client = TestClient(create_app(str(tmp_path / "db.sqlite"), config_path=config_path))
+
+    response = client.post("/api/crop", params={"device": "annex"}, json={"x": 9, "y": 9, "w": 90, "h": 90})
+
+    assert response.status_code == 200
+    assert client.get("/api/crop", params={"device": "annex"}).json() == {"x": 9, "y": 9, "w": 90, "h": 90}
+    assert client.get("/api/crop", params={"device": "boiler"}).json() == {"x": 1, "y": 2, "w": 3, "h": 4}
+    assert client.get("/api/crop", params={"device": "garage"}).status_code == 404
+
+
+def test_crop_update_without_device_targets_the_device_get_reads(tmp_path):
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(CONFIG.replace("rtsp://boiler/stream", "rtsp://boiler/stream\n    crop: {x: 0, y: 0, w: 9, h: 9}"))
+    client = TestClient(create_app(str(tmp_path / "db.sqlite"), config_path=config_path))
+
+    response = client.post("/api/crop", json={"x": 9, "y": 9, "w": 90, "h": 90})
+
+    assert response.status_code == 200
+    assert client.get("/api/crop").json() == {"x": 9, "y": 9, "w": 90, "h": 90}
+    assert client.get("/api/crop", params={"device": "boiler"}).json() == {"x": 9, "y": 9, "w": 90, "h": 90}
+    assert client.get("/api/crop", params={"device": "annex"}).json() == {"x": 5, "y": 6, "w": 7, "h": 8}
+
+
+def test_pack_images_packs_and_crops_every_device(tmp_path):
+    import cv2
+    from heater_reader.cli import main
+    from heater_reader.image_store import load_image
+
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(CONFIG.replace("data/images", str(tmp_path / "images")))
+    jpeg = cv2.imencode(".jpg", np.full((20, 30, 3), 50, dtype=np.uint8))[1].tobytes()
+    for device_id in ("boiler", "annex"):
+        day = tmp_path / "images" / device_id / "2026" / "01" / "30"
+        day.mkdir(parents=True)
+        (day / "235959.jpg").write_bytes(jpeg)
+
+    main(["--config", str(config_path), "--db", str(tmp_path / "db.sqlite"), "pack-images", "--crop-older-than", "0"])
+
+    for device_id, shape in (("boiler", (4, 3, 3)), ("annex", (8, 7, 3))):
+        image, cropped = load_image(f"{tmp_path}/images/{device_id}/2026/01/30.pack#235959")
+        assert image.shape == shape and cropped
+        assert not (tmp_path / "images" / device_id / "2026" / "01" / "30").exists()
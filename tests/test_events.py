@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+import asyncio
+import json
+from heater_reader.db import Database
+from heater_reader.events import ChangeFeed
+from heater_reader.ocr import ReadingText
+
+
+def parse(event: str) -> dict:
+    lines = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return {"id": int(lines["id"]), "event": lines["event"], "data": json.loads(lines["data"])}
+
+
+def test_feed_pushes_new_readings_and_edits(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    db.insert_reading(ReadingText(40, 55, 42, 50, "PRACA"), image_path="old.jpg")
+    feed = ChangeFeed(db, heartbeat_seconds=5)
+
+    async def listen():
+        stream = feed.stream()
+        assert (await stream.__anext__()).startswith("retry:")
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.05)
+        reading_id = await asyncio.to_thread(
+            db.insert_reading, ReadingText(45, 55, 42, 50, "PRACA"), "new.jpg"
+        )
+        first = await asyncio.wait_for(pending, 5)
+        await asyncio.to_thread(db.insert_edit, reading_id, boiler_current=47)
+        second = await asyncio.wait_for(stream.__anext__(), 5)
+        await stream.aclose()
+        return first, second
+
+    first, second = map(parse, asyncio.run(listen()))
+
+    assert first["event"] == "reading"
+    assert first["data"]["boiler_current"] == 45
+    assert second["event"] == "edit"
+    assert second["data"]["boiler_current"] == 47
+    assert second["id"] > first["id"]
+
+
+def test_feed_resumes_after_last_event_id(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    for value in (40, 41, 42):
+        db.insert_reading(ReadingText(value, 55, 42, 50, "PRACA"), image_path="p.jpg")
+    feed = ChangeFeed(db)
+
+    async def replay():
+        stream = feed.stream(last_event_id=1)
+        await stream.__anext__()
+        events = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return events
+
+    events = [parse(event) for event in asyncio.run(replay())]
+
+    assert [event["data"]["boiler_current"] for event in events] == [41, 42]
+
+
+def test_feed_resets_clients_whose_last_event_was_pruned(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    for value in (40, 41, 42):
+        db.insert_reading(ReadingText(value, 55, 42, 50, "PRACA"), image_path="p.jpg")
+    db.prune_before("changes", "changed_at", datetime(2100, 1, 1, tzinfo=timezone.utc), 2)
+    feed = ChangeFeed(db)
+
+    async def resume():
+        stream = feed.stream(last_event_id=0)
+        events = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return events
+
+    retry, reset = asyncio.run(resume())
+
+    assert retry.startswith("retry:")
+    assert parse(reset) == {"id": 3, "event": "reset", "data": {}}
@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+import csv
+import gzip
+import io
+import json
+from heater_reader.app import create_app
+from heater_reader.db import Database
+from heater_reader.export import csv_chunks, gzip_chunks
+from heater_reader.ocr import ReadingText
+
+
+def make_db(tmp_path, count=5):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    for minute in range(count):
+        db.insert_reading(
+            ReadingText(40 + minute, 55, 42, 50, "PRACA"),
+            image_path=f"{minute}.jpg",
+            captured_at=datetime(2026, 1, 31, 10, minute, tzinfo=timezone.utc),
+        )
+    return db
+
+
+def test_iter_export_rows_yields_bounded_chunks(tmp_path):
+    db = make_db(tmp_path)
+
+    chunks = list(db.iter_export_rows(chunk_size=2))
+
+    assert [len(rows) for rows in chunks] == [2, 2, 1]
+    assert chunks[0][0][:4] == (1, "2026-01-31 10:00:00", "default", 40)
+
+
+def test_export_csv_uses_effective_values_and_time_range(tmp_path):
+    db = make_db(tmp_path)
+    db.insert_edit(2, boiler_current=99, edited_by="adam")
+    client = TestClient(create_app(str(db.path), db=db))
+
+    response = client.get("/api/export", params={"from": "2026-01-31T10:01:00Z", "to": "2026-01-31T10:03:00Z"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["boiler_current"] for row in rows] == ["99", "42"]
+    assert "image_path" not in rows[0]
+
+
+def test_export_ndjson_raw_includes_original_values(tmp_path):
+    db = make_db(tmp_path, count=2)
+    db.insert_edit(1, boiler_current=99, edited_by="adam")
+    client = TestClient(create_app(str(db.path), db=db))
+
+    response = client.get("/api/export", params={"format": "ndjson", "raw": "true"})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["boiler_current"] for line in lines] == [40, 41]
+    assert lines[0]["image_path"] == "0.jpg"
+
+
+def test_export_gzip_round_trips(tmp_path):
+    db = make_db(tmp_path)
+    client = TestClient(create_app(str(db.path), db=db))
+
+    response = client.get("/api/export", params={"gzip": "true"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == 6
+
+
+def test_encoders_stream_header_only_for_empty_export():
+    assert b"".join(csv_chunks(("id", "mode"), [])) == b"id,mode\n"
+    assert gzip.decompress(b"".join(gzip_chunks([b"a", b"b"]))) == b"ab"
+
+
+def test_open_exports_do_not_hold_pool_connections(tmp_path):
+    db = make_db(tmp_path)
+    exports = [db.iter_export_rows(chunk_size=2) for _ in range(db.pool_size + 1)]
+    for export in exports:
+        next(export)
+
+    reading_id = db.insert_reading(ReadingText(50, 55, 42, 50, "PRACA"), image_path="new.jpg")
+
+    assert db.get_reading(reading_id) is not None
+    assert [len(rows) for rows in exports[0]] == [2, 2]
+
+
+def test_export_rejects_unknown_device(tmp_path):
+    db = make_db(tmp_path)
+    client = TestClient(create_app(str(db.path), db=db, rtsp_url="rtsp://example"))
+
+    assert client.get("/api/export", params={"device": "default"}).status_code == 200
+    assert client.get("/api/export", params={"device": "garage"}).status_code == 404
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import time
+from heater_reader.capture import FrameGrabber, grab_rtsp_snapshot
+
+
+class FakeCapture:
+    opened = 0
+
+    def __init__(self, url):
+        FakeCapture.opened += 1
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        if self.reads > 3:
+            return False, None
+        return True, np.full((12, 16, 3), self.reads, dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+def test_frame_grabber_keeps_latest_frame_and_reconnects():
+    FakeCapture.opened = 0
+    grabber = FrameGrabber("rtsp://example", open_capture=FakeCapture, backoff_initial=0.01)
+
+    frame, captured_at = grabber.latest(timeout=1)
+    data, width, height = grab_rtsp_snapshot(grabber)
+    time.sleep(0.1)
+    grabber.stop()
+
+    assert frame.shape == (12, 16, 3)
+    assert captured_at is not None
+    assert (width, height) == (16, 12)
+    assert data[:2] == b"\xff\xd8"
+    assert FakeCapture.opened >= 2
+
+
+def test_frame_grabber_raises_when_no_frame():
+    class DeadCapture(FakeCapture):
+        def read(self):
+            return False, None
+
+    grabber = FrameGrabber("rtsp://example", open_capture=DeadCapture, backoff_initial=0.01)
+
+    with pytest.raises(RuntimeError):
+        grabber.latest(timeout=0.05)
+    grabber.stop()
+
+
+def test_frame_grabber_rejects_stale_frame_after_stream_dies():
+    class StallingCapture(FakeCapture):
+        def read(self):
+            self.reads += 1
+            if self.reads > 1:
+                return False, None
+            return True, np.zeros((12, 16, 3), dtype=np.uint8)
+
+    grabber = FrameGrabber("rtsp://example", open_capture=StallingCapture, backoff_initial=10, max_age_seconds=0.05)
+
+    frame, _ = grabber.latest(timeout=1)
+    time.sleep(0.1)
+    with pytest.raises(RuntimeError, match="old"):
+        grabber.latest(timeout=0.05)
+    grabber.stop()
+
+    assert frame.shape == (12, 16, 3)
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+import cv2
+import numpy as np
+from heater_reader.image_store import (
+    PackStore,
+    build_store,
+    captured_at_for_ref,
+    image_exists,
+    load_image,
+)
+
+
+def jpeg(value: int, shape=(20, 30)) -> bytes:
+    return cv2.imencode(".jpg", np.full((*shape, 3), value, dtype=np.uint8))[1].tobytes()
+
+
+def test_pack_store_appends_and_reads_back(tmp_path):
+    store = build_store(tmp_path, "pack")
+    first = store.write(datetime(2026, 1, 31, 10, 5, 6, tzinfo=timezone.utc), jpeg(10))
+    second = store.write(datetime(2026, 1, 31, 10, 6, 6, tzinfo=timezone.utc), jpeg(200))
+
+    assert first.endswith("2026/01/31.pack#100506")
+    assert bytes(store.read(second)) == jpeg(200)
+    assert image_exists(first)
+    image, cropped = load_image(first)
+    assert image.shape == (20, 30, 3) and not cropped
+    assert captured_at_for_ref(second) == datetime(2026, 1, 31, 10, 6, 6, tzinfo=timezone.utc)
+    assert sorted(p.name for p in (tmp_path / "2026" / "01").iterdir()) == ["31.idx", "31.pack"]
+
+
+def test_import_directory_and_crop_old_pack(tmp_path):
+    day = tmp_path / "2026" / "01" / "30"
+    day.mkdir(parents=True)
+    (day / "235959.jpg").write_bytes(jpeg(50))
+    store = PackStore(tmp_path)
+
+    moves = store.import_directory(day)
+    assert moves == [(str(day / "235959.jpg"), f"{tmp_path}/2026/01/30.pack#235959")]
+    assert store.import_directory(day) == moves
+    assert len(store.refs(tmp_path / "2026" / "01" / "30.pack")) == 1
+
+    assert store.crop(tmp_path / "2026" / "01" / "30.pack", {"x": 0, "y": 0, "w": 10, "h": 8})
+    image, cropped = load_image(moves[0][1])
+    assert image.shape == (8, 10, 3) and cropped
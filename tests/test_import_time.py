@@ -0,0 +1,48 @@
+from pathlib import Path
+import os
+import pytest
+import subprocess
+import sys
+import heater_reader
+
+SRC = str(Path(heater_reader.__file__).resolve().parent.parent)
+HEAVY = {"cv2", "numpy", "pytesseract", "tesserocr"}
+# Self time of heater_reader modules only; framework imports (fastapi, pydantic) are not ours to budget.
+BUDGET_MS = 250
+
+
+def import_profile(module: str) -> dict[str, tuple[int, int]]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        profile[name] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["heater_reader.db", "heater_reader.config", "heater_reader.cli", "heater_reader.api", "heater_reader.app"],
+)
+def test_core_modules_do_not_import_opencv_or_tesseract(module):
+    profile = import_profile(module)
+
+    assert module in profile
+    assert not HEAVY & {name.split(".")[0] for name in profile}
+    own_ms = sum(self_us for name, (self_us, _) in profile.items() if name.startswith("heater_reader")) / 1000
+    assert own_ms < BUDGET_MS
+
+
+def test_cli_parse_args_stays_lightweight():
+    profile = import_profile("heater_reader.cli")
+
+    assert not {"fastapi", "uvicorn", "yaml"} & {name.split(".")[0] for name in profile}
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import threading
+from heater_reader.db import Database
+from heater_reader.ingest import IngestPipeline
+from heater_reader.ocr import ReadingText
+
+
+def make_grab():
+    start = datetime(2026, 1, 31, 10, 5, 6, tzinfo=timezone.utc)
+    calls = []
+
+    def grab():
+        calls.append(1)
+        return np.zeros((10, 10, 3), dtype=np.uint8), start + timedelta(seconds=len(calls) - 1)
+
+    return grab
+
+
+def test_pipeline_stores_image_and_inserts_reading(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    pipeline = IngestPipeline(
+        db,
+        grab=make_grab(),
+        image_root=tmp_path / "images",
+        ocr=lambda path: ReadingText(45, 55, 42, 50, "PRACA"),
+    )
+
+    pipeline.start_workers()
+    assert pipeline.tick()
+    pipeline.stop()
+
+    row = db.get_reading(1)
+    assert row["boiler_current"] == 45
+    assert row["captured_at"] == "2026-01-31 10:05:06"
+    assert (tmp_path / "images" / "2026" / "01" / "31" / "100506.jpg").exists()
+
+
+def test_pipeline_retries_capture_once_and_records_errors(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    calls = []
+
+    def failing_grab():
+        calls.append(1)
+        raise RuntimeError("camera offline")
+
+    pipeline = IngestPipeline(db, grab=failing_grab, image_root=tmp_path, ocr=lambda path: None)
+
+    assert pipeline.tick() is False
+    assert len(calls) == 2
+    assert len(db.list_capture_errors()) == 2
+
+
+def test_pipeline_drops_frames_when_ocr_falls_behind(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    release = threading.Event()
+
+    def slow_ocr(path):
+        release.wait(5)
+        return ReadingText(45, 55, 42, 50, "PRACA")
+
+    pipeline = IngestPipeline(db, grab=make_grab(), image_root=tmp_path, ocr=slow_ocr, queue_size=1)
+    pipeline.start_workers()
+    for _ in range(6):
+        pipeline.tick()
+    release.set()
+    pipeline.stop()
+
+    assert pipeline.dropped_frames > 0
+    assert any("backlog" in row["error"] for row in db.list_capture_errors())
+
+
+def test_pipeline_recognizes_in_memory_frame_when_configured(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    seen = []
+
+    def ocr_frame(frame):
+        seen.append(frame.shape)
+        return ReadingText(45, 55, 42, 50, "PRACA")
+
+    pipeline = IngestPipeline(
+        db,
+        grab=make_grab(),
+        image_root=tmp_path / "images",
+        ocr=lambda path: None,
+        ocr_frame=ocr_frame,
+    )
+
+    pipeline.start_workers()
+    assert pipeline.tick()
+    pipeline.stop()
+
+    assert seen == [(10, 10, 3)]
+    assert db.get_reading(1)["boiler_current"] == 45
+
+
+def test_pipeline_rejects_frame_that_is_not_newer_than_the_last(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    ts = datetime(2026, 1, 31, 10, 5, 6, tzinfo=timezone.utc)
+    pipeline = IngestPipeline(
+        db,
+        grab=lambda: (np.zeros((10, 10, 3), dtype=np.uint8), ts),
+        image_root=tmp_path / "images",
+        ocr=lambda path: ReadingText(45, 55, 42, 50, "PRACA"),
+    )
+
+    pipeline.start_workers()
+    assert pipeline.tick()
+    assert pipeline.tick() is False
+    pipeline.stop()
+
+    assert db.get_reading(2) is None
+    errors = db.list_capture_errors()
+    assert len(errors) == 1
+    assert "not newer" in errors[0]["error"]
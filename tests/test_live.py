@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+import numpy as np
+import time
+from heater_reader.live import MjpegBroadcaster, multipart_chunk
+
+
+class FakeGrabber:
+    def __init__(self):
+        self.count = 0
+
+    def wait_newer(self, since, timeout=5.0):
+        time.sleep(0.01)
+        self.count += 1
+        ts = datetime(2026, 1, 31, tzinfo=timezone.utc) + timedelta(seconds=self.count)
+        return np.full((48, 64, 3), self.count % 255, dtype=np.uint8), ts
+
+
+def test_viewers_share_one_encode_per_frame_and_size():
+    grabber = FakeGrabber()
+    broadcaster = MjpegBroadcaster(lambda: grabber)
+
+    async def watch():
+        full = [broadcaster.subscribe(fps=30), broadcaster.subscribe(fps=30)]
+        small = broadcaster.subscribe(fps=30, width=32)
+        frames = await asyncio.gather(*(subscriber.next() for subscriber in full + [small]))
+        for subscriber in full + [small]:
+            broadcaster.unsubscribe(subscriber)
+        return frames
+
+    first, second, small = asyncio.run(watch())
+
+    assert first[:2] == b"\xff\xd8"
+    assert len(small) < len(first)
+    assert broadcaster.frames_encoded <= 2 * grabber.count
+
+
+def test_slow_viewer_drops_frames_instead_of_buffering():
+    grabber = FakeGrabber()
+    broadcaster = MjpegBroadcaster(lambda: grabber)
+
+    async def watch():
+        subscriber = broadcaster.subscribe(fps=30)
+        await subscriber.next()
+        await asyncio.sleep(0.3)
+        await subscriber.next()
+        broadcaster.unsubscribe(subscriber)
+        return subscriber
+
+    subscriber = asyncio.run(watch())
+
+    assert subscriber.dropped > 0
+
+
+def test_multipart_chunk_has_boundary_and_length():
+    chunk = multipart_chunk(b"jpeg")
+    assert chunk.startswith(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 4\r\n\r\njpeg")
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from heater_reader.app import create_app
+from heater_reader.metrics import Histogram, STAGE_SECONDS
+from heater_reader.ocr_cache import OcrCache
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "ocr")
+    histogram.observe(0.5, "ocr")
+    histogram.observe(2.0, "ocr")
+
+    assert histogram.samples() == [
+        'demo_seconds_bucket{stage="ocr",le="0.1"} 1',
+        'demo_seconds_bucket{stage="ocr",le="1"} 2',
+        'demo_seconds_bucket{stage="ocr",le="+Inf"} 3',
+        'demo_seconds_sum{stage="ocr"} 2.55',
+        'demo_seconds_count{stage="ocr"} 3',
+    ]
+
+
+class _Pipeline:
+    last_capture_at = datetime(2026, 1, 31, 10, 5, tzinfo=timezone.utc)
+    dropped_frames = 2
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def queue_depths(self):
+        return {"store": 0, "ocr": 1, "insert": 0}
+
+
+def test_health_reports_last_capture_and_queue_depths(tmp_path):
+    client = TestClient(create_app(str(tmp_path / "db.sqlite"), pipeline=_Pipeline()))
+
+    body = client.get("/health").json()
+
+    assert body["last_capture_at"] == "2026-01-31T10:05:00+00:00"
+    assert body["queue_depths"] == {"store": 0, "ocr": 1, "insert": 0}
+    assert body["dropped_frames"] == 2
+
+
+def test_metrics_endpoint_exposes_stages_routes_and_gauges(tmp_path):
+    client = TestClient(create_app(str(tmp_path / "db.sqlite"), pipeline=_Pipeline(), ocr_cache=OcrCache()))
+    STAGE_SECONDS.observe(0.01, "db_insert")
+    client.get("/api/readings")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'heater_stage_duration_seconds_count{stage="db_insert"}' in text
+    assert 'heater_http_request_duration_seconds_count{method="GET",route="/api/readings",status="200"}' in text
+    assert 'heater_ingest_queue_depth{queue="ocr"} 1' in text
+    assert "# TYPE heater_ocr_cache_lookups_total counter" in text
+    assert 'heater_ocr_cache_lookups_total{result="misses"} 0' in text
+    assert "heater_last_capture_timestamp_seconds" in text
@@ -0,0 +1,114 @@
+import numpy as np
+from heater_reader.ocr import ReadingText
+from heater_reader.ocr_cache import OcrCache
+
+
+def lcd(value: int, noise: int = 0) -> np.ndarray:
+    image = np.full((40, 120), 220, dtype=np.uint8)
+    image[5:35, 10 + value * 10 : 20 + value * 10] = 20
+    if noise:
+        image[0, 0] = 220 - noise
+    return image
+
+
+def test_unchanged_region_reuses_previous_reading():
+    cache = OcrCache()
+    calls = []
+
+    def recognize(image):
+        calls.append(1)
+        return ReadingText(45, 55, 42, 50, "PRACA")
+
+    first = cache.recognize(lcd(1), recognize)
+    second = cache.recognize(lcd(1, noise=30), recognize)
+
+    assert first is second
+    assert len(calls) == 1
+    assert cache.stats()["unchanged"] == 1
+
+
+def test_returning_to_earlier_display_hits_lru():
+    cache = OcrCache(maxsize=2)
+    readings = iter([ReadingText(v, 55, 42, 50, "PRACA") for v in (1, 2, 3, 4)])
+    recognize = lambda image: next(readings)
+
+    assert cache.recognize(lcd(1), recognize).boiler_current == 1
+    assert cache.recognize(lcd(2), recognize).boiler_current == 2
+    assert cache.recognize(lcd(1), recognize).boiler_current == 1
+    assert cache.recognize(lcd(3), recognize).boiler_current == 3
+    assert cache.recognize(lcd(2), recognize).boiler_current == 4
+
+    assert cache.stats() == {"unchanged": 0, "hits": 1, "misses": 4, "size": 2}
+
+
+def test_uncropped_frames_bypass_the_cache(tmp_path):
+    from benchmarks.synthetic import DISPLAY_ORIGIN, MODE_BOX, digit_boxes, render_frame
+    from heater_reader.ocr_pipeline import recognize_frame
+    import yaml
+
+    y0, x0 = DISPLAY_ORIGIN
+    shift = lambda box: [box[0] + x0, box[1] + y0, box[2], box[3]]
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(
+        yaml.safe_dump(
+            {
+                "ocr": {
+                    "engine": "seven_segment",
+                    "digits": {name: [shift(box) for box in boxes] for name, boxes in digit_boxes().items()},
+                    "mode_indicator": shift(MODE_BOX),
+                }
+            }
+        )
+    )
+    cache = OcrCache()
+    first = ReadingText(45, 55, 42, 50, "PRACA")
+    second = ReadingText(71, 60, 38, 45, "PODTRZYMANIE")
+
+    readings = [recognize_frame(render_frame(reading), config_path, cache=cache) for reading in (first, second)]
+
+    assert readings == [first, second]
+    assert cache.stats()["unchanged"] == 0
+
+
+def test_every_single_segment_change_on_a_display_crop_is_recognized_again():
+    from benchmarks.synthetic import DIGITS, display_crop, render_frame
+    from heater_reader.ocr_pipeline import apply_crop
+
+    pairs = [
+        (a, b) for a in DIGITS for b in DIGITS if a < b and len(set(DIGITS[a]) ^ set(DIGITS[b])) == 1
+    ]
+    assert len(pairs) >= 6
+
+    def crop(value: int, seed: int = 0) -> np.ndarray:
+        frame = render_frame(ReadingText(value, 55, 42, 50, "PRACA"), seed=seed)
+        return apply_crop(frame, display_crop())
+
+    for a, b in pairs:
+        for tens in (4, 5):
+            cache = OcrCache()
+            calls = []
+
+            def recognize(image):
+                calls.append(1)
+                return ReadingText(len(calls), 55, 42, 50, "PRACA")
+
+            cache.recognize(crop(tens * 10 + int(a)), recognize)
+            cache.recognize(crop(tens * 10 + int(a), seed=1), recognize)
+            cache.recognize(crop(tens * 10 + int(b)), recognize)
+
+            assert len(calls) == 2, (tens, a, b)
+            assert cache.stats()["unchanged"] == 1
+
+
+def test_jpeg_noise_on_an_unchanged_display_is_ignored():
+    import cv2
+    from benchmarks.synthetic import display_crop, render_frame
+    from heater_reader.ocr_pipeline import apply_crop
+
+    cache = OcrCache()
+    frame = render_frame(ReadingText(58, 55, 42, 50, "PRACA"))
+    for quality in (95, 70):
+        jpeg = cv2.imdecode(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1], cv2.IMREAD_COLOR)
+        cache.recognize(apply_crop(jpeg, display_crop()), lambda image: ReadingText(58, 55, 42, 50, "PRACA"))
+
+    assert cache.stats()["unchanged"] == 1
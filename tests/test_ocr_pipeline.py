@@ -1,5 +1,6 @@
 from pathlib import Path
-from heater_reader.ocr_pipeline import extract_text_from_image
+from heater_reader.config import OcrConfig
+from heater_reader.ocr_pipeline import engine_for, extract_text_from_image
 
 
 def test_extract_text_from_image_returns_string(tmp_path):
@@ -11,3 +12,11 @@ def test_extract_text_from_image_returns_string(tmp_path):
 
     assert isinstance(text, str)
     assert text.strip() != ""
+
+
+def test_engine_is_reused_for_an_equal_config_and_rebuilt_on_change():
+    digits = {"0": [[0, 0, 4, 8]]}
+    engine = engine_for(OcrConfig(engine="seven_segment", digits=digits))
+
+    assert engine_for(OcrConfig(engine="seven_segment", digits=dict(digits))) is engine
+    assert engine_for(OcrConfig(engine="seven_segment", digits=digits, min_confidence=0.9)) is not engine
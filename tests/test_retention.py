@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+from heater_reader.config import RetentionConfig
+from heater_reader.db import Database
+from heater_reader.events import format_event
+from heater_reader.ocr import ReadingText
+from heater_reader.retention import apply_retention
+import sqlite3
+
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _seed(db, start, minutes, mode="PRACA"):
+    ids = []
+    for minute in range(minutes):
+        ts = start + timedelta(minutes=minute)
+        ids.append(db.insert_reading(ReadingText(40 + minute % 5, 55, 30, 50, mode), f"{minute}.jpg", captured_at=ts))
+    return ids
+
+
+def test_retention_collapses_old_rows_into_buckets(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    old = NOW - timedelta(days=40)
+    _seed(db, old, 10)
+    recent = _seed(db, NOW - timedelta(hours=1), 3)
+
+    stats = apply_retention(db, RetentionConfig(raw_days=30, bucket_minutes=5, batch_size=3), now=NOW)
+
+    assert stats.compacted == 8
+    rows = db.list_effective_readings()
+    assert [row["id"] for row in rows][-3:] == recent
+    compacted = rows[:2]
+    assert [row["captured_at"] for row in compacted] == ["2026-01-20 12:00:00", "2026-01-20 12:05:00"]
+    assert compacted[0]["boiler_current"] == 42
+    with db._connect() as conn:
+        summary = conn.execute(
+            "SELECT samples, boiler_current_min, boiler_current_max FROM readings_compacted WHERE id = ?",
+            (compacted[0]["id"],),
+        ).fetchone()
+    assert tuple(summary) == (5, 40, 44)
+
+    assert apply_retention(db, RetentionConfig(raw_days=30, bucket_minutes=5), now=NOW).compacted == 0
+
+
+def test_retention_keeps_mode_transitions(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    old = NOW - timedelta(days=40)
+    _seed(db, old, 2, mode="PRACA")
+    _seed(db, old + timedelta(minutes=2), 3, mode="STOP")
+
+    apply_retention(db, RetentionConfig(), now=NOW)
+
+    rows = db.list_effective_readings()
+    assert [(row["mode"], row["captured_at"]) for row in rows] == [
+        ("PRACA", "2026-01-20 12:00:00"),
+        ("STOP", "2026-01-20 12:02:00"),
+    ]
+
+
+def test_retention_prunes_errors_and_bumps_change_sequence(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    db.insert_capture_error("old", captured_at=NOW - timedelta(days=100))
+    db.insert_capture_error("new", captured_at=NOW - timedelta(days=1))
+    _seed(db, NOW - timedelta(days=40), 5)
+    before = db.latest_change_id()
+
+    stats = apply_retention(db, RetentionConfig(), now=NOW)
+
+    assert stats.errors_pruned == 1
+    assert [row["error"] for row in db.list_capture_errors()] == ["new"]
+    assert db.latest_change_id() > before
+
+
+def test_compaction_archives_edits_and_records_deletions(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    ids = _seed(db, NOW - timedelta(days=40), 5)
+    db.insert_edit(ids[1], boiler_current=60, edited_by="adam")
+    seq = db.latest_change_id()
+
+    apply_retention(db, RetentionConfig(raw_days=30, bucket_minutes=5), now=NOW)
+
+    changes = db.list_changes(seq)
+    assert [(row["kind"], row["id"]) for row in changes[:-1]] == [("delete", reading_id) for reading_id in ids]
+    merged = changes[-1]
+    assert merged["kind"] == "compact"
+    assert merged["boiler_current"] == 46
+    history = db.list_archived_edits(merged["id"])
+    assert [(row["reading_id"], row["boiler_current"], row["edited_by"]) for row in history] == [(ids[1], 60, "adam")]
+    assert format_event(changes[0]) == f'id: {changes[0]["change_id"]}\nevent: delete\ndata: {{"id": {ids[0]}}}\n\n'
+
+
+def test_new_database_uses_incremental_auto_vacuum_from_the_start(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+
+    with db._connect() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_existing_database_is_only_converted_on_request(tmp_path):
+    path = tmp_path / "db.sqlite"
+    legacy = sqlite3.connect(path)
+    legacy.execute("PRAGMA journal_mode=WAL")
+    legacy.execute("CREATE TABLE legacy (id INTEGER PRIMARY KEY)")
+    legacy.close()
+    db = Database(path)
+    db.init_schema()
+    _seed(db, NOW - timedelta(days=40), 5)
+
+    assert apply_retention(db, RetentionConfig(), now=NOW).pages_freed == 0
+    with db._connect() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    assert db.enable_incremental_vacuum()
+    assert not db.enable_incremental_vacuum()
+    with db._connect() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
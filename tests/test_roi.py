@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+from heater_reader.config import parse_config
+from heater_reader.roi import RoiPlan
+from heater_reader.tesseract_pool import TesseractExecutor
+
+
+def _display():
+    display = np.full((60, 200, 3), 255, dtype=np.uint8)
+    display[10:50, 20:80] = 0
+    display[10:30, 120:180] = 0
+    return display
+
+
+def test_perspective_plan_rectifies_the_display():
+    display = _display()
+    corners = np.float32([[100, 80], [310, 95], [300, 170], [95, 150]])
+    warp = cv2.getPerspectiveTransform(np.float32([[0, 0], [200, 0], [200, 60], [0, 60]]), corners)
+    frame = cv2.warpPerspective(display, warp, (400, 240), borderValue=(128, 128, 128))
+    cfg = parse_config({"capture": {"perspective": corners.tolist(), "perspective_size": [200, 60]}})
+
+    rectified = RoiPlan(cfg).display(frame)
+
+    assert rectified.shape == display.shape
+    assert np.abs(rectified.astype(int) - display.astype(int)).mean() < 12
+
+
+def test_regions_are_read_in_parallel_with_field_settings():
+    frame = np.zeros((100, 300, 3), dtype=np.uint8)
+    frame[20:50, 150:250] = 255
+    cfg = parse_config(
+        {
+            "capture": {"crop": {"x": 50, "y": 20, "w": 200, "h": 60}},
+            "ocr": {
+                "regions": {"boiler": [0, 0, 100, 30], "radiator": [100, 0, 100, 30], "mode": [0, 30, 200, 30]},
+                "region_scale": 2,
+            },
+        }
+    )
+    calls = []
+
+    def backend(images, config=""):
+        calls.append((len(images), images[0].shape, config))
+        if "A" in config:
+            return ["PRACA\n"] * len(images)
+        # The radiator region is the bright one, so the answer does not depend on how regions are batched.
+        return ["42/50\n" if image.mean() > 127 else "45/55\n" for image in images]
+
+    executor = TesseractExecutor(workers=2, backend=backend)
+    reading = RoiPlan(cfg).read(frame, executor)
+    executor.shutdown()
+
+    assert (reading.boiler_current, reading.boiler_set, reading.mode) == (45, 55, "PRACA")
+    assert (reading.radiator_current, reading.radiator_set) == (42, 50)
+    assert {shape for _, shape, _ in calls} == {(60, 200), (60, 400)}
+    assert any("tessedit_char_whitelist=0123456789/" in config and "--psm 7" in config for *_, config in calls)
+
+
+def test_regions_match_between_full_and_cropped_frames():
+    frame = np.random.default_rng(0).integers(0, 255, size=(120, 320, 3), dtype=np.uint8)
+    raw = {"capture": {"crop": {"x": 40, "y": 30, "w": 200, "h": 60}}, "ocr": {"regions": {"boiler": [10, 5, 50, 20]}}}
+    cfg = parse_config(raw)
+
+    full = RoiPlan(cfg).extract(frame)["boiler"]
+    cropped = RoiPlan(cfg, cropped=True).extract(frame[30:90, 40:240])["boiler"]
+
+    assert np.array_equal(full, cropped)
+
+
+def test_config_parses_region_settings():
+    cfg = parse_config({"ocr": {"regions": {"boiler": [1, 2, 3, 4], "mode": {"box": [5, 6, 7, 8], "psm": 8}}}})
+
+    assert cfg.ocr.regions["boiler"].tesseract_config() == "--psm 7 -c tessedit_char_whitelist=0123456789/"
+    assert cfg.ocr.regions["mode"].box == [5, 6, 7, 8]
+    assert cfg.ocr.regions["mode"].tesseract_config().startswith("--psm 8 -c tessedit_char_whitelist=ABC")
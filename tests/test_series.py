@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from heater_reader.db import Database
+from heater_reader.ocr import ReadingText
+from heater_reader.series import build_series, choose_resolution, lttb
+
+
+def test_choose_resolution_prefers_rollups_for_long_ranges():
+    assert choose_resolution(3600, 500) == "raw"
+    assert choose_resolution(365 * 86400, 500) == "hour"
+    assert choose_resolution(5 * 365 * 86400, 500) == "day"
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(100)
+    y = np.zeros(100)
+    y[37] = 10
+    keep = lttb(x, y, 10)
+    assert len(keep) == 10
+    assert keep[0] == 0 and keep[-1] == 99
+    assert 37 in keep
+
+
+def test_rollups_follow_inserts_and_edits(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    start = datetime(2026, 1, 31, 10, 0, tzinfo=timezone.utc)
+    ids = [
+        db.insert_reading(ReadingText(40 + i, 55, 42, 50, "PRACA"), image_path="p.jpg", captured_at=start + timedelta(minutes=i))
+        for i in range(4)
+    ]
+    db.insert_edit(ids[0], boiler_current=60)
+
+    hourly = db.list_series_rows("hour", start, start + timedelta(hours=1))
+    daily = db.list_series_rows("day", start.replace(hour=0), start + timedelta(days=1))
+
+    assert hourly[0]["samples"] == 4
+    assert hourly[0]["boiler_current_max"] == 60
+    assert hourly[0]["boiler_current_min"] == 41
+    assert tuple(daily[0])[1:] == tuple(hourly[0])[1:]
+
+
+def test_build_series_buckets_min_max_avg(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    start = datetime(2026, 1, 31, 10, 0, tzinfo=timezone.utc)
+    for i in range(6):
+        db.insert_reading(
+            ReadingText(40 + i, 55, None, None, "PRACA"),
+            image_path="p.jpg",
+            captured_at=start + timedelta(minutes=i),
+        )
+
+    series = build_series(db, start, start + timedelta(minutes=6), points=2)
+
+    assert series["resolution"] == "raw"
+    assert series["t"] == ["2026-01-31 10:00:00", "2026-01-31 10:03:00"]
+    assert series["boiler_current"] == {"avg": [41.0, 44.0], "min": [40.0, 43.0], "max": [42.0, 45.0]}
+    assert series["radiator_current"]["avg"] == [None, None]
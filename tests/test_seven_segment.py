@@ -0,0 +1,58 @@
+import numpy as np
+from heater_reader.ocr import ReadingText
+from heater_reader.ocr_pipeline import FallbackEngine
+from heater_reader.seven_segment import SevenSegmentEngine
+
+# Segment rectangles (x0, y0, x1, y1) inside a 30x50 digit box.
+SEGMENTS = {
+    "a": (6, 0, 24, 5),
+    "b": (24, 6, 30, 22),
+    "c": (24, 28, 30, 44),
+    "d": (6, 45, 24, 50),
+    "e": (0, 28, 6, 44),
+    "f": (0, 6, 6, 22),
+    "g": (6, 23, 24, 27),
+}
+DIGITS = {
+    "0": "abcdef", "1": "bc", "2": "abdeg", "3": "abcdg", "4": "bcfg",
+    "5": "acdfg", "6": "acdefg", "7": "abc", "8": "abcdefg", "9": "abcdfg",
+}
+
+
+def render(values: dict[str, str]):
+    image = np.full((60, 40 * 8, 3), 255, dtype=np.uint8)
+    boxes = {}
+    for column, (field, text) in enumerate(values.items()):
+        boxes[field] = []
+        for offset, digit in enumerate(text):
+            x, y = (column * 2 + offset) * 40 + 5, 5
+            for segment in DIGITS.get(digit, ""):
+                x0, y0, x1, y1 = SEGMENTS[segment]
+                image[y + y0 : y + y1, x + x0 : x + x1] = 0
+            boxes[field].append([x, y, 30, 50])
+    return image, boxes
+
+
+def test_seven_segment_reads_all_digits():
+    values = {"boiler_current": "01", "boiler_set": "23", "radiator_current": "45", "radiator_set": "67"}
+    image, boxes = render(values)
+    reading, confidence = SevenSegmentEngine(boxes).recognize(image)
+    assert reading == ReadingText(1, 23, 45, 67, "UNKNOWN")
+    assert confidence > 0.6
+
+    image, boxes = render({"boiler_current": "89", "boiler_set": " 8"})
+    reading, _ = SevenSegmentEngine(boxes).recognize(image)
+    assert (reading.boiler_current, reading.boiler_set) == (89, 8)
+
+
+def test_fallback_engine_used_when_pattern_is_unknown():
+    image, boxes = render({"boiler_current": "45"})
+    image[33:49, 5:11] = 0
+
+    class Fallback:
+        def recognize(self, image):
+            return ReadingText(45, 55, 42, 50, "PRACA"), 1.0
+
+    engine = FallbackEngine(SevenSegmentEngine(boxes), Fallback(), min_confidence=0.6)
+    reading, _ = engine.recognize(image)
+    assert reading.mode == "PRACA"
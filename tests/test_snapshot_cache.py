@@ -10,3 +10,43 @@ def test_snapshot_cache_returns_cached_within_ttl():
 
     assert cache.get(now + timedelta(seconds=9)) is not None
     assert cache.get(now + timedelta(seconds=11)) is None
+
+
+def test_snapshot_cache_coalesces_concurrent_fetches():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = SnapshotCache(ttl_seconds=10)
+    release = threading.Event()
+    calls = []
+
+    def fetcher():
+        calls.append(1)
+        release.wait(5)
+        return b"img", 100, 50
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(cache.fetch, fetcher) for _ in range(4)]
+        threading.Timer(0.05, release.set).start()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert len(calls) == 1
+    assert {snapshot.etag for snapshot in results} == {results[0].etag}
+
+
+def test_snapshot_cache_serves_stale_while_refreshing():
+    import threading
+
+    now = datetime(2026, 1, 31, 12, 0, 0, tzinfo=timezone.utc)
+    cache = SnapshotCache(ttl_seconds=10)
+    cache.set(b"old", width=100, height=50, captured_at=now)
+    refreshed = threading.Event()
+
+    def fetcher():
+        refreshed.set()
+        return b"new", 100, 50
+
+    stale = cache.fetch(fetcher, now=now + timedelta(seconds=11))
+
+    assert stale.bytes == b"old"
+    assert refreshed.wait(5)
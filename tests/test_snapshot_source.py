@@ -0,0 +1,176 @@
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+import pytest
+import threading
+from heater_reader.capture import FrameGrabber
+from heater_reader.db import Database
+from heater_reader.ingest import IngestPipeline
+from heater_reader.ocr import ReadingText
+from heater_reader.snapshot_source import AdaptiveSource, HttpSnapshotSource, jpeg_dimensions
+
+JPEG = cv2.imencode(".jpg", np.full((48, 64, 3), 128, dtype=np.uint8))[1].tobytes()
+
+
+@pytest.fixture
+def camera():
+    clients = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            clients.add(self.client_address)
+            if self.path != "/snapshot.jpg":
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(JPEG)))
+            self.end_headers()
+            self.wfile.write(JPEG)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", clients
+    server.shutdown()
+    server.server_close()
+
+
+class FakeCapture:
+    def __init__(self, url):
+        pass
+
+    def read(self):
+        return True, np.zeros((12, 16, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+def test_jpeg_dimensions_reads_the_frame_header():
+    assert jpeg_dimensions(JPEG) == (64, 48)
+    with pytest.raises(ValueError):
+        jpeg_dimensions(b"not a jpeg")
+
+
+def test_http_source_reuses_one_keep_alive_connection(camera):
+    base, clients = camera
+    source = HttpSnapshotSource(f"{base}/snapshot.jpg")
+
+    results = [source.snapshot() for _ in range(5)]
+    source.close()
+
+    assert results[0] == (JPEG, 64, 48)
+    assert source.connections_opened == 1
+    assert len(clients) == 1
+
+
+def test_http_source_raises_on_error_status(camera):
+    base, _ = camera
+    source = HttpSnapshotSource(f"{base}/missing.jpg")
+
+    with pytest.raises(RuntimeError):
+        source.fetch()
+
+
+def test_adaptive_source_falls_back_to_rtsp(camera):
+    base, _ = camera
+    grabber = FrameGrabber("rtsp://example", open_capture=FakeCapture)
+    source = AdaptiveSource(HttpSnapshotSource(f"{base}/missing.jpg"), grabber)
+
+    data, width, height = source.snapshot()
+    grabber.stop()
+
+    assert (width, height) == (16, 12)
+    assert data[:2] == b"\xff\xd8"
+    assert source.order() == ["rtsp", "http"]
+
+
+def test_adaptive_source_prefers_the_faster_measured_source(camera):
+    base, _ = camera
+    grabber = FrameGrabber("rtsp://example", open_capture=FakeCapture)
+    source = AdaptiveSource(HttpSnapshotSource(f"{base}/snapshot.jpg"), grabber, probe_every=1000)
+
+    assert source.snapshot() == (JPEG, 64, 48)
+    assert source.order()[0] == "http"
+    grabber.latest(timeout=1)
+    source.latency = {"http": 0.5, "rtsp": 0.01}
+    assert source.order()[0] == "rtsp"
+    source.latency = {"http": 0.01, "rtsp": 0.5}
+    assert source.order()[0] == "http"
+    grabber.stop()
+
+
+def test_pipeline_stores_camera_jpeg_and_decodes_only_for_ocr(tmp_path):
+    db = Database(tmp_path / "db.sqlite")
+    db.init_schema()
+    frames = []
+
+    def ocr_frame(frame):
+        frames.append(frame.shape)
+        return ReadingText(45, 55, 42, 50, "PRACA")
+
+    pipeline = IngestPipeline(
+        db,
+        grab=lambda: (JPEG, datetime(2026, 1, 31, 10, 5, 6, tzinfo=timezone.utc)),
+        image_root=tmp_path / "images",
+        ocr=lambda path: None,
+        ocr_frame=ocr_frame,
+    )
+    pipeline.start_workers()
+    assert pipeline.tick()
+    pipeline.stop()
+
+    assert (tmp_path / "images" / "2026" / "01" / "31" / "100506.jpg").read_bytes() == JPEG
+    assert frames == [(48, 64, 3)]
+    assert db.get_reading(1)["boiler_current"] == 45
+
+
+
+class FlakyHttp:
+    def __init__(self):
+        self.down = True
+
+    def latest(self):
+        if self.down:
+            raise RuntimeError("snapshot request failed")
+        return JPEG, datetime.now(timezone.utc)
+
+
+def test_http_latest_rejects_a_body_that_is_not_a_jpeg():
+    source = HttpSnapshotSource("http://camera/snapshot.jpg")
+    source.fetch = lambda: b"<html>login</html>"
+    grabber = FrameGrabber("rtsp://example", open_capture=FakeCapture)
+
+    with pytest.raises(ValueError):
+        source.latest()
+    frame, _ = AdaptiveSource(source, grabber).latest()
+    grabber.stop()
+
+    assert frame.shape == (12, 16, 3)
+
+
+def test_adaptive_source_stops_fallback_grabber_once_http_recovers():
+    http = FlakyHttp()
+    grabber = FrameGrabber("rtsp://example", open_capture=FakeCapture)
+    source = AdaptiveSource(http, grabber, retry_seconds=0)
+
+    source.latest()
+    assert grabber.running
+    http.down = False
+    assert source.latest()[0] == JPEG
+    assert not grabber.running
+
+    http.down = True
+    source.latest()
+    grabber.wait_newer(None, timeout=1)
+    http.down = False
+    assert source.latest()[0] == JPEG
+    assert grabber.running
+    grabber.stop()
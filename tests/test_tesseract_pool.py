@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+import subprocess
+import threading
+from heater_reader import tesseract_pool
+from heater_reader.ocr_pipeline import TesseractEngine
+from heater_reader.tesseract_pool import TesseractExecutor, _cli_batch
+
+
+def test_executor_batches_queued_crops():
+    release = threading.Event()
+    batches = []
+
+    def backend(images):
+        release.wait(5)
+        batches.append(len(images))
+        return [f"C.O. {int(image[0, 0])}/55 C.W.U. 42/50 PRACA" for image in images]
+
+    executor = TesseractExecutor(workers=1, batch_size=8, backend=backend)
+    futures = [executor.submit(np.full((4, 4), value, dtype=np.uint8)) for value in range(5)]
+    release.set()
+    texts = [future.result(timeout=5) for future in futures]
+    executor.shutdown()
+
+    assert texts[3].startswith("C.O. 3/55")
+    assert sum(batches) == 5
+    assert len(batches) < 5
+
+
+def test_executor_propagates_backend_errors():
+    def backend(images):
+        raise RuntimeError("tesseract missing")
+
+    executor = TesseractExecutor(workers=1, backend=backend)
+    try:
+        executor.image_to_string(np.zeros((4, 4), dtype=np.uint8))
+    except RuntimeError as exc:
+        assert "tesseract missing" in str(exc)
+    else:
+        raise AssertionError("expected RuntimeError")
+    finally:
+        executor.shutdown()
+
+
+def test_tesseract_engine_uses_executor():
+    executor = TesseractExecutor(workers=1, backend=lambda images: ["C.O. 45/55 C.W.U. 42/50 PRACA"] * len(images))
+    reading, _ = TesseractEngine(executor).recognize(np.zeros((4, 4, 3), dtype=np.uint8))
+    executor.shutdown()
+
+    assert reading.boiler_current == 45
+
+
+def test_cli_batch_maps_pages_to_images_and_rejects_a_mismatch(monkeypatch):
+    outputs = [b"45/55\n\f\f42/50\n\f", b"45/55\n\f"]
+
+    def fake_run(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 0, stdout=outputs.pop(0))
+
+    monkeypatch.setattr(tesseract_pool.subprocess, "run", fake_run)
+    images = [np.zeros((4, 4), dtype=np.uint8)] * 3
+
+    assert _cli_batch(images) == ["45/55\n", "", "42/50\n"]
+    with pytest.raises(RuntimeError, match="1 pages for 3 images"):
+        _cli_batch(images)
@@ -10,3 +10,23 @@ def test_index_html_served():
 
     assert response.status_code == 200
     assert "Boiler" in response.text
+
+
+def test_dashboard_follows_changes_from_the_loaded_sequence():
+    client = TestClient(create_app("data/readings.db"))
+
+    response = client.get("/")
+
+    assert "/api/readings/events?after=${seq}" in response.text
+    assert 'response.headers.get("X-Change-Seq")' in response.text
+    assert "datasets[index].data.push" not in response.text
+
+
+def test_dashboard_loads_a_bounded_table_page_without_duplicates():
+    client = TestClient(create_app("data/readings.db"))
+
+    response = client.get("/")
+
+    assert 'fetch("/api/readings")' not in response.text
+    assert "limit=${TABLE_LIMIT}" in response.text
+    assert 'if (readingsTable.querySelector(`tr[data-row-id="${row.id}"]`)) return;' in response.text